@@ -1,8 +1,39 @@
-import pandas as pd
+"""Row-level cleaning of the processed dataset.
+
+Rules, checked in one vectorised pass over all ``*_100g`` columns at once:
+
+  * ``<col>:range``   a nutrient value outside [0, 100] (NaN passes)
+  * ``nutrition_grade_fr:invalid``   target grade not in VALID_GRADES
+
+`split` returns the kept rows and the rejected rows with a ``reason`` column
+naming the first rule that fired; `clean` keeps only the former.
+Nutrient-range rejections can be logged through a `data_prep.outliers.OutlierSink`
+(passed explicitly, or created for OUTLIER_DEST when ``WRITE_OUTLIERS=true``).
+`clean_batches` applies the same rules batch by batch (pandas frames or Arrow
+batches/tables) so the full dataset can be cleaned out of core, e.g.::
+
+    dset = ds.dataset("s3://…/processed/", partitioning="hive")
+    for batch in clean_batches(dset.to_batches(batch_size=100_000)):
+        ...
+"""
+
+from __future__ import annotations
+
+import atexit
 import os
+from typing import Iterable, Iterator, List, Sequence, Tuple, TypeVar
 
-# set the flag for writing outliers
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from data_prep.outliers import OutlierSink
+
+# set the flag for writing outliers (to OUTLIER_DEST when no sink is passed)
 _WRITE_OUTLIERS = os.getenv("WRITE_OUTLIERS", "FALSE").lower() == "true"
+OUTLIER_DEST = os.getenv(
+    "OUTLIER_DEST", "s3://nutrisage-athena-results-352364310453/logs/outliers/")
 
 # valid nutrient scores
 VALID_GRADES = {'a', 'b', 'c', 'd', 'e'}
@@ -12,30 +43,111 @@ DROP_COLS = ['categories_tags', 'brands_tags',
              'countries_tags', 'serving_size', 'created_t',
              'energy_100g', 'fiber_100g']
 
+GRADE_RULE = "nutrition_grade_fr:invalid"
+
+# nutrient values are grams per 100 g
+RANGE_MIN, RANGE_MAX = 0, 100
+
+B = TypeVar("B", pd.DataFrame, pa.RecordBatch, pa.Table)
+
+
+def range_columns(columns: Sequence[str]) -> List[str]:
+    """Columns checked by the ``<col>:range`` rule."""
+    return [c for c in columns if c.endswith('_100g') and c not in DROP_COLS]
+
+
+def _verdict(values: np.ndarray, grade_ok: np.ndarray,
+             rules: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """One pass over an (n_rows, n_cols) float matrix.
+
+    Returns the keep mask and, per row, the index of the first rule that fired
+    (`len(rules)` = grade rule, -1 = kept).
+    """
+    with np.errstate(invalid="ignore"):
+        bad = (values > RANGE_MAX) | (values < RANGE_MIN)
+    out_of_range = bad.any(axis=1)
+    first = bad.argmax(axis=1) if bad.shape[1] else np.zeros(len(bad), int)
+    fired = np.where(out_of_range, first, -1)
+    fired[~out_of_range & ~grade_ok] = len(rules)
+    return fired < 0, fired
+
+
+def _reasons(fired: np.ndarray, rules: Sequence[str]) -> np.ndarray:
+    names = np.asarray([f"{c}:range" for c in rules] + [GRADE_RULE], dtype=object)
+    return names[fired]
+
+
+def split(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """``(kept, rejected)``; `rejected` carries a ``reason`` column."""
+    df = df.drop(columns=DROP_COLS, errors="ignore")
+    rules = range_columns(df.columns)
+    values = df[rules].to_numpy(dtype="float64", na_value=np.nan)
+    grade_ok = df['nutrition_grade_fr'].isin(VALID_GRADES).to_numpy()
+    keep, fired = _verdict(values, grade_ok, rules)
+
+    rejected = df.loc[~keep]
+    rejected = rejected.assign(reason=_reasons(fired[~keep], rules))
+    return df.loc[keep].reset_index(drop=True), rejected
+
+
+_default_sink: OutlierSink | None = None
+
+
+def _sink(sink: OutlierSink | None) -> OutlierSink | None:
+    """`sink`, or the process-wide OUTLIER_DEST sink when WRITE_OUTLIERS is set."""
+    global _default_sink
+    if sink is not None or not _WRITE_OUTLIERS:
+        return sink
+    if _default_sink is None:
+        _default_sink = OutlierSink(OUTLIER_DEST)
+        atexit.register(_default_sink.close)
+    return _default_sink
+
+
+def clean(df: pd.DataFrame, sink: OutlierSink | None = None) -> pd.DataFrame:
+
+    df_clean, rejected = split(df)
 
-def clean(df: pd.DataFrame) -> pd.DataFrame:
+    # nutrient-range outliers go to the sink (grade rejections are not logged)
+    sink = _sink(sink)
+    if sink is not None:
+        sink.put(rejected[rejected["reason"] != GRADE_RULE])
 
-    df_clean = df.drop(columns=DROP_COLS)
+    return df_clean
 
-    cols = [col for col in df_clean.columns if col.endswith('_100g')]
 
-    for col in cols:
-        # record outliers
-        mask = (df_clean[col] > 100) | (df_clean[col] < 0)
-        outliers = df_clean[mask]
+def _clean_arrow(batch: pa.RecordBatch | pa.Table,
+                 sink: OutlierSink | None) -> pa.RecordBatch | pa.Table:
+    batch = batch.drop_columns([c for c in DROP_COLS if c in batch.schema.names])
+    rules = range_columns(batch.schema.names)
+    values = np.column_stack(
+        [pc.cast(batch[c], pa.float64()).to_numpy(zero_copy_only=False)
+         for c in rules]) if rules else np.empty((batch.num_rows, 0))
+    grade_ok = pc.fill_null(pc.is_in(batch['nutrition_grade_fr'],
+                                     pa.array(sorted(VALID_GRADES))), False)
+    keep, fired = _verdict(values, grade_ok.to_numpy(zero_copy_only=False), rules)
 
-        # remove outliers
-        df_clean = df_clean.loc[~mask]
+    outlier = (fired >= 0) & (fired < len(rules))
+    if sink is not None and outlier.any():
+        rejected = batch.filter(pa.array(outlier))
+        sink.put(rejected.append_column(
+            "reason", pa.array(_reasons(fired[outlier], rules), pa.string())))
+    return batch.filter(pa.array(keep))
 
-    df_clean = df_clean.loc[df_clean['nutrition_grade_fr'].isin(VALID_GRADES
-                                                                ), :]
 
-    if _WRITE_OUTLIERS and not outliers.empty:
-        df_clean.loc[mask].to_parquet(
-            f"s3://nutrisage-athena-results-352364310453/logs/outliers/{pd.Timestamp.utcnow():%Y-%m-%d}.parquet")
+def clean_batches(batches: Iterable[B],
+                  sink: OutlierSink | None = None) -> Iterator[B]:
+    """Clean a stream of pandas frames or Arrow batches/tables, one at a time.
 
-    return df_clean.reset_index(drop=True)
+    Each output has the type of its input; memory is bounded by one batch.
+    """
+    sink = _sink(sink)
+    for batch in batches:
+        if isinstance(batch, pd.DataFrame):
+            yield clean(batch, sink)
+        else:
+            yield _clean_arrow(batch, sink)
 
 
 # export "clean"
-__all__ = ["clean"]
+__all__ = ["clean", "split", "clean_batches", "range_columns"]
@@ -0,0 +1,288 @@
+"""Content-addressed, on-disk cache of the cleaned training matrix.
+
+Every experiment used to re-read ``processed/``, re-run the cleaning rules and
+rebuild ``X, y``. `matrix` does that once per distinct input and keeps the
+result under CACHE_DIR, one directory per key::
+
+  <key>/X.f32        float32 feature matrix, C order          (rows, d)
+  <key>/y.i32        int32 labels (index into loader.LABELS)  (rows,)
+  <key>/entry.json   shape, columns, what went into the key
+
+The key is a SHA-256 over
+
+  data       the dataset `_manifest.json` entries (path, rows, bytes, schema,
+             min / max), or the listing (path, ETag / mtime, size) without one;
+             for a `sampling.SamplePlan` also the selected row groups
+  schema     KEEP_COLS and DTYPES
+  rules      the cleaning constants and the source of `data_prep.cleaning`
+  features   feature columns, label set, any featurizer config and the
+             source of `data_prep.loader` and `fe.serving`
+
+so new data, a schema change or an edited rule is a miss, never a stale hit.
+A hit memory-maps the files (no parse, no copy) – a warm run gets ``X, y``
+in milliseconds. Entries are written to a temp directory and renamed into
+place; least-recently-used entries are evicted once the cache exceeds its
+byte budget (CACHE_BYTES)::
+
+    X, y = matrix("s3://<bucket>/processed/")
+    dtrain = xgboost.QuantileDMatrix(X, label=y)
+
+  python -m data_prep.feature_cache --list
+  python -m data_prep.feature_cache --source s3://<bucket>/processed/
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import boto3
+import numpy as np
+
+from data_prep import cleaning, loader
+from data_prep.sampling import SamplePlan
+from fe import schema, serving
+from fe.feature_store import FEATURE_COLS
+from ingestion import footers, manifest, storage
+
+VERSION = 1
+X_FILE, Y_FILE, META = "X.f32", "y.i32", "entry.json"
+
+CACHE_DIR = os.getenv("NUTRISAGE_CACHE_DIR", os.path.join(
+    os.path.expanduser("~"), ".cache", "nutrisage", "features"))
+CACHE_BYTES = int(os.getenv("NUTRISAGE_CACHE_BYTES", 20 << 30))
+
+Matrix = Tuple[np.ndarray, np.ndarray]
+
+
+# ─────────────────────────────── keys ────────────────────────────────────────
+def data_fingerprint(source: str | SamplePlan,
+                     session: boto3.Session | None = None) -> Dict[str, Any]:
+    """What identifies the input data: manifest entries, else the listing."""
+    if isinstance(source, SamplePlan):
+        return {**data_fingerprint(source.root, source.session),
+                "sample": {p: source.selected[p] for p in sorted(source.selected)}}
+    m = manifest.DatasetManifest.load(source, session)
+    if m.entries:
+        files = [asdict(e) for _, e in sorted(m.entries.items())]
+    else:
+        files = sorted(list(f) for f in footers.list_data_files(source, session))
+    return {"root": source, "files": files}
+
+
+def _source_hash(module: Any) -> str:
+    return hashlib.sha256(inspect.getsource(module).encode("utf-8")).hexdigest()
+
+
+def rules_fingerprint() -> Dict[str, Any]:
+    """The cleaning rules: their constants and the module source."""
+    return {"grades": sorted(cleaning.VALID_GRADES), "drop": cleaning.DROP_COLS,
+            "range": [cleaning.RANGE_MIN, cleaning.RANGE_MAX],
+            "source": _source_hash(cleaning)}
+
+
+def featurizer_fingerprint() -> Dict[str, str]:
+    """Source of the code that turns cleaned batches into ``X, y`` (the
+    loader and the `serving_size` parser it derives SERVING_COLS with)."""
+    return {"loader": _source_hash(loader), "serving": _source_hash(serving)}
+
+
+def cache_key(source: str | SamplePlan,
+              session: boto3.Session | None = None,
+              columns: Sequence[str] = FEATURE_COLS,
+              featurizer: Dict[str, Any] | None = None) -> Tuple[str, Dict[str, Any]]:
+    """``(key, document)``; the key is the SHA-256 of the JSON document."""
+    doc = {
+        "version": VERSION,
+        "data": data_fingerprint(source, session),
+        "schema": {"keep": schema.KEEP_COLS, "dtypes": schema.DTYPES},
+        "rules": rules_fingerprint(),
+        "features": {"columns": list(columns), "labels": loader.LABELS,
+                     "dtype": "float32", "config": featurizer or {},
+                     "source": featurizer_fingerprint()},
+    }
+    raw = json.dumps(doc, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:32], doc
+
+
+# ─────────────────────────────── cache ───────────────────────────────────────
+def _touch(entry_dir: str) -> None:
+    """Stamp the LRU clock (entry.json mtime); explicit, as the kernel's
+    default file timestamps are too coarse to order back-to-back uses."""
+    now = time.time_ns()
+    os.utime(os.path.join(entry_dir, META), ns=(now, now))
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    rows: int
+    columns: List[str]
+    bytes: int
+    last_used: float
+    source: str | None = None
+
+
+class FeatureCache:
+    """Directory of cached matrices with LRU eviction under `budget` bytes."""
+
+    def __init__(self, root: str = CACHE_DIR, budget: int = CACHE_BYTES) -> None:
+        self.root = os.path.abspath(root)
+        self.budget = budget
+
+    def _dir(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def entries(self) -> List[CacheEntry]:
+        """Complete entries, least recently used first."""
+        out = []
+        if not os.path.isdir(self.root):
+            return out
+        for key in os.listdir(self.root):
+            meta = os.path.join(self.root, key, META)
+            if key.startswith(".") or not os.path.isfile(meta):
+                continue
+            with open(meta, encoding="utf-8") as fh:
+                doc = json.load(fh)
+            size = sum(os.path.getsize(os.path.join(self.root, key, f))
+                       for f in (X_FILE, Y_FILE, META))
+            out.append(CacheEntry(key, doc["rows"], doc["columns"], size,
+                                  os.path.getmtime(meta), doc.get("source")))
+        return sorted(out, key=lambda e: (e.last_used, e.key))
+
+    def get(self, key: str) -> Matrix | None:
+        """Memory-mapped ``(X, y)`` for `key`, or None; marks it used."""
+        path = self._dir(key)
+        try:
+            with open(os.path.join(path, META), encoding="utf-8") as fh:
+                doc = json.load(fh)
+        except FileNotFoundError:
+            return None
+        _touch(path)
+        rows, d = doc["rows"], len(doc["columns"])
+        if not rows:                                         # mmap needs bytes
+            return np.empty((0, d), np.float32), np.empty(0, np.int32)
+        X = np.memmap(os.path.join(path, X_FILE), np.float32, "r", shape=(rows, d))
+        y = np.memmap(os.path.join(path, Y_FILE), np.int32, "r", shape=(rows,))
+        return X, y
+
+    def put(self, key: str, batches: Iterable[Matrix], columns: Sequence[str],
+            info: Dict[str, Any] | None = None) -> Matrix:
+        """Stream `batches` to disk as entry `key`, evict, return the mapping.
+
+        Memory stays at one batch; the entry becomes visible only once
+        complete (a concurrent writer of the same key wins, ours is dropped).
+        """
+        os.makedirs(self.root, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=f".{key}-", dir=self.root)
+        try:
+            rows = 0
+            with open(os.path.join(tmp, X_FILE), "wb") as fx, \
+                    open(os.path.join(tmp, Y_FILE), "wb") as fy:
+                for X, y in batches:
+                    fx.write(np.ascontiguousarray(X, np.float32).tobytes())
+                    fy.write(np.ascontiguousarray(y, np.int32).tobytes())
+                    rows += len(y)
+            with open(os.path.join(tmp, META), "w", encoding="utf-8") as fh:
+                json.dump({"version": VERSION, "rows": rows, "columns": list(columns),
+                           "created_at": int(time.time()), **(info or {})},
+                          fh, indent=2, default=str)
+            _touch(tmp)
+            try:
+                os.rename(tmp, self._dir(key))
+            except OSError:
+                if not os.path.isdir(self._dir(key)):
+                    raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict(keep=(key,))
+        return self.get(key)
+
+    def evict(self, keep: Sequence[str] = ()) -> List[str]:
+        """Drop least-recently-used entries until the cache fits the budget
+        (entries in `keep` are never dropped). Returns the evicted keys."""
+        entries = self.entries()
+        total = sum(e.bytes for e in entries)
+        gone = []
+        for e in entries:
+            if total <= self.budget:
+                break
+            if e.key in keep:
+                continue
+            shutil.rmtree(self._dir(e.key), ignore_errors=True)
+            total -= e.bytes
+            gone.append(e.key)
+        return gone
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+# ─────────────────────────────── API ─────────────────────────────────────────
+def matrix(source: str | SamplePlan,
+           session: boto3.Session | None = None,
+           columns: Sequence[str] = FEATURE_COLS,
+           cache: FeatureCache | None = None,
+           batch_size: int = 100_000,
+           featurizer: Dict[str, Any] | None = None) -> Matrix:
+    """Cleaned ``(X float32, y int32)`` for `source` (dataset URI / bucket /
+    directory, or a row-group sample plan), from the cache when possible."""
+    cache = cache or FeatureCache()
+    if isinstance(source, str):
+        source = storage.processed_uri(source)
+    key, doc = cache_key(source, session, columns, featurizer)
+    hit = cache.get(key)
+    if hit is not None:
+        return hit
+    dataset = source.dataset() if isinstance(source, SamplePlan) else \
+        manifest.open_dataset(source, session)
+    root = source.root if isinstance(source, SamplePlan) else source
+    return cache.put(key, loader.iter_training_batches(dataset, columns, batch_size),
+                     columns, info={"source": root, "key": {
+                         k: v for k, v in doc.items() if k != "data"}})
+
+
+# ─────────────────────────────── CLI ─────────────────────────────────────────
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Cached training feature matrices")
+    p.add_argument("--source", help="build (or hit) the entry for this dataset: "
+                                    "s3://bucket/processed/, bucket or directory")
+    p.add_argument("--cache-dir", default=CACHE_DIR)
+    p.add_argument("--budget", type=int, default=CACHE_BYTES, help="bytes")
+    p.add_argument("--profile", help="AWS profile (optional)")
+    p.add_argument("--batch-size", type=int, default=100_000)
+    p.add_argument("--list", action="store_true", help="list entries (LRU first)")
+    p.add_argument("--clear", action="store_true", help="delete every entry")
+    args = p.parse_args(argv)
+
+    cache = FeatureCache(args.cache_dir, args.budget)
+    if args.clear:
+        cache.clear()
+    if args.source:
+        session = boto3.Session(profile_name=args.profile) if args.profile else None
+        t0 = time.perf_counter()
+        X, _ = matrix(args.source, session, cache=cache, batch_size=args.batch_size)
+        print(f"✔ Feature matrix: {X.shape[0]:,} × {X.shape[1]} "
+              f"({time.perf_counter() - t0:,.2f} s)")
+    if args.list:
+        for e in cache.entries():
+            print(f"  {e.key}  {e.rows:>12,} rows  {e.bytes / (1 << 20):>10,.1f} MiB  "
+                  f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(e.last_used))}  "
+                  f"{e.source or ''}")
+
+
+__all__ = ["CACHE_DIR", "CACHE_BYTES", "CacheEntry", "FeatureCache",
+           "cache_key", "data_fingerprint", "rules_fingerprint",
+           "featurizer_fingerprint", "matrix"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Stream the processed dataset into XGBoost without a full pandas frame.
+
+Arrow record batches are read from ``processed/`` (S3 or local; through the
+dataset `_manifest.json` when present) with only the needed columns, cleaned
+batch by batch with the `cleaning` rules, label-encoded and handed to an
+`xgboost.DataIter`. `quantile_dmatrix` builds a `xgboost.QuantileDMatrix`
+from it, so peak memory is one Arrow batch plus the quantised matrix instead
+of the whole dataset as float64::
+
+    dtrain = quantile_dmatrix("s3://<bucket>/processed/", batch_size=250_000)
+    booster = xgboost.train({"objective": "multi:softprob",
+                             "num_class": len(LABELS)}, dtrain)
+
+Features are the numeric predictors kept by `cleaning.clean` (the same
+vector as `fe.feature_store`); `fe.serving.SERVING_COLS` may be added and are
+then derived from `serving_size` before cleaning. The label is the index of
+the grade in LABELS (``a`` → 0 … ``e`` → 4).
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Iterator, List, Sequence, Tuple
+
+import boto3
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import xgboost
+
+from data_prep.cleaning import VALID_GRADES, clean_batches, range_columns
+from data_prep.outliers import OutlierSink
+from fe import schema, serving
+from fe.feature_store import FEATURE_COLS
+from ingestion import manifest, storage
+
+LABELS: List[str] = sorted(VALID_GRADES)
+_LABEL_SET = pa.array(LABELS, pa.string())
+
+Batch = Tuple[np.ndarray, np.ndarray]
+
+
+def encode_labels(grades: pa.Array | pa.ChunkedArray) -> np.ndarray:
+    """Grade → int32 class index (-1 for anything outside LABELS)."""
+    idx = pc.index_in(pc.cast(grades, pa.string()), value_set=_LABEL_SET)
+    return pc.fill_null(idx, -1).to_numpy(zero_copy_only=False).astype(np.int32)
+
+
+def iter_training_batches(dataset: ds.Dataset,
+                          columns: Sequence[str] = FEATURE_COLS,
+                          batch_size: int = 100_000,
+                          filter: ds.Expression | None = None,
+                          sink: OutlierSink | None = None) -> Iterator[Batch]:
+    """``(X float32 (n, d), y int32)`` per cleaned Arrow batch.
+
+    Reads only `columns`, the target and the columns the cleaning rules
+    check, so the kept rows match `cleaning.clean` on the full frame.
+    """
+    names = dataset.schema.names
+    derive = any(c in serving.SERVING_COLS for c in columns)
+    read = list(dict.fromkeys([*columns, *range_columns(names), schema.TARGET,
+                               *([serving.SERVING_SOURCE] if derive else [])]))
+    batches = dataset.to_batches(columns=[c for c in read if c in names],
+                                 filter=filter, batch_size=batch_size)
+    if derive:
+        batches = map(serving.add_serving_columns, batches)
+    for batch in clean_batches((b for b in batches if b.num_rows), sink=sink):
+        if not batch.num_rows:
+            continue
+        X = np.column_stack([
+            pc.cast(batch[c], pa.float32()).to_numpy(zero_copy_only=False)
+            if c in batch.schema.names else np.full(batch.num_rows, np.nan, np.float32)
+            for c in columns])
+        yield np.ascontiguousarray(X, dtype=np.float32), encode_labels(batch[schema.TARGET])
+
+
+class BatchIter(xgboost.DataIter):
+    """`xgboost.DataIter` over a re-startable batch source.
+
+    XGBoost walks the data more than once (sketch, then fill), so `make`
+    is called again on every `reset` instead of caching batches.
+    """
+
+    def __init__(self, make: Callable[[], Iterator[Batch]],
+                 feature_names: Sequence[str],
+                 cache_prefix: str | None = None) -> None:
+        self._make = make
+        self._it: Iterator[Batch] | None = None
+        self.feature_names = list(feature_names)
+        self.rows = 0                          # rows fed in the last pass
+        super().__init__(cache_prefix=cache_prefix)
+
+    def reset(self) -> None:
+        self._it = None
+
+    def next(self, input_data: Callable) -> bool:
+        if self._it is None:
+            self._it = self._make()
+            self.rows = 0
+        try:
+            X, y = next(self._it)
+        except StopIteration:
+            return False
+        input_data(data=X, label=y, feature_names=self.feature_names)
+        self.rows += len(y)
+        return True
+
+
+def batch_iter(source: str | ds.Dataset,
+               session: boto3.Session | None = None,
+               columns: Sequence[str] = FEATURE_COLS,
+               batch_size: int = 100_000,
+               filter: ds.Expression | None = None) -> BatchIter:
+    """`BatchIter` over the dataset at `source` (URI, bucket, directory or
+    an opened `pyarrow.dataset.Dataset`)."""
+    dataset = source if isinstance(source, ds.Dataset) else \
+        manifest.open_dataset(storage.processed_uri(source), session)
+    return BatchIter(lambda: iter_training_batches(dataset, columns, batch_size,
+                                                   filter),
+                     feature_names=columns)
+
+
+def quantile_dmatrix(source: str | ds.Dataset,
+                     session: boto3.Session | None = None,
+                     columns: Sequence[str] = FEATURE_COLS,
+                     batch_size: int = 100_000,
+                     filter: ds.Expression | None = None,
+                     max_bin: int = 256,
+                     ref: xgboost.DMatrix | None = None) -> xgboost.QuantileDMatrix:
+    """Stream `source` into a `QuantileDMatrix` (pass the training matrix as
+    `ref` when building a validation set)."""
+    it = batch_iter(source, session, columns, batch_size, filter)
+    return xgboost.QuantileDMatrix(it, max_bin=max_bin, ref=ref)
+
+
+__all__ = ["LABELS", "encode_labels", "iter_training_batches", "BatchIter",
+           "batch_iter", "quantile_dmatrix"]
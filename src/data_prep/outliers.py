@@ -0,0 +1,149 @@
+"""Background, partitioned sink for rows rejected by `cleaning.clean`.
+
+`OutlierSink.put()` only enqueues the rejected rows (with their ``reason``);
+a daemon thread converts them to Arrow and buffers them per
+``date=<UTC day>/rule=<reason>`` partition through
+`ingestion.writer.PartitionWriter`, which writes size-bounded files named
+``part-<run_id>-<seq>.parquet``. Repeated runs on the same day therefore add
+files instead of overwriting one, and batch mode costs one PUT per full file
+rather than one per batch.
+
+    with OutlierSink("s3://<bucket>/logs/outliers/") as sink:
+        for batch in clean_batches(batches, sink=sink):
+            ...
+
+The destination may be an S3 URI or a local directory.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from typing import List
+
+import boto3
+import pandas as pd
+import pyarrow as pa
+
+from ingestion import storage
+from ingestion.writer import MiB, PartitionWriter, WrittenFile
+
+PART_COLS = ["date", "rule"]
+_STOP = object()
+
+
+def rule_slug(reason: str) -> str:
+    """Partition-safe form of a rule name (``fat_100g:range`` → ``fat_100g.range``)."""
+    return reason.replace(":", ".").replace("/", "_")
+
+
+class OutlierSink:
+    """Buffer rejected rows off the hot path and flush them as Parquet.
+
+    Parameters
+    ----------
+    dest             : S3 URI or local directory (dataset root)
+    target_rows      : rows per written file (per date/rule partition)
+    target_bytes     : ... or estimated Parquet bytes per file
+    max_buffer_bytes : cap on buffered Arrow bytes before early flushes
+    max_pending      : batches queued for the writer thread; `put` blocks
+                       beyond this (back-pressure instead of unbounded memory)
+    """
+
+    def __init__(self,
+                 dest: str,
+                 session: boto3.Session | None = None,
+                 *,
+                 target_rows: int = 250_000,
+                 target_bytes: int = 32 * MiB,
+                 max_buffer_bytes: int = 256 * MiB,
+                 max_pending: int = 64) -> None:
+        fs, base_dir = storage.resolve(dest, session)
+        self._writer = PartitionWriter(fs, base_dir,
+                                       target_rows=target_rows,
+                                       target_bytes=target_bytes,
+                                       max_buffer_bytes=max_buffer_bytes,
+                                       part_cols=PART_COLS)
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._error: BaseException | None = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="outlier-sink",
+                                        daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------ API
+    def put(self, rejected: pd.DataFrame | pa.Table | pa.RecordBatch) -> None:
+        """Queue rejected rows (must carry a ``reason`` column)."""
+        self._raise()
+        if self._closed:
+            raise RuntimeError("OutlierSink is closed")
+        if len(rejected):
+            self._queue.put(rejected)
+
+    def flush(self) -> None:
+        """Block until everything queued so far is written."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+        self._raise()
+
+    def close(self) -> List[WrittenFile]:
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._raise()
+        return self._writer.files
+
+    @property
+    def files(self) -> List[WrittenFile]:
+        return self._writer.files
+
+    def __enter__(self) -> "OutlierSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ------------------------------------------------------------- internals
+    def _raise(self) -> None:
+        if self._error is not None:
+            raise RuntimeError("outlier sink failed") from self._error
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    self._writer.close()
+                    return
+                if isinstance(item, threading.Event):
+                    self._writer.flush()
+                    item.set()
+                    continue
+                if self._error is None:
+                    self._writer.write(self._partitioned(item))
+            except BaseException as exc:       # surfaced on next put/flush/close
+                self._error = exc
+                if isinstance(item, threading.Event):
+                    item.set()
+                if item is _STOP:
+                    return
+
+    @staticmethod
+    def _partitioned(rows: pd.DataFrame | pa.Table | pa.RecordBatch) -> pa.Table:
+        if isinstance(rows, pd.DataFrame):
+            table = pa.Table.from_pandas(rows, preserve_index=False)
+        elif isinstance(rows, pa.RecordBatch):
+            table = pa.Table.from_batches([rows])
+        else:
+            table = rows
+        day = pd.Timestamp.now(tz="UTC").strftime("%Y-%m-%d")
+        rules = pa.array([rule_slug(r) for r in table["reason"].to_pylist()],
+                         pa.string())
+        return (table.append_column("date", pa.array([day] * table.num_rows,
+                                                     pa.string()))
+                .append_column("rule", rules))
+
+
+__all__ = ["OutlierSink", "rule_slug"]
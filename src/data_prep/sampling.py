@@ -0,0 +1,211 @@
+"""Row-group sampling from footer metadata (the `SampleFraction` of training).
+
+Instead of reading everything and calling ``df.sample``, `plan` picks whole
+row groups from the cached footer manifest (`ingestion.footers.scan`), so the
+bytes read scale with the fraction. Row groups are grouped into strata:
+
+  country               from the ``country=`` partition of the file
+  nutrition_grade_fr    the grade when a row group holds a single grade
+                        (min == max in its statistics), else ``mixed``
+
+and each stratum contributes ≈ `fraction` of its rows (proportional
+allocation, row groups drawn in a seeded random order; the last group is
+rounded in at random, and every non-empty stratum keeps at least one), so
+the sample keeps the country / grade mix of the dataset. Row groups are sampled as clusters:
+sorting files by grade (``--layout scan``) makes the grade strata sharper.
+The same seed and footer manifest always give the same plan.
+
+    p = plan("s3://<bucket>/processed/", fraction=0.3, seed=42)
+    dtrain = loader.quantile_dmatrix(p.dataset())
+
+  python -m data_prep.sampling --target s3://<bucket>/processed/ --fraction 0.3
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import zlib
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+import boto3
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from fe import schema
+from ingestion import footers, storage
+
+STRATA = ("country", schema.TARGET)
+
+
+@dataclass
+class StratumStats:
+    rows: int = 0
+    row_groups: int = 0
+    sampled_rows: int = 0
+    sampled_row_groups: int = 0
+
+
+@dataclass
+class SamplePlan:
+    root: str
+    fraction: float
+    seed: int
+    by: Tuple[str, ...]
+    selected: Dict[str, List[int]] = field(default_factory=dict)  # path → RGs
+    strata: Dict[str, StratumStats] = field(default_factory=dict)
+    bytes_total: int = 0
+    bytes_sampled: int = 0
+    session: boto3.Session | None = field(default=None, repr=False, compare=False)
+    _schema: pa.Schema | None = field(default=None, repr=False, compare=False)
+
+    @property
+    def rows(self) -> int:
+        return sum(s.sampled_rows for s in self.strata.values())
+
+    def dataset(self) -> ds.Dataset:
+        """The sampled row groups as a dataset (partition columns included).
+
+        Use `rows` for the size: ``count_rows`` answers from the footers and
+        counts whole files, while scans read only the sampled row groups.
+        """
+        fs, _ = storage.resolve(self.root, self.session)
+        fmt = ds.ParquetFileFormat()
+        frags = [fmt.make_fragment(path, filesystem=fs, row_groups=groups,
+                                   partition_expression=_partition_expr(path))
+                 for path, groups in sorted(self.selected.items())]
+        return ds.FileSystemDataset(frags, self._schema, fmt, fs)
+
+    def to_dict(self) -> Dict:
+        return {"root": self.root, "fraction": self.fraction, "seed": self.seed,
+                "by": list(self.by), "rows": self.rows,
+                "bytes_total": self.bytes_total, "bytes_sampled": self.bytes_sampled,
+                "strata": {k: asdict(v) for k, v in sorted(self.strata.items())},
+                "selected": self.selected}
+
+
+def _partition(path: str) -> Dict[str, str]:
+    dirs = path.split("/")[-1 - len(schema.PART_COLS):-1]
+    return dict(d.split("=", 1) for d in dirs if "=" in d)
+
+
+def _partition_expr(path: str) -> ds.Expression:
+    expr = ds.scalar(True)
+    for col, value in _partition(path).items():
+        expr = expr & (ds.field(col) == value)
+    return expr
+
+
+def _stratum(path: str, rg: Dict, by: Sequence[str]) -> str:
+    part = _partition(path)
+    key = []
+    for col in by:
+        if col in part:
+            key.append(part[col])
+            continue
+        lo, hi, _ = rg["cols"].get(col, [None, None, None])
+        key.append("null" if lo is None else lo if lo == hi else "mixed")
+    return "/".join(f"{c}={v}" for c, v in zip(by, key))
+
+
+def _dataset_schema(fm: footers.FooterManifest) -> pa.Schema:
+    schemas = [fm.schema(fp) for fp in sorted({e.schema for e in fm.files.values()})]
+    base = pa.unify_schemas(schemas, promote_options="permissive") if schemas \
+        else pa.schema([])
+    return pa.schema(list(base) + [pa.field(c, pa.string()) for c in schema.PART_COLS
+                                   if c not in base.names])
+
+
+def plan(uri: str,
+         fraction: float,
+         seed: int = 0,
+         by: Sequence[str] = STRATA,
+         session: boto3.Session | None = None,
+         manifest: footers.FooterManifest | None = None,
+         workers: int = 16) -> SamplePlan:
+    """Choose ≈ `fraction` of the rows of every stratum as whole row groups."""
+    if not 0 < fraction <= 1:
+        raise ValueError(f"fraction must be in (0, 1], got {fraction}")
+    fm = manifest or footers.scan(uri, session, workers=workers)[0]
+    out = SamplePlan(root=uri, fraction=fraction, seed=seed, by=tuple(by),
+                     session=session, _schema=_dataset_schema(fm))
+
+    groups: Dict[str, List[Tuple[str, int, int, int]]] = {}
+    for entry in sorted(fm.files.values(), key=lambda e: e.path):
+        stats = entry.stats or []
+        for i, rg in enumerate(stats):
+            # manifests cached before "bytes" existed: pro-rate the file size
+            size = rg.get("bytes", entry.size * rg["rows"] // max(entry.rows, 1))
+            groups.setdefault(_stratum(entry.path, rg, by), []).append(
+                (entry.path, i, rg["rows"], size))
+            out.bytes_total += size
+
+    for key in sorted(groups):
+        members = groups[key]
+        st = out.strata[key] = StratumStats(rows=sum(m[2] for m in members),
+                                            row_groups=len(members))
+        target = fraction * st.rows
+        rng = np.random.default_rng([seed, zlib.crc32(key.encode("utf-8"))])
+        order = rng.permutation(len(members))
+
+        def take(j: int) -> None:
+            path, i, rows, size = members[j]
+            out.selected.setdefault(path, []).append(i)
+            st.sampled_rows += rows
+            st.sampled_row_groups += 1
+            out.bytes_sampled += size
+
+        # every group that still fits under the target; remember the first
+        # one that did not
+        spill = None
+        for j in order:
+            if st.sampled_rows + members[j][2] <= target:
+                take(j)
+            elif spill is None:
+                spill = j
+        # randomized rounding on the remainder; a non-empty stratum always
+        # gets at least one group
+        if spill is not None and (
+                not st.sampled_row_groups
+                or rng.random() < (target - st.sampled_rows) / members[spill][2]):
+            take(spill)
+    for path in out.selected:
+        out.selected[path].sort()
+    return out
+
+
+# ─────────────────────────────── CLI ─────────────────────────────────────────
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Row-group sample plan from footers")
+    p.add_argument("--target", required=True,
+                   help="dataset root: s3://bucket/processed/, bucket name or "
+                        "local directory")
+    p.add_argument("--fraction", type=float, required=True)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--by", nargs="*", default=list(STRATA),
+                   help="stratify by these columns (partition or statistics)")
+    p.add_argument("--profile", help="AWS profile (optional)")
+    p.add_argument("--workers", type=int, default=16)
+    p.add_argument("--out", help="write the plan as JSON here")
+    args = p.parse_args(argv)
+
+    session = boto3.Session(profile_name=args.profile) if args.profile else None
+    sp = plan(storage.processed_uri(args.target), args.fraction, args.seed,
+              args.by, session, workers=args.workers)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(sp.to_dict(), fh, indent=2)
+    total = sum(s.rows for s in sp.strata.values())
+    print(f"✔ Sample: {sp.rows:,}/{total:,} rows in "
+          f"{sum(map(len, sp.selected.values())):,} row groups of "
+          f"{len(sp.selected):,} files, {len(sp.strata):,} strata; "
+          f"reads {sp.bytes_sampled / max(sp.bytes_total, 1):.1%} of the bytes")
+
+
+__all__ = ["STRATA", "StratumStats", "SamplePlan", "plan"]
+
+
+if __name__ == "__main__":
+    main()
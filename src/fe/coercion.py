@@ -0,0 +1,223 @@
+"""
+Schema-driven type coercion for the pandas ingest path.
+
+`compile_plan` turns `fe.schema` (DTYPES, TAG_COLS, ID_COLS / KEEP_COLS) and
+the columns listed in ``candidate-columns.yml`` into one `ColumnRule` per
+column, once per process; `CoercionPlan.apply` then runs one vectorised
+kernel per column:
+
+  float    numeric-from-mixed (`pd.to_numeric`), float32
+  int      numeric-from-mixed, rounded half-to-even, nullable Int64
+  string   ``string`` dtype, "" → NA (``category`` with categorical=True)
+  text     ``string`` dtype, "" kept (barcode, product name)
+  tags     list[str]: lists keep their non-null entries as str, a bare
+           scalar becomes a one-item list, missing / "" → []
+
+Kinds come from DTYPES first, then the column name (``*_tags`` → tags,
+``*_100g`` / ``*_n`` → float), so a candidate column promoted into KEEP_COLS
+is typed without touching the ingest code.
+
+Failures are counted per column instead of being swallowed: a present,
+non-empty value that a numeric kernel turns into NA (``"junk"``, ``inf``),
+or a dict / nested value that cannot be a string or a tag::
+
+    failures: Dict[str, int] = {}
+    df = compile_plan().apply(df, failures)     # {"fat_100g": 3, ...}
+"""
+
+from __future__ import annotations
+
+import functools
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import yaml
+
+from fe import schema
+
+KINDS = ("float", "int", "string", "text", "tags")
+
+_CANDIDATES = Path(__file__).with_name("candidate-columns.yml")
+_STR_LIST = pa.list_(pa.string())
+_INT64_MAX = float(2 ** 63)
+
+
+def candidate_columns() -> List[str]:
+    """Columns listed in ``candidate-columns.yml`` (empty if not shipped)."""
+    if not _CANDIDATES.exists():
+        return []
+    with _CANDIDATES.open(encoding="utf-8") as fh:
+        return list((yaml.safe_load(fh) or {}).get("columns") or [])
+
+
+@dataclass(frozen=True)
+class ColumnRule:
+    name: str
+    kind: str                        # one of KINDS
+    dtype: str | None                # final pandas dtype (None: object lists)
+
+
+def rule_for(col: str, categorical: bool = False) -> ColumnRule:
+    dtype = schema.dtypes(categorical).get(col)
+    if col in schema.TAG_COLS or col.endswith("_tags"):
+        return ColumnRule(col, "tags", None)
+    if dtype == "float32" or (dtype is None and col.endswith(("_100g", "_n"))):
+        return ColumnRule(col, "float", "float32")
+    if dtype == "Int64":
+        return ColumnRule(col, "int", "Int64")
+    if dtype in ("string", "category"):
+        return ColumnRule(col, "string", dtype)
+    return ColumnRule(col, "text", "string")
+
+
+# ─────────────────────────────── kernels ─────────────────────────────────────
+def _present(s: pd.Series) -> np.ndarray:
+    """Non-missing, non-empty-string cells."""
+    present = s.notna().to_numpy()
+    if s.dtype == object or isinstance(s.dtype, pd.StringDtype):
+        present = present & (s != "").fillna(False).to_numpy(dtype=bool)
+    return present
+
+
+def _numbers(s: pd.Series) -> Tuple[np.ndarray, int]:
+    """float64 values and the number of present cells that did not parse."""
+    if pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype):
+        return s.to_numpy(dtype="float64", na_value=np.nan), 0
+    out = pd.to_numeric(s, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    nan = np.flatnonzero(np.isnan(out))           # only these can have failed
+    return out, int(_present(s.iloc[nan]).sum())
+
+
+def _float(s: pd.Series) -> Tuple[pd.Series, int]:
+    values, failed = _numbers(s)
+    return pd.Series(values.astype("float32"), index=s.index), failed
+
+
+def _int(s: pd.Series) -> Tuple[pd.Series, int]:
+    values, failed = _numbers(s)
+    with np.errstate(invalid="ignore"):
+        bad = ~np.isnan(values) & ~(np.abs(values) < _INT64_MAX)    # ±inf, overflow
+    out = pd.Series(np.round(np.where(bad, np.nan, values)),
+                    index=s.index).astype("Int64")
+    return out, failed + int(bad.sum())
+
+
+def _nested(s: pd.Series) -> int:
+    """Cells holding a dict / list where a scalar was expected."""
+    if s.dtype != object:
+        return 0
+    if pd.api.types.infer_dtype(s, skipna=True) in ("string", "empty", "integer",
+                                                    "floating", "mixed-integer-float"):
+        return 0
+    return int(s.map(lambda v: isinstance(v, (dict, list)), na_action="ignore")
+               .fillna(False).sum())
+
+
+def _string(s: pd.Series, empty_as_na: bool) -> Tuple[pd.Series, int]:
+    failed = _nested(s)
+    out = s.astype("string")
+    if empty_as_na:
+        out = out.mask(out == "")
+    return out, failed
+
+
+def _missing(v: Any) -> bool:
+    return v is None or (isinstance(v, float) and np.isnan(v))
+
+
+def _tag_cell(v: Any) -> Tuple[List[str], int]:
+    """Slow path for one cell: ``(tags, failures)``."""
+    if isinstance(v, list):
+        bad = sum(isinstance(t, (dict, list)) for t in v)
+        return [str(t) for t in v
+                if not _missing(t) and not isinstance(t, (dict, list))], bad
+    if isinstance(v, dict):
+        return [], 1
+    if _missing(v) or v == "":
+        return [], 0
+    return [str(v)], 0
+
+
+def _tags(s: pd.Series) -> Tuple[pd.Series, int]:
+    """Lists of str cells are kept as they are; Arrow validates the list cells
+    in one conversion and only the cells that need fixing (bare scalars,
+    missing cells, lists with null entries) go through Python."""
+    values = s.to_numpy(dtype=object).copy()
+    is_list = np.fromiter(map(type, values), dtype=object, count=len(values)) == list
+    lists = np.flatnonzero(is_list)
+    fix = np.flatnonzero(~is_list)                # bare scalars / missing cells
+    try:
+        arr = pa.array(values[lists], type=_STR_LIST, from_pandas=True)
+        flat = pc.list_flatten(arr)
+        if flat.null_count:                       # lists with null entries
+            parents = pc.list_parent_indices(arr).to_numpy()
+            nulls = flat.is_null().to_numpy(zero_copy_only=False)
+            fix = np.union1d(fix, lists[parents[nulls]])
+    except (pa.ArrowInvalid, pa.ArrowTypeError):  # non-str entries in some list
+        fix = np.arange(len(values))
+    failed = 0
+    for i in fix:
+        values[i], bad = _tag_cell(values[i])
+        failed += bad
+    return pd.Series(values, index=s.index, dtype=object), failed
+
+
+# ─────────────────────────────── plan ────────────────────────────────────────
+@dataclass(frozen=True)
+class CoercionPlan:
+    rules: Tuple[ColumnRule, ...]
+    columns: Tuple[str, ...]                 # output columns, in order
+    categorical: bool = False
+
+    def apply(self, df: pd.DataFrame,
+              failures: Dict[str, int] | None = None) -> pd.DataFrame:
+        """Coerce `df` (flat records plus year / country) to the plan.
+
+        Columns outside the plan are dropped, missing ones come back as NA;
+        per-column failure counts are added to `failures`.
+        """
+        out: Dict[str, pd.Series] = {}
+        for rule in self.rules:
+            s = df[rule.name] if rule.name in df.columns else \
+                pd.Series(None, index=df.index, dtype=object)
+            if rule.kind == "float":
+                col, failed = _float(s)
+            elif rule.kind == "int":
+                col, failed = _int(s)
+            elif rule.kind == "tags":
+                col, failed = _tags(s)
+            else:
+                col, failed = _string(s, empty_as_na=rule.kind == "string")
+                if rule.dtype == "category":
+                    col = col.astype("category")
+            out[rule.name] = col
+            if failures is not None and failed:
+                failures[rule.name] = failures.get(rule.name, 0) + failed
+        for col in schema.PART_COLS:
+            if col in df.columns:
+                out[col] = df[col].astype("category") if self.categorical else df[col]
+        return pd.DataFrame(out, index=df.index)[
+            [c for c in self.columns if c in out]]
+
+
+@functools.lru_cache(maxsize=None)
+def compile_plan(categorical: bool = False) -> CoercionPlan:
+    """The plan for ID_COLS + KEEP_COLS (+ year / country), built once."""
+    cols = schema.ID_COLS + schema.KEEP_COLS
+    return CoercionPlan(rules=tuple(rule_for(c, categorical) for c in cols),
+                        columns=tuple(cols + schema.PART_COLS),
+                        categorical=categorical)
+
+
+def candidate_rules(categorical: bool = False) -> Dict[str, ColumnRule]:
+    """How every candidate column would be coerced once promoted."""
+    return {c: rule_for(c, categorical) for c in candidate_columns()}
+
+
+__all__ = ["KINDS", "ColumnRule", "CoercionPlan", "compile_plan", "rule_for",
+           "candidate_columns", "candidate_rules"]
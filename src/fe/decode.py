@@ -0,0 +1,256 @@
+"""
+Projection-aware JSONL decoding
+_____________________________________________________________________________________
+* projection_tree - nested {key: True | subtree} built from COLUMN_PATHS
+* make_decoder    - returns line -> flat record, same result as
+                    schema.extract_columns(json.loads(line))
+* cached_decoder  - per-process memoised make_decoder for COLUMN_PATHS
+* Backends
+    - "json"     : full json.loads + extract_columns (reference path)
+    - "scan"     : pure-python projector; unneeded subtrees are skipped by
+                   regex without building Python objects (Python >= 3.11)
+    - "simdjson" : lazy pysimdjson document, only projected paths materialized
+    - "auto"     : simdjson if installed, else scan, else json
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import re
+import sys
+from json.decoder import scanstring
+from json.scanner import make_scanner
+from typing import Any, Callable, Dict, List, Union
+
+from fe.schema import COLUMN_PATHS, extract_columns
+
+try:  # optional fast backend
+    import simdjson  # type: ignore
+except ImportError:  # pragma: no cover - depends on environment
+    simdjson = None
+
+Decoder = Callable[[Union[str, bytes]], Dict[str, Any]]
+
+BACKENDS = ("auto", "json", "scan", "simdjson")
+
+# possessive quantifiers keep the skip regex linear on any input (3.11+)
+_HAS_POSSESSIVE = sys.version_info >= (3, 11)
+
+
+def projection_tree(paths: Dict[str, List[str]] = COLUMN_PATHS) -> Dict[str, Any]:
+    """Merge column paths into a nested tree; leaves are ``True``."""
+    tree: Dict[str, Any] = {}
+    for path in paths.values():
+        node = tree
+        for key in path[:-1]:
+            nxt = node.get(key)
+            if nxt is True:          # whole subtree already requested
+                break
+            node = node.setdefault(key, {})
+        else:
+            node[path[-1]] = True
+    return tree
+
+
+# ─────────────────────────── scan backend ───────────────────────────────────
+_WS = re.compile(r"[ \t\n\r]*")
+_STR_BODY = r'[^"\\]*+(?:\\.[^"\\]*+)*+"'
+_STR = '"' + _STR_BODY
+_FILL = r'(?:[^"\[\]{}]++|' + _STR + ")*+"
+_SKIP_DEPTH = 6  # containers nested deeper fall back to _skip_value
+
+
+def _container_pattern(depth: int) -> str:
+    pat = r"[\[{]" + _FILL + r"[\]}]"
+    for _ in range(depth):
+        pat = r'[\[{](?:[^"\[\]{}]++|' + _STR + "|" + pat + r")*+[\]}]"
+    return pat
+
+
+_VALUE = "(?:" + _STR + "|" + \
+    _container_pattern(_SKIP_DEPTH) + r'|[^,{}\[\]"\s]++)'
+_FILL_RE = re.compile(_FILL) if _HAS_POSSESSIVE else None
+_STR_END_RE = re.compile(_STR_BODY) if _HAS_POSSESSIVE else None
+_SCALAR_RE = re.compile(r"[^,}\]\s]*")
+_scan_value = make_scanner(json.JSONDecoder())
+
+
+def _skip_pairs_re(keys: List[str]) -> re.Pattern:
+    """Regex that consumes consecutive ``"key": value,`` pairs whose key is
+    not in `keys`, entirely inside the regex engine."""
+    alt = "|".join(re.escape(k) for k in sorted(keys, key=len, reverse=True))
+    pair = r'"(?!(?:' + alt + r')")' + _STR_BODY + \
+        r"\s*:\s*" + _VALUE + r"\s*,?\s*"
+    return re.compile("(?:" + pair + ")*+")
+
+
+def _compile_tree(tree: Dict[str, Any]) -> tuple:
+    return ({k: (True if v is True else _compile_tree(v)) for k, v in tree.items()},
+            _skip_pairs_re(list(tree)),
+            # any of the keys, as it appears in the line: spots repeats
+            re.compile("|".join(re.escape(json.dumps(k)) for k in tree)))
+
+
+class _RepeatedKey(Exception):
+    """A projected key occurs twice in one object; json.loads decides."""
+
+
+def _skip_value(s: str, i: int, depth: int = 0) -> int:
+    """Return the index just past the JSON value starting at `s[i]`.
+
+    With ``depth=1`` it instead skips to the end of the enclosing container.
+    """
+    c = s[i]
+    if depth == 0:
+        if c == '"':
+            return _STR_END_RE.match(s, i + 1).end()
+        if c not in "{[":
+            return _SCALAR_RE.match(s, i).end()
+    while True:
+        i = _FILL_RE.match(s, i).end()
+        c = s[i]
+        i += 1
+        if c in "{[":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return i
+
+
+def _project(s: str, i: int, node: tuple, out: Dict[str, Any], top: bool) -> int:
+    """Fill `out` with the projected keys of the object at `s[i]` ('{')."""
+    tree, skip, keys_re = node
+    ws = _WS.match
+    i = ws(s, i + 1).end()
+    remaining = len(tree)
+    while True:
+        i = skip.match(s, i).end()
+        if s[i] == "}":
+            return i + 1
+        key, i = scanstring(s, i + 1)
+        i = ws(s, ws(s, i).end() + 1).end()       # ':'
+        sub = tree.get(key)
+        if sub is None:                             # too deep for the regex
+            i = _skip_value(s, i)
+        else:
+            if key in out:
+                raise _RepeatedKey(key)
+            if sub is True or s[i] != "{":
+                out[key], i = _scan_value(s, i)
+            else:
+                child: Dict[str, Any] = {}
+                i = _project(s, i, sub, child, top=False)
+                out[key] = child
+            remaining -= 1
+            if remaining == 0:
+                # top level: stop reading; nested: jump past the closing brace.
+                # A projected key in the unread rest may be a repeat (the
+                # last one wins in json.loads), so leave it to the fallback.
+                end = len(s) if top else _skip_value(s, i, depth=1)
+                if keys_re.search(s, i, end):
+                    raise _RepeatedKey(key)
+                return i if top else end
+        i = ws(s, i).end()
+        if s[i] == "}":
+            return i + 1
+        i = ws(s, i + 1).end()                      # ','
+
+
+def _scan_decoder(paths: Dict[str, List[str]]) -> Decoder:
+    if not _HAS_POSSESSIVE:
+        raise RuntimeError("scan decoder needs Python >= 3.11")
+    node = _compile_tree(projection_tree(paths))
+
+    def decode(line: str | bytes) -> Dict[str, Any]:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        obj: Dict[str, Any] = {}
+        i = _WS.match(line).end()
+        if line[i:i + 1] == "{":
+            try:
+                _project(line, i, node, obj, top=True)
+            except _RepeatedKey:
+                obj = json.loads(line)
+            except (IndexError, AttributeError) as exc:
+                raise ValueError(f"malformed JSON line: {exc}") from exc
+        else:
+            obj = json.loads(line)
+        return extract_columns(obj, paths)
+
+    return decode
+
+
+# ───────────────────────── simdjson backend ─────────────────────────────────
+def _simdjson_decoder(paths: Dict[str, List[str]]) -> Decoder:
+    if simdjson is None:
+        raise RuntimeError("simdjson backend requested but pysimdjson "
+                           "is not installed")
+    parser = simdjson.Parser()   # one per process; documents are reused
+    lazy = (simdjson.Object, simdjson.Array)
+    # simdjson keeps the first of duplicate keys, json.loads the last: lines
+    # where a projected key occurs twice take the reference path
+    needles = sorted({f'"{key}"'.encode("utf-8")
+                      for path in paths.values() for key in path})
+
+    def reference(raw: bytes) -> Dict[str, Any]:
+        return extract_columns(json.loads(raw), paths)
+
+    def decode(line: str | bytes) -> Dict[str, Any]:
+        raw = line.encode("utf-8") if isinstance(line, str) else line
+        if any(raw.count(n) > 1 for n in needles):
+            return reference(raw)
+        try:
+            doc = parser.parse(raw)
+        except ValueError:       # e.g. 1e400: json / scan give inf, simdjson fails
+            return reference(raw)
+        out: Dict[str, Any] = {}
+        for col, path in paths.items():
+            node: Any = doc
+            for key in path:
+                if isinstance(node, simdjson.Object) and key in node:
+                    node = node[key]
+                else:
+                    node = None
+                    break
+            if isinstance(node, lazy):
+                node = node.as_dict() if isinstance(
+                    node, simdjson.Object) else node.as_list()
+            out[col] = node
+        return out
+
+    return decode
+
+
+# ─────────────────────────────── API ────────────────────────────────────────
+def resolve_backend(backend: str = "auto") -> str:
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown decoder {backend!r}; choose from {BACKENDS}")
+    if backend != "auto":
+        return backend
+    if simdjson is not None:
+        return "simdjson"
+    return "scan" if _HAS_POSSESSIVE else "json"
+
+
+def make_decoder(backend: str = "auto",
+                 paths: Dict[str, List[str]] = COLUMN_PATHS) -> Decoder:
+    """Return a callable mapping one JSONL line to a flat record."""
+    backend = resolve_backend(backend)
+    if backend == "simdjson":
+        return _simdjson_decoder(paths)
+    if backend == "scan":
+        return _scan_decoder(paths)
+    return lambda line: extract_columns(json.loads(line), paths)
+
+
+@functools.lru_cache(maxsize=None)
+def cached_decoder(backend: str = "auto") -> Decoder:
+    """One COLUMN_PATHS decoder per backend and process (regexes / parser
+    are built once, also inside pool workers)."""
+    return make_decoder(backend)
+
+
+__all__ = ["BACKENDS", "projection_tree", "resolve_backend", "make_decoder",
+           "cached_decoder"]
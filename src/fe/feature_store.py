@@ -0,0 +1,218 @@
+"""
+Barcode-keyed, memory-mapped feature store for online inference.
+
+The realtime API needs `barcode`, `product_name` and the model feature vector
+(docs/design.md). `build` compiles them from the processed dataset into one
+directory of fixed-layout files:
+
+  keys.npy        uint64 barcode keys, sorted           (n,)
+  features.npy    float32 feature matrix, same order    (n, d)
+  products.arrow  Arrow IPC file: code, product_name, same order
+  store.json      feature columns, row count, source
+
+`FeatureStore` opens them with ``mmap`` (no parsing, no copy), so opening is
+O(1) and pages are shared by every process on the host; a lookup is one
+binary search over `keys`. Keys are exact for all-digit barcodes of up to
+17 digits (length-tagged, so ``0123`` ≠ ``123``) and a 64-bit BLAKE2b hash
+with the top bit set otherwise; hashed hits are confirmed against the
+stored code.
+
+  python -m fe.feature_store --source s3://<bucket>/processed/ --out /opt/ml/features
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Iterable, List, NamedTuple, Sequence, Tuple
+
+import boto3
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from data_prep.cleaning import range_columns
+from fe import schema
+from ingestion import manifest, storage
+
+VERSION = 1
+KEYS, FEATURES, PRODUCTS, META = "keys.npy", "features.npy", "products.arrow", "store.json"
+
+# model inputs: the nutrient columns that survive `cleaning.clean`
+FEATURE_COLS: List[str] = range_columns(schema.KEEP_COLS)
+
+_HASHED = 1 << 63
+_MAX_DIGITS = 17                      # 17 · 10**17 + (10**17 - 1) < 2**63
+
+
+# ───────────────────────────── keys ──────────────────────────────────────────
+def barcode_key(code: str) -> int:
+    """uint64 key of one barcode (exact for short all-ASCII-digit codes)."""
+    if len(code) <= _MAX_DIGITS and code.isascii() and code.isdigit():
+        return len(code) * 10 ** _MAX_DIGITS + int(code)
+    digest = hashlib.blake2b(code.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") | _HASHED
+
+
+def barcode_keys(codes: Iterable[str]) -> np.ndarray:
+    return np.fromiter((barcode_key(c) for c in codes), dtype=np.uint64)
+
+
+class Product(NamedTuple):
+    code: str
+    product_name: str | None
+    features: np.ndarray              # read-only view into the mmap
+
+
+# ─────────────────────────────── build ───────────────────────────────────────
+def build(source: str | pa.Table, out_dir: str,
+          session: boto3.Session | None = None,
+          columns: Sequence[str] = FEATURE_COLS) -> "FeatureStore":
+    """Compile `source` (dataset URI / bucket / directory, or a table) into a
+    store at `out_dir`; one row per barcode (first seen), null codes dropped.
+
+    The store is written next to `out_dir` and renamed into place, so readers
+    never see a half-built store.
+    """
+    cols = ["code", "product_name", *columns]
+    table = (source.select(cols) if isinstance(source, pa.Table)
+             else manifest.open_dataset(storage.processed_uri(source),
+                                        session).to_table(columns=cols))
+    table = table.filter(pc.is_valid(table["code"]))
+
+    codes = pc.cast(table["code"], pa.string()).to_pylist()
+    keys = barcode_keys(codes)
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    # drop repeated barcodes (same key and same code), keep the first
+    first = np.ones(len(keys), dtype=bool)
+    same = keys[1:] == keys[:-1]
+    if same.any():
+        sorted_codes = np.asarray(codes, dtype=object)[order]
+        first[1:] = ~(same & (sorted_codes[1:] == sorted_codes[:-1]))
+    order, keys = order[first], keys[first]
+
+    feats = np.column_stack([
+        pc.cast(table[c], pa.float32()).to_numpy(zero_copy_only=False)
+        for c in columns]) if columns else np.empty((table.num_rows, 0))
+    feats = np.ascontiguousarray(feats[order], dtype=np.float32)
+    products = pa.table({
+        "code": pa.array(np.asarray(codes, dtype=object)[order], pa.string()),
+        "product_name": pc.cast(table["product_name"], pa.string()).take(order),
+    })
+
+    out_dir = os.path.abspath(out_dir)
+    parent = os.path.dirname(out_dir)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".feature-store-", dir=parent)
+    np.save(os.path.join(tmp, KEYS), keys)
+    np.save(os.path.join(tmp, FEATURES), feats)
+    with pa.OSFile(os.path.join(tmp, PRODUCTS), "wb") as sink, \
+            pa.ipc.new_file(sink, products.schema) as writer:
+        writer.write_table(products, max_chunksize=max(len(products), 1))
+    with open(os.path.join(tmp, META), "w", encoding="utf-8") as fh:
+        json.dump({"version": VERSION, "columns": list(columns), "rows": len(keys),
+                   "source": source if isinstance(source, str) else None,
+                   "built_at": int(time.time())}, fh, indent=2)
+    if os.path.exists(out_dir):
+        old = f"{tmp}.old"
+        os.rename(out_dir, old)
+        os.rename(tmp, out_dir)
+        shutil.rmtree(old)
+    else:
+        os.rename(tmp, out_dir)
+    return FeatureStore(out_dir)
+
+
+# ─────────────────────────────── lookup ──────────────────────────────────────
+class FeatureStore:
+    """Read-only, memory-mapped barcode → (product_name, features) lookups."""
+
+    def __init__(self, path: str) -> None:
+        with open(os.path.join(path, META), encoding="utf-8") as fh:
+            self.meta = json.load(fh)
+        self.columns: List[str] = self.meta["columns"]
+        self.keys = np.load(os.path.join(path, KEYS), mmap_mode="r").view(np.ndarray)
+        self.features = np.load(os.path.join(path, FEATURES),
+                                mmap_mode="r").view(np.ndarray)
+        source = pa.memory_map(os.path.join(path, PRODUCTS), "r")
+        products = pa.ipc.open_file(source).read_all()
+        self._codes = products["code"].combine_chunks()
+        self._names = products["product_name"].combine_chunks()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, code: str) -> bool:
+        return self._row(code) >= 0
+
+    def _row(self, code: str) -> int:
+        key = np.uint64(barcode_key(code))        # a Python int would go via float64
+        i = int(np.searchsorted(self.keys, key))
+        while i < len(self.keys) and self.keys[i] == key:
+            if key < _HASHED or self._codes[i].as_py() == code:
+                return i
+            i += 1
+        return -1
+
+    def get(self, code: str) -> Product | None:
+        i = self._row(code)
+        if i < 0:
+            return None
+        return Product(code, self._names[i].as_py(), self.features[i])
+
+    def get_many(self, codes: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """``(features, found)``: an ``(n, d)`` float32 copy (NaN rows for
+        unknown barcodes) and the boolean hit mask."""
+        keys = barcode_keys(codes)
+        idx = np.minimum(np.searchsorted(self.keys, keys), max(len(self.keys) - 1, 0))
+        found = (self.keys[idx] == keys) if len(self.keys) else np.zeros(len(keys), bool)
+        hashed = np.flatnonzero(found & (keys >= _HASHED))
+        if len(hashed):                    # confirm hash hits against the code
+            stored = self._codes.take(pa.array(idx[hashed])).to_pylist()
+            for j, code in zip(hashed, stored):
+                if code != codes[j]:
+                    row = self._row(codes[j])
+                    found[j], idx[j] = row >= 0, max(row, 0)
+        out = np.full((len(codes), len(self.columns)), np.nan, dtype=np.float32)
+        out[found] = self.features[idx[found]]
+        return out, found
+
+    def product_names(self, codes: Sequence[str]) -> List[str | None]:
+        return [None if (i := self._row(c)) < 0 else self._names[i].as_py()
+                for c in codes]
+
+
+# ─────────────────────────────── CLI ─────────────────────────────────────────
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Build the barcode feature store")
+    p.add_argument("--source", required=True,
+                   help="processed dataset: s3://bucket/processed/, bucket name "
+                        "or local directory")
+    p.add_argument("--out", required=True, help="local store directory")
+    p.add_argument("--profile", help="AWS profile (optional)")
+    p.add_argument("--columns", nargs="+", default=FEATURE_COLS,
+                   help="feature columns (default: cleaned nutrient columns)")
+    args = p.parse_args(argv)
+
+    session = boto3.Session(profile_name=args.profile) if args.profile else None
+    t0 = time.perf_counter()
+    store = build(args.source, args.out, session, args.columns)
+    size = sum(os.path.getsize(os.path.join(args.out, f))
+               for f in (KEYS, FEATURES, PRODUCTS))
+    print(f"✔ Feature store: {len(store):,} barcodes × {len(store.columns)} "
+          f"features, {size / (1 << 20):,.1f} MiB "
+          f"({time.perf_counter() - t0:,.1f} s)")
+
+
+__all__ = ["FEATURE_COLS", "Product", "FeatureStore", "barcode_key",
+           "barcode_keys", "build"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Sparse hashed features for tag lists and product names.
+
+Tag columns (``brands_tags``, ``categories_tags`` …, list<string>) and
+`product_name` tokens / word n-grams are mapped straight from Arrow arrays to
+a ``scipy.sparse.csr_matrix`` of fixed width `n_features` (the hashing trick):
+no vocabulary, no dense one-hot frame, the same column for the same token in
+every batch and every process.
+
+Per batch and column the list array is flattened once (values + parent row
+indices), the values are dictionary-encoded, only the distinct tokens are
+hashed (BLAKE2b-64 of ``<column>\\x00<token>``: low bits pick the column, the
+top bit the sign) and the codes index into those hashes – so Python touches
+each distinct token once per batch, never each row. Memory is one batch plus
+its CSR output::
+
+    hf = HashedFeaturizer(n_features=2 ** 18)
+    for batch in dset.to_batches(columns=hf.columns, batch_size=100_000):
+        Xs = hf.transform(batch)              # (rows, 2**18) float32 CSR
+
+`product_name` is lower-cased and split on anything that is not a Unicode
+letter or digit; `ngram_range=(1, 2)` adds adjacent-word bigrams. Repeated
+tokens in a row add up. `config()` identifies the mapping (for
+`data_prep.feature_cache` keys).
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import scipy.sparse as sp
+
+# list<string> columns from candidate-columns.yml (absent ones are skipped)
+HASHED_TAG_COLS: Tuple[str, ...] = ("categories_tags", "labels_tags",
+                                    "packaging_tags", "brands_tags",
+                                    "countries_tags")
+HASHED_TEXT_COLS: Tuple[str, ...] = ("product_name",)
+
+TOKEN_PATTERN = r"[^\pL\pN]+"                 # RE2: split on non letter/digit
+
+_SIGN = 1 << 63
+
+Stream = Tuple[pa.Array, np.ndarray]          # (token values, parent row)
+
+
+# ───────────────────────────── Arrow helpers ─────────────────────────────────
+def _array(data: pa.Array | pa.ChunkedArray) -> pa.Array:
+    return data.combine_chunks() if isinstance(data, pa.ChunkedArray) else data
+
+
+def flatten(lists: pa.Array | pa.ChunkedArray) -> Stream:
+    """Non-empty values of a list array with the row each came from."""
+    lists = _array(lists)
+    values = pc.list_flatten(lists)
+    parents = pc.list_parent_indices(lists).to_numpy(zero_copy_only=False)
+    plain = values.dictionary_decode() if pa.types.is_dictionary(values.type) \
+        else values
+    keep = pc.fill_null(pc.greater(pc.utf8_length(plain), 0), False)
+    if not pc.all(keep).as_py():
+        mask = keep.to_numpy(zero_copy_only=False)
+        values, parents = values.filter(keep), parents[mask]
+    return values, parents
+
+
+def tokenize(text: pa.Array | pa.ChunkedArray) -> pa.Array:
+    """Lower-cased word tokens of a string array, as list<string>."""
+    text = _array(text)
+    if pa.types.is_dictionary(text.type):
+        text = text.dictionary_decode()
+    return pc.split_pattern_regex(pc.utf8_lower(text), pattern=TOKEN_PATTERN)
+
+
+def ngrams(tokens: Stream, n: int) -> Stream:
+    """Space-joined runs of `n` consecutive tokens within the same row."""
+    values, parents = tokens
+    if n == 1 or len(parents) < n:
+        return (values, parents) if n == 1 else (pa.array([], pa.string()),
+                                                 parents[:0])
+    start = np.flatnonzero(parents[:len(parents) - n + 1] == parents[n - 1:])
+    parts = [values.take(pa.array(start + k)) for k in range(n)]
+    return pc.binary_join_element_wise(*parts, " "), parents[start]
+
+
+# ─────────────────────────────── hashing ─────────────────────────────────────
+def _hash64(namespace: str, token: str) -> int:
+    digest = hashlib.blake2b(f"{namespace}\x00{token}".encode("utf-8"),
+                             digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def hash_values(values: pa.Array, namespace: str) -> np.ndarray:
+    """uint64 hash per value; each distinct value is hashed once."""
+    enc = values if pa.types.is_dictionary(values.type) else \
+        pc.dictionary_encode(values)
+    uniq = np.fromiter((_hash64(namespace, t) for t in enc.dictionary.to_pylist()),
+                       dtype=np.uint64, count=len(enc.dictionary))
+    return uniq[enc.indices.to_numpy(zero_copy_only=False)]
+
+
+@dataclass(frozen=True)
+class HashedFeaturizer:
+    n_features: int = 1 << 20
+    tag_cols: Tuple[str, ...] = HASHED_TAG_COLS
+    text_cols: Tuple[str, ...] = HASHED_TEXT_COLS
+    ngram_range: Tuple[int, int] = (1, 1)
+    alternate_sign: bool = True
+
+    def __post_init__(self) -> None:
+        if self.n_features < 1:
+            raise ValueError(f"n_features must be positive, got {self.n_features}")
+        lo, hi = self.ngram_range
+        if not 1 <= lo <= hi:
+            raise ValueError(f"bad ngram_range {self.ngram_range}")
+
+    @property
+    def columns(self) -> List[str]:
+        return [*self.tag_cols, *self.text_cols]
+
+    def config(self) -> Dict[str, Any]:
+        return {"hashed": asdict(self), "token_pattern": TOKEN_PATTERN}
+
+    def streams(self, batch: pa.RecordBatch | pa.Table) -> Iterator[Tuple[str, Stream]]:
+        """``(namespace, (values, parents))`` per tag column / n-gram order."""
+        names = batch.schema.names
+        for col in self.tag_cols:
+            if col in names:
+                yield col, flatten(batch[col])
+        for col in self.text_cols:
+            if col not in names:
+                continue
+            words = flatten(tokenize(batch[col]))
+            for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+                yield (col if n == 1 else f"{col}#{n}"), ngrams(words, n)
+
+    def transform(self, batch: pa.RecordBatch | pa.Table) -> sp.csr_matrix:
+        """``(rows, n_features)`` float32 CSR for one batch."""
+        rows, cols, data = [], [], []
+        for namespace, (values, parents) in self.streams(batch):
+            if not len(parents):
+                continue
+            h = hash_values(values, namespace)
+            rows.append(parents)
+            cols.append((h % np.uint64(self.n_features)).astype(np.int64))
+            data.append(np.where(h >= np.uint64(_SIGN), -1.0, 1.0).astype(np.float32)
+                        if self.alternate_sign else np.ones(len(h), np.float32))
+        shape = (batch.num_rows, self.n_features)
+        if not rows:
+            return sp.csr_matrix(shape, dtype=np.float32)
+        # COO → CSR sums repeated (row, column) pairs
+        return sp.coo_matrix((np.concatenate(data),
+                              (np.concatenate(rows), np.concatenate(cols))),
+                             shape=shape).tocsr()
+
+    def transform_batches(self, batches: Iterable[pa.RecordBatch | pa.Table]
+                          ) -> Iterator[sp.csr_matrix]:
+        for batch in batches:
+            yield self.transform(batch)
+
+
+__all__ = ["HASHED_TAG_COLS", "HASHED_TEXT_COLS", "TOKEN_PATTERN",
+           "HashedFeaturizer", "flatten", "tokenize", "ngrams", "hash_values"]
@@ -3,9 +3,12 @@ Nutrisage schema & helpers
 _____________________________________________________________________________________
 * Approved columns (currently 21). Update this list, not the number.
 * KEEP_COLS - <= 20 approved columns(loaded from candidate-columns.yml)
+* ID_COLS - product barcode, written next to KEEP_COLS (not a feature)
 * COLUMN_PATHS - JSON paths to reach each column in the raw object
 * DTYPES - optional pandas dtypes for faster ingest
+* CATEGORICAL_COLS / dtypes(categorical=True) - low-cardinality text as category
 * normalize_country / make_partition_values - build year / country partitions
+* partition_columns - columnar (whole-chunk) equivalent of make_partition_values
 * extract_columns - flattens one raw JSON row into the selected columns
 """
 
@@ -13,7 +16,7 @@ from __future__ import annotations
 import re
 from datetime import datetime
 from importlib.resources import files
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List
 from pathlib import Path
 
 import numpy as np
@@ -49,6 +52,15 @@ KEEP_COLS: list[str] = [
 # hive-style partition columns live in the path, not in KEEP_COLS
 PART_COLS: list[str] = ["year", "country"]
 
+# product identity (barcode): written ahead of KEEP_COLS, never a predictor
+ID_COLS: list[str] = ["code"]
+
+# change-tracking timestamp; extracted for incremental ingest, not written
+MODIFIED_COL = "last_modified_t"
+
+# list-valued tag columns (stored as list<string>)
+TAG_COLS: list[str] = [c for c in KEEP_COLS if c.endswith("_tags")]
+
 # --------------------------------------------------------------------------- #
 # Desired Pandas / PyArrow dtypes                                             #
 # --------------------------------------------------------------------------- #
@@ -73,6 +85,18 @@ DTYPES: dict[str, str] = {
     "created_t": "Int64",
 }
 
+# low-cardinality text columns; with ``categorical=True`` they are pandas
+# ``category`` / Arrow ``dictionary<int32, string>`` end to end, as are the
+# tag-list entries and the partition columns
+CATEGORICAL_COLS: list[str] = ["main_category", "nutrition_grade_fr"]
+
+
+def dtypes(categorical: bool = False) -> dict[str, str]:
+    """DTYPES, with CATEGORICAL_COLS as ``category`` when `categorical`."""
+    if not categorical:
+        return dict(DTYPES)
+    return {**DTYPES, **{c: "category" for c in CATEGORICAL_COLS}}
+
 
 TARGET = "nutrition_grade_fr"
 PREDICTORS = [c for c in KEEP_COLS if c != TARGET]
@@ -83,25 +107,34 @@ NUTRIMENTS_KEY = [k for k in KEEP_COLS if k.endswith('_100g')]
 # map canonical column name to list path inside JSON object
 COLUMN_PATHS: Dict[str, List[str]] = {
     col: (["nutriments", col] if col in NUTRIMENTS_KEY else [col])
-    for col in KEEP_COLS
+    for col in ID_COLS + KEEP_COLS + [MODIFIED_COL]
 }
 
 # Partition helpers (year, country)
 _LANG_PREFIX = re.compile(r"^[a-z]{2}[:_\-]?")  # en:, fr-, de_
 
 
-def normalize_country(tag_field: Any) -> str | None:
-    """Return slug like 'united-states' from countries_tags field"""
+def _first_country(tag_field: Any) -> str | None:
+    """Raw first entry of a countries_tags field (list or comma string)."""
     if not tag_field:
         return None
-    raw = tag_field[0] if isinstance(
+    return tag_field[0] if isinstance(
         tag_field, list) else str(tag_field).split(',')[0]
+
+
+def _country_slug(raw: str) -> str | None:
     raw = _LANG_PREFIX.sub("", raw.strip().lower())
     slug = re.sub(r"\s+", "-", raw)
     slug = re.sub(r"[^a-z0-9\-]", "", slug)
     return slug or None
 
 
+def normalize_country(tag_field: Any) -> str | None:
+    """Return slug like 'united-states' from countries_tags field"""
+    raw = _first_country(tag_field)
+    return None if raw is None else _country_slug(raw)
+
+
 def make_partition_values(row: Dict[str, Any]) -> Dict[str, str]:
     """Compute partition values {'year':'2020', 'country':'canada'}"""
     try:
@@ -114,6 +147,67 @@ def make_partition_values(row: Dict[str, Any]) -> Dict[str, str]:
     return {"year": str(year), "country": str(country)}
 
 
+# Columnar partition builder
+# epoch range datetime can represent (0001-01-01 … 9999-12-31T23:59:59)
+_MIN_TS, _MAX_TS = -62_135_596_800, 253_402_300_799
+
+
+def _as_epoch(value: Any) -> float:
+    """int(value) as float, NaN where make_partition_values gives 'unknown'."""
+    try:
+        return float(int(value))
+    except (TypeError, ValueError, OverflowError):
+        return np.nan
+
+
+def _epoch_seconds(values: Iterable[Any]) -> np.ndarray:
+    arr = np.asarray(values)
+    if arr.dtype.kind in "biuf":
+        # numeric column: int() truncates toward zero, NaN stays NaN
+        return np.trunc(arr.astype("float64"))
+    memo: Dict[Any, float] = {}
+    out = np.empty(len(arr), dtype="float64")
+    for i, v in enumerate(arr):
+        try:
+            ts = memo.get(v)
+            if ts is None:
+                ts = memo[v] = _as_epoch(v)
+        except TypeError:            # unhashable (list, dict …)
+            ts = _as_epoch(v)
+        out[i] = ts
+    return out
+
+
+def partition_columns(created_t: Iterable[Any],
+                      countries_tags: Iterable[Any]) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorised make_partition_values over whole columns.
+
+    `year` comes from one datetime64 conversion of the epoch column;
+    `country` slugs are computed once per distinct first countries_tags
+    entry. Returns two object arrays of str, identical to applying
+    make_partition_values row by row.
+    """
+    secs = _epoch_seconds(created_t)
+    valid = (secs >= _MIN_TS) & (secs <= _MAX_TS)          # NaN → False
+    days = np.floor_divide(np.where(valid, secs, 0), 86_400).astype("int64")
+    years = days.astype("datetime64[D]").astype(
+        "datetime64[Y]").astype("int64") + 1970
+    year = np.where(valid, years.astype(str), "unknown").astype(object)
+
+    slugs: Dict[str, str] = {}
+    country = np.empty(len(year), dtype=object)
+    for i, tags in enumerate(countries_tags):
+        raw = _first_country(tags)
+        if raw is None:
+            country[i] = "unknown"
+            continue
+        slug = slugs.get(raw)
+        if slug is None:
+            slug = slugs[raw] = str(_country_slug(raw) or "unknown")
+        country[i] = slug
+    return year, country
+
+
 # Row flattener
 def extract_columns(obj: Dict[str, Any],
                     paths: Dict[str, List[str]] = COLUMN_PATHS) -> Dict[str, Any]:
@@ -133,10 +227,17 @@ def extract_columns(obj: Dict[str, Any],
 
 __all__ = [
     "KEEP_COLS",
+    "PART_COLS",
+    "TAG_COLS",
+    "ID_COLS",
+    "MODIFIED_COL",
     "TARGET",
     "PREDICTORS",
     "DTYPES",
+    "CATEGORICAL_COLS",
+    "dtypes",
     "normalize_country",
     "make_partition_values",
+    "partition_columns",
     "extract_columns",
 ]
@@ -0,0 +1,226 @@
+"""Arrow-native chunk engine: extracted records → typed RecordBatch → Parquet.
+
+Replaces the pandas round trip of `ingest_nutrisage.frame_from_lines` with one
+pass that collects each column as a plain list and converts it straight into a
+typed Arrow array (C-level conversion, no intermediate DataFrame). The output
+schema is the one `validate_ingest.check_detailed` expects:
+float32 nutrients, int64 `created_t`, string text, list<string> tags.
+
+With ``categorical=True`` the low-cardinality columns (`schema.CATEGORICAL_COLS`),
+the tag-list entries and year / country become ``dictionary<int32, string>``:
+buffered chunks hold each distinct value once, and Parquet keeps the Arrow
+type so readers get dictionaries back without re-encoding.
+"""
+
+from __future__ import annotations
+
+import math
+import uuid
+from dataclasses import replace
+from typing import Any, Dict, Iterable, List, Sequence
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+from fe import decode, schema
+from ingestion import layout as layouts
+from ingestion.metrics import DISABLED, Metrics
+
+DICT = pa.dictionary(pa.int32(), pa.string())
+
+_BASIC: Dict[str, pa.DataType] = {
+    "float32": pa.float32(),
+    "Int64": pa.int64(),
+    "string": pa.string(),
+    "category": DICT,
+}
+_STR_LIST = pa.list_(pa.string())
+_DICT_LIST = pa.list_(DICT)
+
+_OUT_COLS = schema.ID_COLS + schema.KEEP_COLS
+_INT64_MAX = float(2 ** 63)
+
+# mirror the pandas path: only the cast string columns turn "" into null
+_EMPTY_AS_NULL = {c for c, d in schema.DTYPES.items() if d == "string"}
+
+
+def arrow_type(col: str, categorical: bool = False) -> pa.DataType:
+    dtypes = schema.dtypes(categorical)
+    if col in dtypes:
+        return _BASIC[dtypes[col]]
+    if col in schema.TAG_COLS:
+        return _DICT_LIST if categorical else _STR_LIST
+    if col in schema.PART_COLS and categorical:
+        return DICT
+    return pa.string()
+
+
+def arrow_schema(partitions: bool = True, categorical: bool = False) -> pa.Schema:
+    """Schema of one ingest batch: ID_COLS, KEEP_COLS, then partitions."""
+    cols = _OUT_COLS + (schema.PART_COLS if partitions else [])
+    return pa.schema([pa.field(c, arrow_type(c, categorical)) for c in cols])
+
+
+def dictionary_encode(data: pa.RecordBatch | pa.Table) -> pa.RecordBatch | pa.Table:
+    """Cast the categorical columns present in `data` to dictionaries."""
+    target = arrow_schema(categorical=True)
+    fields = [target.field(f.name) if f.name in target.names else f
+              for f in data.schema]
+    return data.cast(pa.schema(fields, metadata=data.schema.metadata))
+
+
+# ─────────────────────────── column converters ─────────────────────────────
+def _num(v: Any) -> float | None:
+    """Coerce like pd.to_numeric(errors="coerce") for one JSON value."""
+    if v is None or isinstance(v, float):
+        return v
+    try:
+        if isinstance(v, (int, str)):
+            return float(v)
+    except (ValueError, OverflowError):
+        pass
+    return None
+
+
+def _float_array(values: List[Any], typ: pa.DataType) -> pa.Array:
+    try:  # fast path: all numbers / None
+        return pa.array(values, type=typ, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([_num(v) for v in values], type=typ, from_pandas=True)
+
+
+def _int_array(values: List[Any]) -> pa.Array:
+    # numeric-from-mixed, rounded half-to-even like Series.round()
+    nums = [_num(v) for v in values]
+    # ±inf, NaN and values outside int64 become null, like coercion._int
+    nums = [None if n is None or not abs(n) < _INT64_MAX else n for n in nums]
+    floats = pa.array(nums, type=pa.float64())
+    return pc.cast(pc.round(floats, round_mode="half_to_even"), pa.int64())
+
+
+def _str_array(values: List[Any], empty_as_null: bool) -> pa.Array:
+    try:
+        arr = pa.array(values, type=pa.string())
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        arr = pa.array([None if v is None else str(v) for v in values],
+                       type=pa.string())
+    if empty_as_null:
+        arr = pc.if_else(pc.equal(arr, ""), pa.scalar(None, pa.string()), arr)
+    return arr
+
+
+def _str_list(x: Any) -> list[str]:
+    if isinstance(x, list):
+        return [str(i) for i in x if i is not None]
+    if x is None or x == "" or (isinstance(x, float) and math.isnan(x)):
+        return []
+    return [str(x)]
+
+
+def _tags_array(values: List[Any]) -> pa.Array:
+    # fast path: lists of str / None (arrow would split a bare str into chars)
+    if all(v is None or type(v) is list for v in values):
+        try:
+            arr = pa.array(values, type=_STR_LIST)
+            if pc.list_flatten(arr).null_count == 0:
+                return pc.fill_null(arr, pa.scalar([], _STR_LIST))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass
+    return pa.array([_str_list(v) for v in values], type=_STR_LIST)
+
+
+def _column(col: str, values: List[Any]) -> pa.Array:
+    typ = arrow_type(col)
+    if col in schema.TAG_COLS:
+        return _tags_array(values)
+    if pa.types.is_floating(typ):
+        return _float_array(values, typ)
+    if pa.types.is_integer(typ):
+        return _int_array(values)
+    return _str_array(values, col in _EMPTY_AS_NULL)
+
+
+# ─────────────────────────────── batches ────────────────────────────────────
+def batch_from_records(recs: Iterable[Dict[str, Any]],
+                       extra: Sequence[str] = (),
+                       categorical: bool = False) -> pa.RecordBatch:
+    """Build one typed RecordBatch (with year / country) from flat records.
+
+    `extra` names additional integer fields (e.g. ``last_modified_t``)
+    appended after the partition columns as int64. `categorical`
+    dictionary-encodes the low-cardinality columns (see module docstring).
+    """
+    names = _OUT_COLS + [c for c in extra if c not in _OUT_COLS]
+    cols: Dict[str, List[Any]] = {c: [] for c in names}
+    appends = [(cols[c].append, c) for c in names]
+    for rec in recs:
+        for append, c in appends:
+            append(rec.get(c))
+
+    arrays = [_column(c, cols[c]) for c in _OUT_COLS]
+    year, country = schema.partition_columns(
+        cols["created_t"], cols["countries_tags"])
+    arrays += [pa.array(year, pa.string()), pa.array(country, pa.string())]
+    fields = list(arrow_schema())
+    for c in names[len(_OUT_COLS):]:
+        arrays.append(_int_array(cols[c]))
+        fields.append(pa.field(c, pa.int64()))
+    batch = pa.RecordBatch.from_arrays(arrays, schema=pa.schema(fields))
+    return dictionary_encode(batch) if categorical else batch
+
+
+def batch_from_lines(lines: Sequence[str | bytes],
+                     decoder: str = "auto",
+                     extra: Sequence[str] = (),
+                     metrics: Metrics = DISABLED,
+                     categorical: bool = False) -> pa.RecordBatch:
+    """Parse and type one chunk of JSONL lines (runs in worker processes)."""
+    recs = map(decode.cached_decoder(decoder), lines)
+    if metrics.enabled:                    # materialise so decode is timed alone
+        with metrics.stage("decode", rows=len(lines)):
+            recs = list(recs)
+    with metrics.stage("build", rows=len(lines)):
+        return batch_from_records(recs, extra, categorical)
+
+
+def write_batch(batch: pa.RecordBatch | pa.Table,
+                fs: pafs.FileSystem,
+                base_dir: str,
+                compression: str = "snappy",
+                basename: str | None = None,
+                layout: str | layouts.LayoutProfile | None = None) -> List[str]:
+    """Append `batch` to the hive-partitioned dataset under `base_dir`.
+
+    `basename` (containing ``{i}``) makes file names deterministic, so
+    re-writing the same chunk overwrites instead of duplicating it.
+    `layout` (an `ingestion.layout` profile) overrides `compression`; Bloom
+    filters are not available on this path. Returns the paths written.
+    """
+    prof = (layouts.get(layout) if layout is not None
+            else replace(layouts.DEFAULT, compression=compression))
+    table = batch if isinstance(batch, pa.Table) else pa.Table.from_batches([batch])
+    table = prof.sort(table)
+    file_schema = pa.schema([f for f in table.schema
+                             if f.name not in schema.PART_COLS])
+    written: List[str] = []
+    ds.write_dataset(
+        table,
+        base_dir,
+        format="parquet",
+        filesystem=fs,
+        partitioning=ds.partitioning(
+            pa.schema([pa.field(p, pa.string()) for p in schema.PART_COLS]),
+            flavor="hive"),
+        basename_template=basename or f"{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        file_visitor=lambda f: written.append(f.path),
+        preserve_order=bool(prof.sort_by),
+        **prof.dataset_options(file_schema),
+    )
+    return written
+
+
+__all__ = ["DICT", "arrow_schema", "dictionary_encode", "batch_from_records",
+           "batch_from_lines", "write_batch"]
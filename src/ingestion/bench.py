@@ -0,0 +1,219 @@
+"""
+Ingest micro-benchmarks on a synthetic (or given) OpenFoodFacts dump.
+
+Times every stage of `stream_ingest` separately, on the output of the stage
+before it, at several chunk sizes:
+
+  decompress   gzip → line batches
+  json_loads   json.loads per line
+  extract      fe.schema.extract_columns per object
+  partition    fe.schema.partition_columns (year / country)
+  cast         DataFrame + ingest_nutrisage.cast_frame
+  write        Parquet (hive partitions) to a local directory
+
+Each stage reports the best of `--repeat` runs as rows/s and, from one extra
+traced run, the peak Python heap (tracemalloc) plus Arrow pool growth in MiB.
+Results are JSON; ``--save-baseline`` stores them and ``--baseline`` flags
+stages slower (or hungrier) than the baseline by more than ``--tolerance``
+(non-zero exit status, for CI).
+
+  python -m ingestion.bench --rows 200000 --chunk-rows 10000 50000 \\
+         --out reports/bench/ingest.json --baseline reports/bench/baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.fs as pafs
+
+from fe import schema
+from ingestion import arrow_engine, synthetic
+from ingestion.ingest_nutrisage import cast_frame, iter_line_batches
+from ingestion.writer import MiB
+
+STAGES = ["decompress", "json_loads", "extract", "partition", "cast", "write"]
+
+
+@dataclass
+class StageResult:
+    stage: str
+    chunk_rows: int
+    rows: int
+    seconds: float
+    rows_per_s: float
+    peak_mb: float
+
+
+# ───────────────────────────── stages ────────────────────────────────────────
+def _decompress(path: str, chunk_rows: int) -> List[List[bytes]]:
+    with gzip.open(path, "rb") as fh:
+        return list(iter_line_batches(fh, chunk_rows))
+
+
+def _partition(chunks: List[List[Dict[str, Any]]]) -> List[List[Dict[str, Any]]]:
+    for recs in chunks:
+        year, country = schema.partition_columns(
+            [r.get("created_t") for r in recs],
+            [r.get("countries_tags") for r in recs])
+        for rec, y, c in zip(recs, year, country):
+            rec["year"], rec["country"] = y, c
+    return chunks
+
+
+def _write(frames: List[pd.DataFrame], out_dir: str) -> None:
+    shutil.rmtree(out_dir, ignore_errors=True)
+    fs, base = pafs.LocalFileSystem(), os.path.abspath(out_dir)
+    for i, df in enumerate(frames):
+        arrow_engine.write_batch(pa.Table.from_pandas(df, preserve_index=False),
+                                 fs, base, basename=f"bench-{i:05d}-{{i}}.parquet")
+
+
+def _pipeline(path: str, chunk_rows: int, out_dir: str) -> List[tuple[str, Callable]]:
+    """``(stage, fn(previous_output) -> output)`` in pipeline order."""
+    return [
+        ("decompress", lambda _: _decompress(path, chunk_rows)),
+        ("json_loads", lambda chunks: [[json.loads(ln) for ln in c] for c in chunks]),
+        ("extract", lambda chunks: [[schema.extract_columns(o) for o in c]
+                                    for c in chunks]),
+        # partition mutates records in place → copy so repeats stay honest
+        ("partition", lambda chunks: _partition([[dict(r) for r in c]
+                                                 for c in chunks])),
+        ("cast", lambda chunks: [cast_frame(pd.DataFrame.from_records(c))
+                                 for c in chunks]),
+        ("write", lambda frames: _write(frames, out_dir)),
+    ]
+
+
+def _peak_mb(fn: Callable, arg: Any) -> float:
+    pool = pa.default_memory_pool()
+    arrow_before = pool.bytes_allocated()
+    tracemalloc.start()
+    try:
+        out = fn(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    arrow = max(pool.bytes_allocated() - arrow_before, 0)
+    del out
+    return round((peak + arrow) / MiB, 2)
+
+
+def run(path: str, chunk_sizes: Sequence[int], repeat: int = 3,
+        stages: Sequence[str] = STAGES) -> List[StageResult]:
+    """Benchmark every stage at every chunk size."""
+    with gzip.open(path, "rb") as fh:
+        rows = sum(1 for _ in fh)
+    results: List[StageResult] = []
+    with tempfile.TemporaryDirectory(prefix="nutrisage-bench-") as tmp:
+        for chunk_rows in chunk_sizes:
+            data: Any = None
+            for name, fn in _pipeline(path, chunk_rows, os.path.join(tmp, "out")):
+                best, out = float("inf"), None
+                for _ in range(max(repeat, 1)):
+                    t0 = time.perf_counter()
+                    out = fn(data)
+                    best = min(best, time.perf_counter() - t0)
+                if name in stages:
+                    results.append(StageResult(
+                        stage=name, chunk_rows=chunk_rows, rows=rows,
+                        seconds=round(best, 4),
+                        rows_per_s=round(rows / best if best else 0.0, 1),
+                        peak_mb=_peak_mb(fn, data)))
+                data = out
+    return results
+
+
+# ─────────────────────────── baseline check ──────────────────────────────────
+def report(results: List[StageResult], path: str, **meta: Any) -> Dict[str, Any]:
+    return {
+        "meta": {"input": path, "python": sys.version.split()[0],
+                 "platform": platform.platform(), "pyarrow": pa.__version__,
+                 "pandas": pd.__version__, **meta},
+        "results": [asdict(r) for r in results],
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any],
+            tolerance: float = 0.25) -> List[str]:
+    """Human-readable regressions of `current` against `baseline`."""
+    base = {(r["stage"], r["chunk_rows"]): r for r in baseline["results"]}
+    found: List[str] = []
+    for r in current["results"]:
+        b = base.get((r["stage"], r["chunk_rows"]))
+        if b is None:
+            continue
+        where = f"{r['stage']} @ {r['chunk_rows']:,} rows/chunk"
+        if r["rows_per_s"] < b["rows_per_s"] * (1 - tolerance):
+            found.append(f"{where}: {r['rows_per_s']:,.0f} rows/s "
+                         f"(baseline {b['rows_per_s']:,.0f})")
+        if r["peak_mb"] > b["peak_mb"] * (1 + tolerance) + 1:
+            found.append(f"{where}: peak {r['peak_mb']:,.1f} MiB "
+                         f"(baseline {b['peak_mb']:,.1f})")
+    return found
+
+
+# ─────────────────────────────── CLI ─────────────────────────────────────────
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Ingest stage micro-benchmarks")
+    p.add_argument("--input", help="OFF .jsonl.gz (default: synthetic dump)")
+    p.add_argument("--rows", type=int, default=50_000,
+                   help="synthetic rows when --input is not given")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--chunk-rows", type=int, nargs="+",
+                   default=[5_000, 20_000, 50_000])
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    p.add_argument("--out", help="write the JSON report here (default stdout)")
+    p.add_argument("--baseline", help="baseline JSON to compare against")
+    p.add_argument("--save-baseline", help="also store the report as a baseline")
+    p.add_argument("--tolerance", type=float, default=0.25,
+                   help="allowed relative slowdown / memory growth")
+    args = p.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="nutrisage-synth-") as tmp:
+        path = args.input or synthetic.write_dump(
+            os.path.join(tmp, "synthetic.jsonl.gz"), args.rows, args.seed)
+        results = run(path, args.chunk_rows, args.repeat, args.stages)
+    doc = report(results, args.input or "synthetic", rows=results[0].rows,
+                 seed=None if args.input else args.seed)
+
+    payload = json.dumps(doc, indent=2)
+    for dest in filter(None, (args.out, args.save_baseline)):
+        os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+        with open(dest, "w", encoding="utf-8") as fh:
+            fh.write(payload + "\n")
+    if not args.out:
+        print(payload)
+
+    for r in results:
+        print(f"  {r.stage:<11} {r.chunk_rows:>8,} rows/chunk  "
+              f"{r.rows_per_s:>12,.0f} rows/s  {r.peak_mb:>8,.1f} MiB",
+              file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            regressions = compare(doc, json.load(fh), args.tolerance)
+        for line in regressions:
+            print(f"✘ Regression: {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("✔ No regressions against baseline", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
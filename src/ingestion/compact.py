@@ -0,0 +1,315 @@
+"""
+Compact small Parquet files under processed/ into right-sized files.
+
+Walks the hive partitions (``year=/country=``) of the processed dataset, bin-packs
+the small files of each partition into groups of ~target size and stream-merges
+every group (one row group in memory at a time) into a new file. The swap is
+journaled per partition so a crash can always be rolled forward:
+
+  1. merged data is written to hidden ``_tmp-*`` files (ignored by readers)
+  2. ``_compact.json`` records tmp → final names and the files being replaced
+  3. tmp files are moved to their final names, old files deleted, journal removed
+
+A run first replays any journal left behind by an interrupted run and deletes
+``_tmp-*`` files no journal refers to (a crash before step 2).
+
+  python -m ingestion.compact --target s3://<proc-bucket>/processed/ --workers 8
+  python -m ingestion.compact --target ./data/processed --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import json
+import posixpath
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+import boto3
+import pyarrow as pa
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from fe import schema
+from ingestion import layout as layouts
+from ingestion import manifest, storage
+from ingestion.writer import MiB
+
+JOURNAL = "_compact.json"
+
+
+@dataclass
+class PartitionResult:
+    partition: str
+    files_before: int = 0
+    files_after: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+    skipped: str | None = None
+
+
+# ─────────────────────────── discovery ───────────────────────────────────────
+def _is_data_file(info: pafs.FileInfo) -> bool:
+    name = info.base_name
+    return (info.type == pafs.FileType.File and name.endswith(".parquet")
+            and not name.startswith(("_", ".")))
+
+
+def list_partitions(fs: pafs.FileSystem, base_dir: str,
+                    part_cols: List[str] = schema.PART_COLS) -> Dict[str, List[pafs.FileInfo]]:
+    """Map every ``year=…/country=…`` directory to its Parquet files."""
+    parts: Dict[str, List[pafs.FileInfo]] = {}
+    for info in fs.get_file_info(pafs.FileSelector(base_dir, recursive=True,
+                                                   allow_not_found=True)):
+        rel = posixpath.relpath(info.path, base_dir).split("/")
+        if len(rel) != len(part_cols) + 1:
+            continue
+        if not all(d.startswith(f"{c}=") for d, c in zip(rel, part_cols)):
+            continue
+        part_dir = posixpath.dirname(info.path)
+        if info.base_name == JOURNAL:
+            parts.setdefault(part_dir, [])
+        elif _is_data_file(info):
+            parts.setdefault(part_dir, []).append(info)
+    return parts
+
+
+def plan_groups(files: List[pafs.FileInfo], target_bytes: int,
+                small_bytes: int) -> List[List[pafs.FileInfo]]:
+    """First-fit bin-packing of the small files into ≤ target-size groups."""
+    small = sorted((f for f in files if f.size < small_bytes),
+                   key=lambda f: f.size, reverse=True)
+    groups: List[List[pafs.FileInfo]] = []
+    sizes: List[int] = []
+    for f in small:
+        for i, size in enumerate(sizes):
+            if size + f.size <= target_bytes:
+                groups[i].append(f)
+                sizes[i] += f.size
+                break
+        else:
+            groups.append([f])
+            sizes.append(f.size)
+    return [g for g in groups if len(g) > 1]
+
+
+# ───────────────────────────── merge ─────────────────────────────────────────
+def _plain_schema(schema: pa.Schema) -> pa.Schema:
+    """`schema` with dictionary (and list-of-dictionary) types decoded."""
+    def plain(t: pa.DataType) -> pa.DataType:
+        if pa.types.is_dictionary(t):
+            return t.value_type
+        if pa.types.is_list(t):
+            return pa.list_(t.value_field.with_type(plain(t.value_type)))
+        return t
+    return pa.schema([f.with_type(plain(f.type)) for f in schema],
+                     metadata=schema.metadata)
+
+
+def merge_files(fs: pafs.FileSystem, paths: List[str], dest: str,
+                row_group_rows: int = 1_000_000,
+                compression: str = "snappy",
+                keep: Callable[[pa.RecordBatch], pa.Array] | None = None,
+                layout: layouts.LayoutProfile | None = None) -> int:
+    """Stream `paths` into one Parquet file at `dest`; return bytes written.
+
+    Only ~`row_group_rows` rows are held in memory at any time. `keep`
+    optionally returns a boolean row mask per batch (rows to retain).
+    `layout` (codec, row groups, page index, Bloom filters) overrides
+    `compression` / `row_group_rows`; its sort applies per row group.
+    """
+    prof = layout or dataclasses.replace(layouts.DEFAULT, compression=compression)
+    row_group_rows = prof.row_group_rows or row_group_rows
+    metas = [pq.read_metadata(p, filesystem=fs) for p in paths]
+    schemas = [m.schema.to_arrow_schema() for m in metas]
+    try:
+        target = pa.unify_schemas(schemas, promote_options="permissive")
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # plain and dictionary-encoded (--categorical) files: merge as plain
+        target = pa.unify_schemas([_plain_schema(s) for s in schemas],
+                                  promote_options="permissive")
+
+    pending: List[pa.Table] = []
+    held = 0
+    with fs.open_output_stream(dest) as sink:
+        opts = prof.writer_options(target, sum(m.num_rows for m in metas))
+        with pq.ParquetWriter(sink, target, **opts) as out:
+            for path in paths:
+                with fs.open_input_file(path) as fh:
+                    for batch in pq.ParquetFile(fh).iter_batches(
+                            batch_size=min(row_group_rows, 65_536)):
+                        if keep is not None:
+                            batch = batch.filter(keep(batch))
+                        pending.append(pa.Table.from_batches([batch]).cast(target))
+                        held += batch.num_rows
+                        if held >= row_group_rows:
+                            out.write_table(prof.sort(pa.concat_tables(pending)),
+                                            row_group_size=row_group_rows)
+                            pending, held = [], 0
+            if pending:
+                out.write_table(prof.sort(pa.concat_tables(pending)),
+                                row_group_size=row_group_rows)
+        return sink.tell()
+
+
+# ──────────────────────────── journal ────────────────────────────────────────
+def _write_journal(fs: pafs.FileSystem, part_dir: str, entry: dict) -> None:
+    with fs.open_output_stream(f"{part_dir}/{JOURNAL}") as fh:
+        fh.write(json.dumps(entry).encode("utf-8"))
+
+
+def _exists(fs: pafs.FileSystem, path: str) -> bool:
+    return fs.get_file_info(path).type != pafs.FileType.NotFound
+
+
+def _remove_orphans(fs: pafs.FileSystem, part_dir: str) -> None:
+    """Delete ``_tmp-*`` files of runs that crashed before their journal."""
+    for info in fs.get_file_info(pafs.FileSelector(part_dir, allow_not_found=True)):
+        if info.type == pafs.FileType.File and info.base_name.startswith("_tmp-"):
+            fs.delete_file(info.path)
+
+
+def replay_journal(fs: pafs.FileSystem, part_dir: str) -> bool:
+    """Roll an interrupted swap forward; return True if a journal was found.
+
+    Without a journal, leftover ``_tmp-*`` files are unreferenced and deleted.
+    """
+    path = f"{part_dir}/{JOURNAL}"
+    if not _exists(fs, path):
+        _remove_orphans(fs, part_dir)
+        return False
+    with fs.open_input_stream(path) as fh:
+        entry = json.loads(fh.read().decode("utf-8"))
+    for tmp, final in entry["moves"].items():
+        if _exists(fs, tmp):
+            fs.move(tmp, final)
+    for old in entry["replaced"]:
+        if _exists(fs, old):
+            fs.delete_file(old)
+    fs.delete_file(path)
+    return True
+
+
+# ─────────────────────────── partition job ───────────────────────────────────
+def compact_partition(fs: pafs.FileSystem, part_dir: str,
+                      files: List[pafs.FileInfo], *,
+                      target_bytes: int, small_bytes: int,
+                      row_group_rows: int, compression: str,
+                      layout: layouts.LayoutProfile | None = None,
+                      dry_run: bool = False) -> PartitionResult:
+    res = PartitionResult(partition=part_dir)
+    if not dry_run and replay_journal(fs, part_dir):
+        files = [f for f in fs.get_file_info(pafs.FileSelector(part_dir))
+                 if _is_data_file(f)]
+
+    groups = plan_groups(files, target_bytes, small_bytes)
+    res.files_before = sum(len(g) for g in groups)
+    res.bytes_before = sum(f.size for g in groups for f in g)
+    if not groups:
+        res.skipped = "nothing to compact"
+        return res
+    if dry_run:
+        res.files_after = len(groups)
+        return res
+
+    run = uuid.uuid4().hex[:12]
+    moves: Dict[str, str] = {}
+    for i, group in enumerate(groups):
+        tmp = f"{part_dir}/_tmp-{run}-{i:05d}.parquet"
+        res.bytes_after += merge_files(fs, [f.path for f in group], tmp,
+                                       row_group_rows, compression,
+                                       layout=layout)
+        moves[tmp] = f"{part_dir}/part-c{run}-{i:05d}.parquet"
+
+    _write_journal(fs, part_dir, {
+        "moves": moves,
+        "replaced": [f.path for g in groups for f in g],
+    })
+    replay_journal(fs, part_dir)
+    res.files_after = len(groups)
+    return res
+
+
+def compact(uri: str,
+            session: boto3.Session | None = None,
+            *,
+            target_bytes: int = 128 * MiB,
+            small_bytes: int | None = None,
+            row_group_rows: int = 1_000_000,
+            compression: str = "snappy",
+            layout: str | layouts.LayoutProfile | None = None,
+            workers: int = 4,
+            dry_run: bool = False) -> List[PartitionResult]:
+    """Compact every partition under `uri` (S3 URI or local directory).
+
+    `layout` names a `ingestion.layout` profile for the merged files (codec,
+    row groups, sort, page index, Bloom filters)."""
+    prof = layouts.get(layout) if layout is not None else None
+    fs, base_dir = storage.resolve(uri, session)
+    small = small_bytes if small_bytes is not None else target_bytes // 2
+    parts = list_partitions(fs, base_dir)
+
+    def job(item):
+        part_dir, files = item
+        return compact_partition(fs, part_dir, files,
+                                 target_bytes=target_bytes, small_bytes=small,
+                                 row_group_rows=row_group_rows,
+                                 compression=compression, layout=prof,
+                                 dry_run=dry_run)
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        results = list(pool.map(job, sorted(parts.items())))
+
+    # keep an existing _manifest.json in step with the swapped files
+    changed = [r.partition for r in results if r.skipped is None and not dry_run]
+    m = manifest.DatasetManifest.load(uri, session)
+    if changed and m.entries:
+        m.sync_partitions(changed, workers=workers)
+        m.save()
+    return results
+
+
+# ─────────────────────────────── CLI ─────────────────────────────────────────
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Compact small Parquet files")
+    p.add_argument("--target", required=True,
+                   help="dataset root: s3://bucket/processed/, bucket name "
+                        "or local directory")
+    p.add_argument("--profile", help="AWS profile (optional)")
+    p.add_argument("--target-file-mb", type=int, default=128)
+    p.add_argument("--small-file-mb", type=int, default=None,
+                   help="files below this are merged (default target/2)")
+    p.add_argument("--row-group-rows", type=int, default=1_000_000)
+    p.add_argument("--layout", default=None, choices=list(layouts.PROFILES),
+                   help="Parquet layout profile for merged files "
+                        "(overrides the row-group size)")
+    p.add_argument("--workers", type=int, default=4,
+                   help="partitions compacted in parallel")
+    p.add_argument("--dry-run", action="store_true")
+    args = p.parse_args(argv)
+
+    session = boto3.Session(profile_name=args.profile) if args.profile else None
+    results = compact(
+        storage.processed_uri(args.target), session,
+        target_bytes=args.target_file_mb * MiB,
+        small_bytes=None if args.small_file_mb is None else args.small_file_mb * MiB,
+        row_group_rows=args.row_group_rows,
+        layout=args.layout,
+        workers=args.workers,
+        dry_run=args.dry_run,
+    )
+
+    done = [r for r in results if r.skipped is None]
+    before = sum(r.files_before for r in done)
+    after = sum(r.files_after for r in done)
+    verb = "Would compact" if args.dry_run else "Compacted"
+    print(f"✔ {verb} {len(done):,}/{len(results):,} partitions: "
+          f"{before:,} files → {after:,} files "
+          f"({sum(r.bytes_before for r in done) / MiB:,.1f} MiB in)")
+
+
+if __name__ == "__main__":
+    main()
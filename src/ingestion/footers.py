@@ -0,0 +1,224 @@
+"""
+Parallel Parquet footer scan with a persistent footer manifest.
+
+Validation needs only footer facts per file (row count, row groups, schema,
+column statistics per row group).
+`scan` lists the dataset once (one LIST page per 1000 objects on S3, with
+ETags), reuses the cached entry of every file whose ETag and size are
+unchanged, and fetches the footers of new / changed files from a thread pool.
+The result is stored as a JSON manifest (default ``<dataset>/_footers.json``,
+ignored by readers; any local path or S3 URI works) so a re-validation of an
+unchanged dataset reads no footers at all.
+
+Local files use ``<mtime_ns>-<size>`` in place of an ETag.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Tuple
+
+import boto3
+import pyarrow as pa
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from ingestion import storage
+
+MANIFEST_NAME = "_footers.json"
+
+
+@dataclass
+class FooterEntry:
+    path: str
+    etag: str
+    size: int
+    rows: int
+    row_groups: int
+    schema: str                        # fingerprint, key into Manifest.schemas
+    # per row group: {"rows": n, "bytes": compressed, "cols": {column: [min, max, nulls]}}
+    stats: List[Dict[str, Any]] | None = None
+
+
+@dataclass
+class FooterManifest:
+    root: str
+    files: Dict[str, FooterEntry] = field(default_factory=dict)
+    schemas: Dict[str, str] = field(default_factory=dict)     # fp → b64 IPC
+
+    @property
+    def rows(self) -> int:
+        return sum(e.rows for e in self.files.values())
+
+    def schema(self, fp: str) -> pa.Schema:
+        return pa.ipc.read_schema(pa.py_buffer(base64.b64decode(self.schemas[fp])))
+
+    # ------------------------------------------------------------ storage
+    def save(self, uri: str, session: boto3.Session | None = None) -> None:
+        fs, path = storage.resolve(uri, session)
+        payload = json.dumps({
+            "root": self.root,
+            "schemas": self.schemas,
+            "files": [asdict(e) for e in self.files.values()],
+        }).encode("utf-8")
+        fs.create_dir(posixpath.dirname(path), recursive=True)
+        tmp = path if storage.is_s3(uri) else f"{path}.tmp"
+        with fs.open_output_stream(tmp) as fh:
+            fh.write(payload)
+        if tmp != path:
+            fs.move(tmp, path)
+
+    @classmethod
+    def load(cls, uri: str,
+             session: boto3.Session | None = None) -> "FooterManifest | None":
+        fs, path = storage.resolve(uri, session)
+        if fs.get_file_info(path).type == pafs.FileType.NotFound:
+            return None
+        with fs.open_input_stream(path) as fh:
+            doc = json.loads(fh.read().decode("utf-8"))
+        files = {e["path"]: FooterEntry(**e) for e in doc["files"]}
+        return cls(root=doc["root"], files=files, schemas=doc["schemas"])
+
+
+@dataclass
+class ScanStats:
+    files: int = 0
+    reused: int = 0
+    read: int = 0
+    removed: int = 0
+
+    def summary(self) -> str:
+        return (f"{self.files:,} files ({self.reused:,} cached, "
+                f"{self.read:,} footers read, {self.removed:,} gone)")
+
+
+# ─────────────────────────── listing ─────────────────────────────────────────
+def _is_data_key(rel: str) -> bool:
+    return rel.endswith(".parquet") and not any(
+        part.startswith(("_", ".")) for part in rel.split("/"))
+
+
+def list_data_files(uri: str,
+                    session: boto3.Session | None = None) -> List[Tuple[str, str, int]]:
+    """``(path, etag, size)`` of every data file under `uri` (Arrow fs paths)."""
+    fs, base = storage.resolve(uri, session)
+    base = base.rstrip("/")
+    if storage.is_s3(uri):
+        bucket, _, prefix = base.partition("/")
+        s3 = (session or boto3.Session()).client("s3")
+        out = []
+        for page in s3.get_paginator("list_objects_v2").paginate(
+                Bucket=bucket, Prefix=f"{prefix}/" if prefix else ""):
+            for obj in page.get("Contents", []):
+                rel = obj["Key"][len(prefix):].lstrip("/")
+                if _is_data_key(rel):
+                    out.append((f"{bucket}/{obj['Key']}", obj["ETag"].strip('"'),
+                                obj["Size"]))
+        return out
+    return [
+        (info.path, f"{info.mtime_ns}-{info.size}", info.size)
+        for info in fs.get_file_info(pafs.FileSelector(base, recursive=True,
+                                                       allow_not_found=True))
+        if info.type == pafs.FileType.File
+        and _is_data_key(posixpath.relpath(info.path, base))
+    ]
+
+
+# ─────────────────────────── footers ─────────────────────────────────────────
+def schema_fingerprint(schema: pa.Schema) -> Tuple[str, str]:
+    """``(fingerprint, base64 IPC)`` of `schema` without its metadata."""
+    raw = schema.remove_metadata().serialize().to_pybytes()
+    return hashlib.sha1(raw).hexdigest()[:16], base64.b64encode(raw).decode("ascii")
+
+
+def read_footer(fs: pafs.FileSystem, path: str) -> pq.FileMetaData:
+    with fs.open_input_file(path) as fh:
+        return pq.ParquetFile(fh).metadata
+
+
+def _plain(v: Any) -> Any:
+    return v.decode("utf-8", "replace") if isinstance(v, bytes) else v
+
+
+def row_group_stats(meta: pq.FileMetaData) -> List[Dict[str, Any]]:
+    """Footer statistics of the flat (non-list) columns, per row group."""
+    out = []
+    for i in range(meta.num_row_groups):
+        rg = meta.row_group(i)
+        cols: Dict[str, list] = {}
+        size = 0
+        for j in range(rg.num_columns):
+            cc = rg.column(j)
+            size += cc.total_compressed_size
+            if "." in cc.path_in_schema:             # list / nested leaves
+                continue
+            st = cc.statistics
+            if st is None:
+                cols[cc.path_in_schema] = [None, None, None]
+                continue
+            lo, hi = (_plain(st.min), _plain(st.max)) if st.has_min_max else (None, None)
+            cols[cc.path_in_schema] = [lo, hi,
+                                       st.null_count if st.has_null_count else None]
+        out.append({"rows": rg.num_rows, "bytes": size, "cols": cols})
+    return out
+
+
+def default_manifest_uri(uri: str) -> str:
+    return f"{uri.rstrip('/')}/{MANIFEST_NAME}"
+
+
+def scan(uri: str,
+         session: boto3.Session | None = None,
+         *,
+         workers: int = 16,
+         manifest_uri: str | None = None,
+         refresh: bool = False) -> Tuple[FooterManifest, ScanStats]:
+    """Up-to-date footer manifest for the dataset under `uri`.
+
+    Only footers of files that are new or whose ETag / size changed are read
+    (in parallel); the manifest is saved back unless nothing changed.
+    """
+    fs, _ = storage.resolve(uri, session)
+    manifest_uri = manifest_uri or default_manifest_uri(uri)
+    old = None if refresh else FooterManifest.load(manifest_uri, session)
+    if old is None or old.root != uri:
+        old = FooterManifest(root=uri)
+
+    listed = list_data_files(uri, session)
+    stats = ScanStats(files=len(listed))
+    new = FooterManifest(root=uri)
+    todo: List[Tuple[str, str, int]] = []
+    for path, etag, size in listed:
+        cached = old.files.get(path)
+        if cached is not None and (cached.etag, cached.size) == (etag, size) \
+                and cached.stats is not None:
+            new.files[path] = cached
+            new.schemas[cached.schema] = old.schemas[cached.schema]
+            stats.reused += 1
+        else:
+            todo.append((path, etag, size))
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        metas = pool.map(lambda item: read_footer(fs, item[0]), todo)
+        for (path, etag, size), meta in zip(todo, metas):
+            fp, blob = schema_fingerprint(meta.schema.to_arrow_schema())
+            new.schemas[fp] = blob
+            new.files[path] = FooterEntry(path, etag, size, meta.num_rows,
+                                          meta.num_row_groups, fp,
+                                          row_group_stats(meta))
+    stats.read = len(todo)
+    stats.removed = len(set(old.files) - set(new.files))
+
+    if stats.read or stats.removed or not old.files:
+        new.save(manifest_uri, session)
+    return new, stats
+
+
+__all__ = ["MANIFEST_NAME", "FooterEntry", "FooterManifest", "ScanStats",
+           "list_data_files", "schema_fingerprint", "read_footer", "row_group_stats",
+           "default_manifest_uri", "scan"]
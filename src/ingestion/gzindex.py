@@ -0,0 +1,149 @@
+"""
+Random-access index for the OpenFoodFacts ``.jsonl.gz`` dump.
+
+A plain gzip stream can only be decompressed front to back. The index records
+zran-style access points (uncompressed offset + 32 KiB window, via the optional
+`indexed_gzip` package) every `spacing` bytes, plus the first line boundary after
+each point. Consecutive boundaries give independent, line-aligned byte ranges
+that separate workers can seek to, decompress and parse on their own.
+
+Both parts are cached next to the input and reused while the file is unchanged:
+
+  <input>.gzidx        zran access points (binary, indexed_gzip format)
+  <input>.gzidx.json   line-aligned split offsets + input identity
+
+  python -m ingestion.gzindex --input data/openfoodfacts-products.jsonl.gz
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import List, Tuple
+
+try:  # optional C zran implementation
+    import indexed_gzip  # type: ignore
+except ImportError:  # pragma: no cover - depends on environment
+    indexed_gzip = None
+
+MiB = 1 << 20
+
+
+@dataclass
+class GzipIndex:
+    input: str
+    input_size: int
+    input_mtime: float
+    spacing: int
+    splits: List[int] = field(default_factory=list)   # line-aligned offsets
+    total: int = 0                                     # uncompressed bytes
+
+    @property
+    def zran_path(self) -> str:
+        return f"{self.input}.gzidx"
+
+    @property
+    def json_path(self) -> str:
+        return f"{self.input}.gzidx.json"
+
+    def matches(self, path: str) -> bool:
+        st = os.stat(path)
+        return (st.st_size, st.st_mtime) == (self.input_size, self.input_mtime)
+
+    def ranges(self, start: int = 0) -> List[Tuple[int, int]]:
+        """Line-aligned ``(start, end)`` uncompressed byte ranges from `start`.
+
+        `start` must itself be a line boundary (e.g. a checkpoint offset).
+        """
+        cuts = [start] + [s for s in self.splits if s > start] + [self.total]
+        return [(a, b) for a, b in zip(cuts[:-1], cuts[1:]) if b > a]
+
+
+def _require_backend() -> None:
+    if indexed_gzip is None:
+        raise RuntimeError("gzip random access needs the optional "
+                           "'indexed_gzip' package (pip install indexed_gzip)")
+
+
+def build(path: str, spacing: int = 64 * MiB) -> GzipIndex:
+    """One sequential pass: build access points and line-aligned splits."""
+    _require_backend()
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    idx = GzipIndex(input=path, input_size=st.st_size,
+                    input_mtime=st.st_mtime, spacing=spacing)
+
+    with indexed_gzip.IndexedGzipFile(path, spacing=spacing) as fh:
+        fh.build_full_index()
+        fh.export_index(idx.zran_path)
+        for offset, _ in fh.seek_points():
+            if offset == 0:
+                continue
+            fh.seek(offset - 1)
+            fh.readline()                 # finish the line spanning the point
+            split = fh.tell()
+            if not idx.splits or split > idx.splits[-1]:
+                idx.splits.append(split)
+        fh.seek(0, os.SEEK_END)
+        idx.total = fh.tell()
+
+    with open(idx.json_path, "w", encoding="utf-8") as out:
+        json.dump(asdict(idx), out)
+    return idx
+
+
+def load(path: str) -> GzipIndex | None:
+    """Cached index for `path`, or None if missing or stale."""
+    path = os.path.abspath(path)
+    try:
+        with open(f"{path}.gzidx.json", encoding="utf-8") as fh:
+            idx = GzipIndex(**json.load(fh))
+    except FileNotFoundError:
+        return None
+    ok = idx.matches(path) and os.path.exists(idx.zran_path)
+    return idx if ok else None
+
+
+def load_or_build(path: str, spacing: int = 64 * MiB) -> GzipIndex:
+    return load(path) or build(path, spacing)
+
+
+@functools.lru_cache(maxsize=8)
+def _reader(zran_path: str, input_path: str):
+    """One indexed reader per process and input (index imported once)."""
+    _require_backend()
+    return indexed_gzip.IndexedGzipFile(input_path, index_file=zran_path)
+
+
+def read_range(idx: GzipIndex, start: int, end: int) -> List[bytes]:
+    """Decompress the lines in ``[start, end)``; cost ≈ spacing + range size."""
+    fh = _reader(idx.zran_path, idx.input)
+    fh.seek(start)
+    lines: List[bytes] = []
+    pos = start
+    while pos < end:
+        line = fh.readline()
+        if not line:
+            break
+        lines.append(line)
+        pos += len(line)
+    return lines
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Build a random-access gzip index")
+    p.add_argument("--input", required=True, help="local .jsonl.gz file")
+    p.add_argument("--spacing-mb", type=int, default=64,
+                   help="uncompressed MiB between access points / ranges")
+    args = p.parse_args(argv)
+
+    idx = build(args.input, args.spacing_mb * MiB)
+    print(f"✔ Indexed {idx.total / MiB:,.0f} MiB → {len(idx.ranges()):,} "
+          f"line-aligned ranges ({idx.zran_path})")
+
+
+if __name__ == "__main__":
+    main()
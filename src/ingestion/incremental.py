@@ -0,0 +1,283 @@
+"""
+Incremental (delta) ingest state: watermark + per-product fingerprint store.
+
+OpenFoodFacts publishes full dumps and daily deltas. To avoid re-ingesting
+everything, an incremental run keeps, next to the processed dataset,
+
+  _state/fingerprints.npz   sorted 64-bit hashes of `code` → last_modified_t
+                            and the ``year=/country=`` partition holding the row
+                            plus the watermark (max last_modified_t ingested)
+                            and the ids of the input files already applied
+
+Records at or below the watermark are skipped outright; the rest are looked
+up in the store. A record without ``last_modified_t`` cannot be compared, so
+it is always treated as changed (and counted as `no_modified`). New products are appended to their partition; changed ones
+are appended too and their previous version is filtered out of the (few)
+files of the old partition that contain it, with the same journaled swap as
+`ingestion.compact`. Untouched partitions are never read or rewritten.
+
+Readers ignore ``_state`` (leading underscore), like ``_compact.json``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import posixpath
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from fe import schema
+from ingestion import compact
+from ingestion.layout import LayoutProfile
+
+STATE_FILE = "_state/fingerprints.npz"
+
+
+# ───────────────────────────── keys ──────────────────────────────────────────
+def code_keys(codes: pa.Array | pa.ChunkedArray) -> np.ndarray:
+    """Stable uint64 hash per barcode (pandas' keyed SipHash)."""
+    return pd.util.hash_array(np.asarray(codes.to_pylist(), dtype=object),
+                              categorize=False)
+
+
+def partition_names(batch: pa.RecordBatch | pa.Table) -> np.ndarray:
+    """``year=…/country=…`` per row (relative partition directory)."""
+    year, country = (pc.cast(batch[c], pa.string()) for c in ("year", "country"))
+    names = pc.binary_join_element_wise(
+        pc.binary_join_element_wise("year=", year, ""),
+        pc.binary_join_element_wise("country=", country, ""), "/")
+    return np.asarray(names.to_pylist(), dtype=object)
+
+
+def delta_id(input_path: str) -> str:
+    """Deterministic id of one input file version (re-runs reuse file names)."""
+    st = os.stat(input_path)
+    ident = f"{os.path.basename(input_path)}:{st.st_size}:{st.st_mtime}"
+    return hashlib.sha1(ident.encode("utf-8")).hexdigest()[:12]
+
+
+# ─────────────────────────── fingerprint store ───────────────────────────────
+@dataclass
+class FingerprintStore:
+    keys: np.ndarray = field(default_factory=lambda: np.empty(0, np.uint64))
+    modified: np.ndarray = field(default_factory=lambda: np.empty(0, np.int64))
+    part: np.ndarray = field(default_factory=lambda: np.empty(0, np.int32))
+    partitions: List[str] = field(default_factory=list)
+    watermark: int = -1
+    applied: List[str] = field(default_factory=list)    # delta ids already in
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def lookup(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """``(found, modified, part_id)`` for each key (-1 where not found)."""
+        if not len(self.keys):
+            miss = np.full(len(keys), -1)
+            return np.zeros(len(keys), bool), miss.astype(np.int64), miss.astype(np.int32)
+        pos = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = self.keys[pos] == keys
+        return (found,
+                np.where(found, self.modified[pos], -1),
+                np.where(found, self.part[pos], -1).astype(np.int32))
+
+    def part_ids(self, names: np.ndarray) -> np.ndarray:
+        uniq, inverse = np.unique(names, return_inverse=True)
+        index = {p: i for i, p in enumerate(self.partitions)}
+        ids = np.empty(len(uniq), np.int32)
+        for j, name in enumerate(uniq):
+            if name not in index:
+                index[name] = len(self.partitions)
+                self.partitions.append(name)
+            ids[j] = index[name]
+        return ids[inverse]
+
+    def upsert(self, keys: np.ndarray, modified: np.ndarray,
+               part_ids: np.ndarray) -> None:
+        """Insert / overwrite fingerprints (`keys` must be unique)."""
+        found, _, _ = self.lookup(keys)
+        if found.any():
+            pos = np.searchsorted(self.keys, keys[found])
+            self.modified[pos] = modified[found]
+            self.part[pos] = part_ids[found]
+        new = ~found
+        if new.any():
+            keys_ = np.concatenate([self.keys, keys[new]])
+            order = np.argsort(keys_, kind="stable")
+            self.keys = keys_[order]
+            self.modified = np.concatenate([self.modified, modified[new]])[order]
+            self.part = np.concatenate([self.part, part_ids[new]])[order]
+        if len(modified):
+            self.watermark = max(self.watermark, int(modified.max()))
+
+    # ------------------------------------------------------------ storage
+    def save(self, fs: pafs.FileSystem, base_dir: str) -> None:
+        """Write atomically (temp file + rename locally, single PUT on S3)."""
+        buf = io.BytesIO()
+        np.savez_compressed(buf, keys=self.keys, modified=self.modified,
+                            part=self.part,
+                            partitions=np.asarray(self.partitions, dtype=str),
+                            watermark=np.int64(self.watermark),
+                            applied=np.asarray(self.applied, dtype=str))
+        path = posixpath.join(base_dir, STATE_FILE)
+        fs.create_dir(posixpath.dirname(path))
+        local = isinstance(fs, pafs.LocalFileSystem)
+        tmp = f"{path}.tmp" if local else path
+        with fs.open_output_stream(tmp) as fh:
+            fh.write(buf.getvalue())
+        if tmp != path:
+            fs.move(tmp, path)
+
+    @classmethod
+    def load(cls, fs: pafs.FileSystem, base_dir: str) -> "FingerprintStore | None":
+        path = posixpath.join(base_dir, STATE_FILE)
+        if fs.get_file_info(path).type == pafs.FileType.NotFound:
+            return None
+        with fs.open_input_file(path) as fh:
+            z = np.load(io.BytesIO(fh.read()))
+            return cls(keys=z["keys"], modified=z["modified"], part=z["part"],
+                       partitions=[str(p) for p in z["partitions"]],
+                       watermark=int(z["watermark"]),
+                       applied=[str(a) for a in z["applied"]])
+
+
+# ─────────────────────────── change detection ────────────────────────────────
+@dataclass
+class DeltaStats:
+    seen: int = 0
+    below_watermark: int = 0
+    no_code: int = 0
+    no_modified: int = 0            # ingested: no last_modified_t to compare
+    unchanged: int = 0
+    new: int = 0
+    changed: int = 0
+
+    def summary(self) -> str:
+        return (f"{self.new:,} new + {self.changed:,} changed of "
+                f"{self.seen:,} products ({self.below_watermark:,} at/below "
+                f"watermark, {self.unchanged:,} unchanged, "
+                f"{self.no_code:,} without code, "
+                f"{self.no_modified:,} without last_modified_t)")
+
+
+def select_changed(store: FingerprintStore, batch: pa.RecordBatch,
+                   since: int,
+                   drops: Dict[str, List[np.ndarray]],
+                   stats: DeltaStats) -> pa.RecordBatch:
+    """Rows of `batch` that are new, newer than the store or undated, as
+    output rows.
+
+    `since` is the watermark at the start of the run. The store is updated in
+    place; keys whose previous version lives in an existing partition are
+    added to ``drops[partition]``. Assumes barcodes are unique within one dump
+    (duplicates inside a chunk keep the newest).
+    """
+    stats.seen += batch.num_rows
+    lm = batch[schema.MODIFIED_COL].fill_null(-1).to_numpy()
+    has_code = batch["code"].is_valid().to_numpy(zero_copy_only=False)
+    undated = batch[schema.MODIFIED_COL].is_null().to_numpy(zero_copy_only=False)
+    fresh = (lm > since) | undated
+    stats.no_code += int((~has_code).sum())
+    stats.no_modified += int((has_code & undated).sum())
+    stats.below_watermark += int((has_code & ~fresh).sum())
+    rows = np.flatnonzero(has_code & fresh)
+    if not len(rows):
+        return batch.slice(0, 0).drop_columns([schema.MODIFIED_COL])
+
+    keys = code_keys(batch["code"].take(pa.array(rows)))
+    order = np.lexsort((lm[rows], keys))                 # newest last per key
+    last = np.r_[keys[order][1:] != keys[order][:-1], True]
+    pick = np.sort(order[last])
+    rows, keys = rows[pick], keys[pick]
+
+    found, old_lm, old_part = store.lookup(keys)
+    changed = ~found | (lm[rows] > old_lm) | undated[rows]
+    stats.unchanged += int((~changed).sum())
+    stats.changed += int((found & changed).sum())
+    stats.new += int((~found & changed).sum())
+
+    for pid in np.unique(old_part[found & changed]):
+        sel = found & changed & (old_part == pid)
+        drops.setdefault(store.partitions[pid], []).append(keys[sel])
+
+    out = batch.take(pa.array(rows[changed]))
+    store.upsert(keys[changed], lm[rows][changed],
+                 store.part_ids(partition_names(out)))
+    return out.drop_columns([schema.MODIFIED_COL])
+
+
+# ─────────────────────────── partition rewrite ───────────────────────────────
+def remove_run_files(fs: pafs.FileSystem, base_dir: str, prefix: str) -> List[str]:
+    """Delete data files left behind by an interrupted run of the same input."""
+    stale = [
+        info.path
+        for info in fs.get_file_info(pafs.FileSelector(base_dir, recursive=True,
+                                                       allow_not_found=True))
+        if info.type == pafs.FileType.File and info.base_name.startswith(prefix)
+    ]
+    for path in stale:
+        fs.delete_file(path)
+    return stale
+
+
+def remove_superseded(fs: pafs.FileSystem, base_dir: str,
+                      drops: Dict[str, List[np.ndarray]], *,
+                      skip_prefix: str,
+                      row_group_rows: int = 1_000_000,
+                      compression: str = "snappy",
+                      layout: LayoutProfile | None = None) -> int:
+    """Filter the previous versions of changed products out of their files.
+
+    Only files of the affected partitions that actually contain one of the
+    dropped keys are rewritten (journaled swap). Files whose name starts with
+    `skip_prefix` (this run's new rows) are left alone. Returns the number of
+    files rewritten.
+    """
+    rewritten = 0
+    for rel, chunks in sorted(drops.items()):
+        part_dir = posixpath.join(base_dir, rel)
+        gone = np.unique(np.concatenate(chunks))
+        compact.replay_journal(fs, part_dir)
+        files = [f for f in fs.get_file_info(pafs.FileSelector(part_dir, allow_not_found=True))
+                 if compact._is_data_file(f) and not f.base_name.startswith(skip_prefix)]
+
+        def keep(batch: pa.RecordBatch) -> pa.Array:
+            return pa.array(~np.isin(code_keys(batch["code"]), gone))
+
+        run = uuid.uuid4().hex[:12]
+        moves: Dict[str, str] = {}
+        replaced: List[str] = []
+        for i, f in enumerate(files):
+            with fs.open_input_file(f.path) as fh:
+                pf = pq.ParquetFile(fh)
+                if "code" not in pf.schema_arrow.names:
+                    continue
+                hit = np.isin(code_keys(pf.read(columns=["code"])["code"]), gone)
+            if not hit.any():
+                continue
+            replaced.append(f.path)
+            if not hit.all():
+                tmp = f"{part_dir}/_tmp-{run}-{i:05d}.parquet"
+                compact.merge_files(fs, [f.path], tmp, row_group_rows,
+                                    compression, keep=keep, layout=layout)
+                moves[tmp] = f"{part_dir}/part-r{run}-{i:05d}.parquet"
+        if replaced:
+            compact._write_journal(fs, part_dir, {"moves": moves,
+                                                  "replaced": replaced})
+            compact.replay_journal(fs, part_dir)
+            rewritten += len(replaced)
+    return rewritten
+
+
+__all__ = ["STATE_FILE", "FingerprintStore", "DeltaStats", "code_keys",
+           "partition_names", "delta_id", "select_changed", "remove_run_files",
+           "remove_superseded"]
@@ -3,22 +3,35 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
+import functools
 import gzip
 import itertools
-import json
 import pathlib
+import posixpath
 import time
-from typing import Any, Dict
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import (Any, Callable, Deque, Dict, Iterable, Iterator,
+                    Sequence, TypeVar)
 
 import boto3
 import pandas as pd
-import awswrangler as wr
+import pyarrow as pa
+import pyarrow.fs as pafs
 from tqdm import tqdm
 
-from fe import schema  # KEEP_COLS, DTYPES, extract_columns, make_partition_values
+from fe import schema  # KEEP_COLS, DTYPES, extract_columns, partition_columns
+from fe import coercion, decode
+from ingestion import (arrow_engine, checkpoint, compact, footers, gzindex,
+                       incremental, layout as layouts, manifest, storage)
+from ingestion.metrics import DISABLED, Metrics, measured
+from ingestion.writer import MiB, PartitionWriter
+
+T = TypeVar("T")
+L = TypeVar("L", str, bytes)
 
 RAW_PREFIX = "raw/"
-PROC_PREFIX = "processed/"
 
 
 # ────────────────────────────── 1 · CLI ────────────────────────────────────
@@ -34,6 +47,53 @@ def parse_args() -> argparse.Namespace:
                    help="AWS named profile (optional)")
     p.add_argument("--chunk-rows",   type=int, default=50_000,
                    help="rows per chunk (RAM trade-off)")
+    p.add_argument("--workers",      type=int, default=1,
+                   help="processes for parse/flatten/cast (1 = in-process)")
+    p.add_argument("--max-inflight", type=int, default=None,
+                   help="max chunks queued in the worker pool (default 2×workers)")
+    p.add_argument("--decoder",      default="auto", choices=decode.BACKENDS,
+                   help="JSON decoder (auto = fastest projecting backend)")
+    p.add_argument("--engine",       default="pandas", choices=("pandas", "arrow"),
+                   help="chunk engine: pandas or Arrow-native (the proc "
+                        "bucket may also be a local directory)")
+    p.add_argument("--writer",       default="append", choices=("append", "buffered"),
+                   help="append = files per chunk; buffered = per-partition "
+                        "buffers flushed as right-sized files")
+    p.add_argument("--target-file-mb", type=int, default=128,
+                   help="buffered writer: target Parquet file size")
+    p.add_argument("--target-file-rows", type=int, default=1_000_000,
+                   help="buffered writer: max rows per file")
+    p.add_argument("--max-buffer-mb", type=int, default=1024,
+                   help="buffered writer: cap on buffered data before early flushes")
+    p.add_argument("--checkpoint",   default=None,
+                   help="checkpoint manifest path or s3:// URI "
+                        "(default <input>.ckpt.json)")
+    p.add_argument("--resume",       action="store_true",
+                   help="continue after the last committed chunk of the checkpoint")
+    p.add_argument("--checkpoint-every", type=int, default=None,
+                   help="chunks per commit (default 1; 20 with --writer buffered)")
+    p.add_argument("--gz-index",     action="store_true",
+                   help="use (or build) the cached gzip index so workers "
+                        "decompress their own byte ranges (needs indexed_gzip)")
+    p.add_argument("--gz-index-spacing-mb", type=int, default=64,
+                   help="uncompressed MiB per range when building the index")
+    p.add_argument("--metrics-json", default=None,
+                   help="write a per-stage JSON run report to this path")
+    p.add_argument("--metrics-emf",  default=None,
+                   help="append CloudWatch EMF metric lines to this path "
+                        "('-' for stdout)")
+    p.add_argument("--trace-alloc",  action="store_true",
+                   help="also count Python heap allocations (tracemalloc, slow)")
+    p.add_argument("--incremental",  action="store_true",
+                   help="only ingest new / changed products (watermark + "
+                        "fingerprint store under processed/_state/); always "
+                        "uses the arrow engine and buffered writer")
+    p.add_argument("--categorical",  action="store_true",
+                   help="dictionary-encode low-cardinality text, tag entries "
+                        "and year / country (pandas category / Arrow dictionary)")
+    p.add_argument("--layout",       default="default", choices=list(layouts.PROFILES),
+                   help="Parquet layout profile: codec, row groups, in-file "
+                        "sort, page index, Bloom filters (see ingestion.layout)")
     return p.parse_args()
 
 
@@ -51,104 +111,438 @@ def upload_raw(local: str | pathlib.Path, bucket: str, s3c: boto3.client) -> str
     return key
 
 
-def write_parquet(df: pd.DataFrame, bucket: str, session: boto3.Session) -> None:
-    wr.s3.to_parquet(
-        df,
-        path=f"s3://{bucket}/{PROC_PREFIX}",
-        dataset=True,
-        partition_cols=["year", "country"],
-        mode="append",
-        compression="snappy",
-        boto3_session=session,
-    )
+def write_parquet(df: pd.DataFrame, fs: pafs.FileSystem, base_dir: str,
+                  run_id: str,
+                  layout: str | layouts.LayoutProfile | None = None) -> list[str]:
+    """Append one chunk frame: a file per partition it touches, named
+    ``part-<run_id>-<seq>.parquet``.
+
+    Goes through `PartitionWriter` rather than awswrangler, which shares one
+    ``pyarrow_additional_kwargs`` dict across a call's files and pops
+    ``write_table_args`` after the first, so the layout's row-group size
+    would only reach one partition.
+    """
+    with PartitionWriter(fs, base_dir, run_id=run_id, layout=layout) as pw:
+        pw.write(df)
+    return [f.path for f in pw.files]
+
+
+# ─────────────────────── 3 · Chunk processing ──────────────────────────────
+def frame_from_lines(lines: Sequence[str | bytes],
+                     decoder: str = "auto",
+                     metrics: Metrics = DISABLED,
+                     categorical: bool = False) -> pd.DataFrame:
+    """Parse, flatten and cast one batch of JSONL lines into a typed frame.
+
+    Module-level (and free of shared state) so it can run in a worker process.
+    """
+    n = len(lines)
+    # ---------- flatten JSON → DataFrame ---------------------------------
+    with metrics.stage("decode", rows=n):
+        recs: Iterator[Dict[str, Any]] = map(decode.cached_decoder(decoder), lines)
+        df = pd.DataFrame.from_records(recs)
+
+    # ---------- add partition columns ------------------------------------
+    with metrics.stage("partition", rows=n):
+        df["year"], df["country"] = schema.partition_columns(
+            df["created_t"], df["countries_tags"])
+    with metrics.stage("cast", rows=n):
+        return cast_frame(df, categorical, metrics)
+
+
+def cast_frame(df: pd.DataFrame, categorical: bool = False,
+               metrics: Metrics = DISABLED) -> pd.DataFrame:
+    """Cast a frame of flat records (with year / country) to the output dtypes.
+
+    Runs the compiled `fe.coercion` plan (one vectorised kernel per column);
+    values that fail to coerce are counted as ``coerce_failures:<column>``
+    in `metrics`. `categorical` turns CATEGORICAL_COLS and year / country
+    into ``category`` (tag lists stay Python lists here; they are
+    dictionary-encoded when the frame is converted to Arrow).
+    """
+    failures: Dict[str, int] = {}
+    df = coercion.compile_plan(categorical).apply(df, failures)
+    for col, n in failures.items():
+        metrics.count(f"coerce_failures:{col}", n)
+    return df
+
+
+def iter_line_batches(fh: Iterable[L], chunk_rows: int) -> Iterator[list[L]]:
+    """Yield successive lists of at most `chunk_rows` lines from `fh`."""
+    while True:
+        lines = list(itertools.islice(fh, chunk_rows))
+        if not lines:
+            return
+        yield lines
+
+
+def _ordered_map(fn: Callable[[Any], T],
+                 items: Iterable[Any],
+                 workers: int = 1,
+                 max_inflight: int | None = None) -> Iterator[T]:
+    """map(fn, items) in input order, optionally across a process pool.
+
+    At most `max_inflight` items (default 2 × workers) are queued or being
+    processed at any time, so memory stays bounded regardless of input size.
+    """
+    if workers <= 1:
+        yield from map(fn, items)
+        return
+
+    max_inflight = max(max_inflight or 2 * workers, 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Deque[Future] = deque()
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= max_inflight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _sized(process: Callable[[list[L]], T], lines: list[L]) -> tuple[int, int, T]:
+    return len(lines), sum(map(len, lines)), process(lines)
+
+
+def _sized_range(process: Callable[[list[bytes]], T],
+                 index: gzindex.GzipIndex,
+                 rng: tuple[int, int]) -> tuple[int, int, T]:
+    lines = gzindex.read_range(index, *rng)
+    return len(lines), rng[1] - rng[0], process(lines)
+
+
+def iter_chunks(fh: Iterable[L],
+                chunk_rows: int,
+                process: Callable[[list[L]], T],
+                workers: int = 1,
+                max_inflight: int | None = None,
+                metrics: Metrics = DISABLED) -> Iterator[tuple[int, int, T]]:
+    """Yield ``(n_lines, n_bytes, process(lines))`` per line batch, in order.
+
+    `n_bytes` is the size of the raw lines (uncompressed input bytes when
+    `fh` is opened in binary mode), used for byte-offset checkpoints.
+
+    With `workers > 1` the parse/flatten/cast stage runs in a process pool
+    while this process keeps reading (decompressing) the input; at most
+    `max_inflight` batches (~chunk_rows rows each) are in flight.
+    """
+    batches = metrics.timed_iter("decompress", iter_line_batches(fh, chunk_rows),
+                                 size=lambda b: (len(b), sum(map(len, b))))
+    return _ordered_map(functools.partial(_sized, process),
+                        batches, workers, max_inflight)
+
+
+def iter_range_chunks(index: gzindex.GzipIndex,
+                      process: Callable[[list[bytes]], T],
+                      start: int = 0,
+                      workers: int = 1,
+                      max_inflight: int | None = None) -> Iterator[tuple[int, int, T]]:
+    """Like `iter_chunks`, but each worker decompresses its own line-aligned
+    byte range of the input through the gzip index (one chunk per range),
+    so decompression is parallel too."""
+    return _ordered_map(functools.partial(_sized_range, process, index),
+                        index.ranges(start), workers, max_inflight)
 
 
-# ─────────────────────── 3 · Main streaming loop ───────────────────────────
+def iter_frames(fh: Iterable[L],
+                chunk_rows: int,
+                workers: int = 1,
+                max_inflight: int | None = None,
+                decoder: str = "auto") -> Iterator[pd.DataFrame]:
+    """Typed pandas chunk frames (pandas engine)."""
+    process = functools.partial(frame_from_lines, decoder=decoder)
+    for *_, df in iter_chunks(fh, chunk_rows, process, workers, max_inflight):
+        yield df
+
+
+def iter_batches(fh: Iterable[L],
+                 chunk_rows: int,
+                 workers: int = 1,
+                 max_inflight: int | None = None,
+                 decoder: str = "auto") -> Iterator[pa.RecordBatch]:
+    """Typed Arrow record batches (arrow engine, no pandas)."""
+    process = functools.partial(arrow_engine.batch_from_lines, decoder=decoder)
+    for *_, batch in iter_chunks(fh, chunk_rows, process, workers, max_inflight):
+        yield batch
+
+
+# ─────────────────────── 4 · Main streaming loop ───────────────────────────
 def stream_ingest(local_path: str,
                   raw_bucket: str,
                   proc_bucket: str,
                   session: boto3.Session,
-                  chunk_rows: int) -> None:
+                  chunk_rows: int,
+                  workers: int = 1,
+                  max_inflight: int | None = None,
+                  decoder: str = "auto",
+                  engine: str = "pandas",
+                  writer: str = "append",
+                  target_file_mb: int = 128,
+                  target_file_rows: int = 1_000_000,
+                  max_buffer_mb: int = 1024,
+                  checkpoint_path: str | None = None,
+                  resume: bool = False,
+                  checkpoint_every: int | None = None,
+                  gz_index: bool = False,
+                  gz_index_spacing_mb: int = 64,
+                  metrics: Metrics = DISABLED,
+                  categorical: bool = False,
+                  layout: str = "default") -> None:
 
     s3c = session.client("s3")
     # Uncomment if you want to archive the raw file
     # upload_raw(local_path, raw_bucket, s3c)
 
+    # ---------- checkpoint / resume ------------------------------------------
+    ckpt_path = checkpoint_path or checkpoint.default_path(local_path)
+    ckpt = checkpoint.Checkpoint.load(ckpt_path, session) if resume else None
+    target = functools.lru_cache(maxsize=None)(
+        lambda: storage.resolve(storage.processed_uri(proc_bucket), session))
+
+    if ckpt is not None:
+        if not ckpt.matches(local_path):
+            raise SystemExit(f"{ckpt_path} was written for a different "
+                             f"version of {ckpt.input}; refusing to resume")
+        if ckpt.complete:
+            print(f"✔ Nothing to do – {ckpt_path} marks this input complete")
+            return
+        orphans = checkpoint.remove_orphans(*target(), ckpt)
+        print(f"→ Resuming run {ckpt.run_id} at line {ckpt.lines:,} "
+              f"(removed {len(orphans)} uncommitted files)")
+    else:
+        ckpt = checkpoint.Checkpoint.start(local_path)
+    every = checkpoint_every or (20 if writer == "buffered" else 1)
+
+    # ---------- chunk engine & writer -----------------------------------------
+    process = functools.partial(
+        arrow_engine.batch_from_lines if engine == "arrow" else frame_from_lines,
+        decoder=decoder, categorical=categorical)
+    if metrics.enabled:               # per-stage stats come back with each chunk
+        process = functools.partial(measured, process)
+    buffered: PartitionWriter | None = None
+
+    if writer == "buffered":
+        write_name = "partition_writer"
+        buffered = PartitionWriter(*target(),
+                                   target_rows=target_file_rows,
+                                   target_bytes=target_file_mb * MiB,
+                                   max_buffer_bytes=max_buffer_mb * MiB,
+                                   run_id=ckpt.run_id,
+                                   first_seq=ckpt.writer_seq,
+                                   layout=layout)
+
+        def write(chunk: pa.RecordBatch | pd.DataFrame, chunk_no: int) -> list[str]:
+            buffered.write(chunk)
+            return []
+    elif engine == "arrow":
+        write_name = "write_batch"
+
+        def write(batch: pa.RecordBatch, chunk_no: int) -> list[str]:
+            return arrow_engine.write_batch(
+                batch, *target(),
+                basename=f"{ckpt.prefix}{chunk_no:06d}-{{i}}.parquet",
+                layout=layout)
+    else:
+        write_name = "write_parquet"
+
+        def write(df: pd.DataFrame, chunk_no: int) -> list[str]:
+            return write_parquet(df, *target(),
+                                 run_id=f"{ckpt.run_id}-{chunk_no:06d}",
+                                 layout=layout)
+
+    # ---------- commit = flush buffers, then persist the checkpoint ----------
+    flushed = 0
+
+    def commit(complete: bool = False) -> None:
+        nonlocal flushed
+        with metrics.stage("commit"):
+            if buffered is not None:
+                buffered.flush()
+                ckpt.files += [f.path for f in buffered.files[flushed:]]
+                flushed = len(buffered.files)
+                ckpt.writer_seq = buffered.next_seq
+            ckpt.complete = complete
+            ckpt.save(ckpt_path, session)
+
     start, rows_written = time.time(), 0
 
-    with gzip.open(local_path, "rt", encoding="utf-8") as fh, tqdm(unit="rows") as bar:
-        while True:
-            lines = list(itertools.islice(fh, chunk_rows))
-            if not lines:
-                break
-
-            # ---------- flatten JSON → DataFrame ---------------------------------
-            recs: list[Dict[str, Any]] = (
-                schema.extract_columns(json.loads(l)) for l in lines)
-            df = pd.DataFrame.from_records(recs)
-
-            # ---------- add partition columns ------------------------------------
-            parts = df.apply(schema.make_partition_values,
-                             axis=1, result_type="expand")
-            df["year"], df["country"] = parts["year"], parts["country"]
-
-            # ---------- 1 · Float nutrient columns --------------------------------
-            float_cols = [
-                "energy_100g", "energy-kcal_100g", "fat_100g", "saturated-fat_100g",
-                "carbohydrates_100g", "sugars_100g", "fiber_100g",
-                "proteins_100g", "sodium_100g",
-            ]
-            df[float_cols] = df[float_cols].apply(
-                lambda s: pd.to_numeric(s, errors="coerce").astype("float32")
-            )
-
-            # ---------- 2 · Tag arrays → list[string] ----------------------------
-            tag_cols = ["categories_tags", "brands_tags", "countries_tags"]
-
-            def _to_str_list(x: Any) -> list[str]:
-                if isinstance(x, list):
-                    return [str(i) for i in x if pd.notna(i)]
-                if pd.isna(x) or x in ("", None):
-                    return []
-                return [str(x)]
-
-            for col in tag_cols:
-                df[col] = df[col].apply(_to_str_list)
-
-            # ---------- 3 · Misc strings & timestamp -----------------------------
-            df["main_category"] = df["main_category"].astype(
-                "string").replace("", pd.NA)
-            df["serving_size"] = df["serving_size"].astype(
-                "string").replace("", pd.NA)
-            df["nutrition_grade_fr"] = df["nutrition_grade_fr"].astype(
-                "string").replace("", pd.NA)
-            df["created_t"] = pd.to_numeric(
-                df["created_t"], errors="coerce").round().astype("Int64")
-
-            # ---------- 5 · Final column order & cast ----------------------------
-            # drop extras / keep order
-            df = df[schema.KEEP_COLS + ["year", "country"]]
-            # enforce final dtypes
-            df = df.astype(schema.DTYPES, errors="ignore")
+    with contextlib.ExitStack() as stack:
+        bar = stack.enter_context(tqdm(unit="rows", initial=ckpt.rows))
+        if gz_index:
+            index = gzindex.load_or_build(local_path, gz_index_spacing_mb * MiB)
+            chunks = iter_range_chunks(index, process, ckpt.offset,
+                                       workers, max_inflight)
+        else:
+            fh = stack.enter_context(gzip.open(local_path, "rb"))
+            if ckpt.offset:
+                fh.seek(ckpt.offset)       # decompress-and-discard, no parsing
+            chunks = iter_chunks(fh, chunk_rows, process, workers, max_inflight,
+                                 metrics)
 
+        for n_lines, n_bytes, chunk in chunks:
+            if metrics.enabled:
+                chunk, snap = chunk
+                metrics.merge(snap)
             # ---------- 6 · Write chunk ------------------------------------------
-            write_parquet(df, proc_bucket, session)
-            rows_written += len(df)
-            bar.update(len(df))
+            with metrics.stage("write", rows=len(chunk), nbytes=n_bytes):
+                t0 = time.perf_counter()
+                ckpt.files += write(chunk, ckpt.chunks)
+                metrics.latency(write_name, time.perf_counter() - t0)
+            ckpt.chunks += 1
+            ckpt.lines += n_lines
+            ckpt.offset += n_bytes
+            ckpt.rows += len(chunk)
+            rows_written += len(chunk)
+            bar.update(len(chunk))
+            if ckpt.chunks % every == 0:
+                commit()
+    commit(complete=True)
+
+    # ---------- dataset manifest (_manifest.json) ------------------------------
+    with metrics.stage("manifest"):
+        metas = {f.path: (f.bytes, f.metadata) for f in
+                 (buffered.files if buffered is not None else [])
+                 if f.metadata is not None}
+        manifest.record_written(storage.processed_uri(proc_bucket), session,
+                                ckpt.files, metas)
+
+    if buffered is not None:
+        print(f"✔ Wrote {buffered.stats.summary()}")
 
     mins = (time.time() - start) / 60
     print(f"✔ Ingested {rows_written:,} rows in {mins:.1f} min "
           f"({rows_written/(mins*60):,.0f} rows/s)")
 
 
-# ───────────────────────── 4 · Entry point ─────────────────────────────────
+# ─────────────────────── 5 · Incremental (delta) ingest ─────────────────────
+def delta_ingest(local_path: str,
+                 proc_bucket: str,
+                 session: boto3.Session | None,
+                 chunk_rows: int,
+                 workers: int = 1,
+                 max_inflight: int | None = None,
+                 decoder: str = "auto",
+                 target_file_mb: int = 128,
+                 target_file_rows: int = 1_000_000,
+                 max_buffer_mb: int = 1024,
+                 categorical: bool = False,
+                 layout: str = "default") -> incremental.DeltaStats:
+    """Ingest only new / changed products of a full dump or daily delta.
+
+    Uses the watermark + fingerprint store under ``processed/_state/`` (see
+    `ingestion.incremental`). New rows go through the buffered partition
+    writer as ``part-d<delta_id>-…`` files; previous versions of changed
+    products are then filtered out of the affected partitions, and the store
+    is saved last. Re-running the same input after a crash is safe: the
+    run's files are recreated under the same names and filtering is
+    idempotent; an input that was already applied is skipped.
+
+    Bootstrap by running it once with the full dump against an empty prefix.
+    """
+    fs, base_dir = storage.resolve(storage.processed_uri(proc_bucket), session)
+    store = incremental.FingerprintStore.load(fs, base_dir)
+    if store is None:
+        if compact.list_partitions(fs, base_dir):
+            raise SystemExit(f"{base_dir} holds data but no "
+                             f"{incremental.STATE_FILE}; bootstrap incremental "
+                             f"mode with a full dump into an empty prefix")
+        store = incremental.FingerprintStore()
+
+    stats = incremental.DeltaStats()
+    run = f"d{incremental.delta_id(local_path)}"
+    if run in store.applied:
+        print(f"✔ Nothing to do – {local_path} was already applied")
+        return stats
+    incremental.remove_run_files(fs, base_dir, f"part-{run}-")
+
+    process = functools.partial(arrow_engine.batch_from_lines, decoder=decoder,
+                                extra=[schema.MODIFIED_COL], categorical=categorical)
+    since, drops = store.watermark, {}
+    start = time.time()
+
+    with PartitionWriter(fs, base_dir,
+                         target_rows=target_file_rows,
+                         target_bytes=target_file_mb * MiB,
+                         max_buffer_bytes=max_buffer_mb * MiB,
+                         run_id=run,
+                         layout=layout) as out, \
+            gzip.open(local_path, "rb") as fh, tqdm(unit="rows") as bar:
+        for *_, batch in iter_chunks(fh, chunk_rows, process, workers, max_inflight):
+            out.write(incremental.select_changed(store, batch, since, drops, stats))
+            bar.update(batch.num_rows)
+
+    rewritten = incremental.remove_superseded(fs, base_dir, drops,
+                                              skip_prefix=f"part-{run}-",
+                                              layout=layouts.get(layout))
+    uri = storage.processed_uri(proc_bucket)
+    m = manifest.DatasetManifest.load(uri, session)
+    if m.entries or since < 0:      # update an existing one; create it on a first run
+        written = [f.path for f in out.files] if m.entries else \
+            [path for path, _, _ in footers.list_data_files(uri, session)]
+        m.add(written,
+              {f.path: (f.bytes, f.metadata) for f in out.files if f.metadata})
+        m.sync_partitions(posixpath.join(base_dir, rel) for rel in drops)
+        m.save()
+    store.applied.append(run)
+    store.save(fs, base_dir)
+
+    mins = (time.time() - start) / 60
+    print(f"✔ Delta: {stats.summary()}")
+    print(f"✔ Rewrote {rewritten:,} files in {len(drops):,} partitions; "
+          f"{len(store):,} products tracked, watermark {store.watermark} "
+          f"({mins:.1f} min)")
+    return stats
+
+
+# ───────────────────────── 6 · Entry point ─────────────────────────────────
 if __name__ == "__main__":
     args = parse_args()
     sess = boto_session(args.profile)
-    stream_ingest(
-        local_path=args.input,
-        raw_bucket=args.raw_bucket,
-        proc_bucket=args.proc_bucket,
-        session=sess,
-        chunk_rows=args.chunk_rows,
-    )
+    if args.incremental:
+        delta_ingest(
+            local_path=args.input,
+            proc_bucket=args.proc_bucket,
+            session=sess,
+            chunk_rows=args.chunk_rows,
+            workers=args.workers,
+            max_inflight=args.max_inflight,
+            decoder=args.decoder,
+            target_file_mb=args.target_file_mb,
+            target_file_rows=args.target_file_rows,
+            max_buffer_mb=args.max_buffer_mb,
+            categorical=args.categorical,
+            layout=args.layout,
+        )
+    else:
+        metrics = (Metrics(trace_alloc=args.trace_alloc)
+                   if args.metrics_json or args.metrics_emf else DISABLED)
+        stream_ingest(
+            local_path=args.input,
+            raw_bucket=args.raw_bucket,
+            proc_bucket=args.proc_bucket,
+            session=sess,
+            chunk_rows=args.chunk_rows,
+            workers=args.workers,
+            max_inflight=args.max_inflight,
+            decoder=args.decoder,
+            engine=args.engine,
+            writer=args.writer,
+            target_file_mb=args.target_file_mb,
+            target_file_rows=args.target_file_rows,
+            max_buffer_mb=args.max_buffer_mb,
+            checkpoint_path=args.checkpoint,
+            resume=args.resume,
+            checkpoint_every=args.checkpoint_every,
+            gz_index=args.gz_index,
+            gz_index_spacing_mb=args.gz_index_spacing_mb,
+            metrics=metrics,
+            categorical=args.categorical,
+            layout=args.layout,
+        )
+        meta = {"job": "ingest", "input": args.input, "engine": args.engine,
+                "writer": args.writer, "workers": args.workers,
+                "layout": args.layout}
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json, **meta)
+        if args.metrics_emf:
+            metrics.write_emf(args.metrics_emf, Job="ingest", Engine=args.engine)
@@ -0,0 +1,251 @@
+"""
+Named Parquet layout profiles for the processed dataset.
+
+A profile fixes how a file is laid out: codec and level, row-group size, an
+in-file sort order (so row-group min / max statistics prune predicates on the
+sort keys), page-index emission and Bloom filters on high-cardinality keys.
+Every writer takes one (`PartitionWriter`, `arrow_engine.write_batch`,
+`ingest_nutrisage.write_parquet`, `compact`); the CLI flag is ``--layout``.
+
+  default   snappy, pyarrow row groups, input order (previous behaviour)
+  scan      zstd-3, 128k-row groups sorted by category / grade, page index,
+            Bloom filter on `code` – selective training / Athena scans
+  archive   zstd-9, 1M-row groups, sorted – smallest files
+  lookup    snappy, 64k-row groups sorted by `code`, page index, Bloom
+            filter on `code` – point lookups by barcode
+
+Sorting happens per written file (and per row group when compacting), never
+across files. `arrow_engine.write_batch` goes through `pyarrow.dataset`,
+which cannot write Bloom filters; the other writers do. The filters serve
+Athena / Spark readers; pyarrow's own scanner prunes on min / max only.
+
+  python -m ingestion.layout --rows 200000 --out reports/bench/layout.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+MiB = 1 << 20
+
+
+@dataclass(frozen=True)
+class LayoutProfile:
+    name: str
+    compression: str = "snappy"
+    compression_level: int | None = None
+    row_group_rows: int | None = None          # None = pyarrow default (1Mi)
+    sort_by: Tuple[str, ...] = ()
+    page_index: bool = False
+    bloom_filters: Tuple[str, ...] = ()
+    bloom_fpp: float = 0.05
+
+    # ------------------------------------------------------------- sorting
+    def sort(self, table: pa.Table) -> pa.Table:
+        """`table` ordered by the profile's sort keys present in it (nulls last)."""
+        keys = [c for c in self.sort_by if c in table.column_names]
+        if not keys or table.num_rows < 2:
+            return table
+        # dictionary columns (--categorical) sort by value, not by index
+        plain = pa.table({c: pc.cast(table[c], table[c].type.value_type)
+                          if pa.types.is_dictionary(table[c].type) else table[c]
+                          for c in keys})
+        idx = pc.sort_indices(plain, sort_keys=[(c, "ascending", "at_end")
+                                                for c in keys])
+        return table.take(idx)
+
+    def sorting_columns(self, schema: pa.Schema) -> List[pq.SortingColumn] | None:
+        keys = [c for c in self.sort_by if c in schema.names]
+        if not keys:
+            return None
+        return [pq.SortingColumn(schema.get_field_index(c), nulls_first=False)
+                for c in keys]
+
+    # ------------------------------------------------------- writer options
+    def writer_options(self, schema: pa.Schema, num_rows: int | None = None,
+                       bloom: bool = True) -> Dict[str, Any]:
+        """Keyword arguments for `pq.ParquetWriter` (`pq.write_table` minus
+        ``row_group_size``). `num_rows` sizes the Bloom filters."""
+        opts: Dict[str, Any] = {"compression": self.compression}
+        if self.compression_level is not None:
+            opts["compression_level"] = self.compression_level
+        if self.page_index:
+            opts["write_page_index"] = True
+        sorting = self.sorting_columns(schema)
+        if sorting:
+            opts["sorting_columns"] = sorting
+        blooms = [c for c in self.bloom_filters if c in schema.names]
+        if bloom and blooms:
+            ndv = max(num_rows or 1_048_576, 1)
+            opts["bloom_filter_options"] = {
+                c: {"ndv": ndv, "fpp": self.bloom_fpp} for c in blooms}
+        return opts
+
+    def dataset_options(self, schema: pa.Schema) -> Dict[str, Any]:
+        """``file_options`` / row-group arguments for `ds.write_dataset`."""
+        opts = self.writer_options(schema, bloom=False)
+        out: Dict[str, Any] = {
+            "file_options": ds.ParquetFileFormat().make_write_options(**opts)}
+        if self.row_group_rows:
+            out["max_rows_per_group"] = self.row_group_rows
+            out["min_rows_per_group"] = self.row_group_rows
+        return out
+
+    def write_table(self, table: pa.Table, where: Any,
+                    metadata_collector: List[pq.FileMetaData] | None = None) -> None:
+        """Sort `table` and write it as one Parquet file."""
+        table = self.sort(table)
+        pq.write_table(table, where, row_group_size=self.row_group_rows,
+                       metadata_collector=metadata_collector,
+                       **self.writer_options(table.schema, table.num_rows))
+
+
+_CATEGORY_SORT = ("main_category", "nutrition_grade_fr")
+
+PROFILES: Dict[str, LayoutProfile] = {p.name: p for p in [
+    LayoutProfile("default"),
+    LayoutProfile("scan", compression="zstd", compression_level=3,
+                  row_group_rows=128_000, sort_by=_CATEGORY_SORT,
+                  page_index=True, bloom_filters=("code",)),
+    LayoutProfile("archive", compression="zstd", compression_level=9,
+                  row_group_rows=1_000_000, sort_by=_CATEGORY_SORT),
+    LayoutProfile("lookup", row_group_rows=65_536, sort_by=("code",),
+                  page_index=True, bloom_filters=("code",), bloom_fpp=0.01),
+]}
+DEFAULT = PROFILES["default"]
+
+
+def get(name: str | LayoutProfile | None) -> LayoutProfile:
+    """Profile by name (None → default)."""
+    if isinstance(name, LayoutProfile):
+        return name
+    try:
+        return PROFILES[name or "default"]
+    except KeyError:
+        raise ValueError(f"unknown layout profile {name!r}; "
+                         f"choose from {', '.join(PROFILES)}") from None
+
+
+# ──────────────────────────── benchmark ──────────────────────────────────────
+@dataclass
+class LayoutResult:
+    profile: str
+    rows: int
+    files: int
+    row_groups: int
+    mib: float
+    write_rows_per_s: float
+    scans: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+
+def _predicates(table: pa.Table) -> Dict[str, ds.Expression]:
+    """Selective filters on the sort keys and `code`, taken from the data."""
+    codes = table["code"].drop_null()
+    counts = pc.value_counts(table["main_category"].drop_null())
+    category = counts.field("values")[0].as_py()
+    return {
+        "grade == 'a'": ds.field("nutrition_grade_fr") == "a",
+        f"main_category == {category!r}": ds.field("main_category") == category,
+        "code == <one>": ds.field("code") == codes[len(codes) // 2].as_py(),
+    }
+
+
+def _time(fn, repeat: int) -> Tuple[float, Any]:
+    best, out = float("inf"), None
+    for _ in range(max(repeat, 1)):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def bench(table: pa.Table, profiles: Sequence[str] = tuple(PROFILES),
+          repeat: int = 3, file_rows: int = 1_000_000) -> List[LayoutResult]:
+    """Write `table` as files of `file_rows` rows with every profile; report
+    size, write throughput and, per predicate, scan time and the row groups
+    left after min / max statistics pruning (Bloom filters are not consulted
+    by the pyarrow scanner, so they do not show here)."""
+    table = table.drop_columns([c for c in ("year", "country")
+                                if c in table.column_names])
+    preds = _predicates(table)
+    out: List[LayoutResult] = []
+    with tempfile.TemporaryDirectory(prefix="nutrisage-layout-") as tmp:
+        for name in profiles:
+            prof = get(name)
+            root = os.path.join(tmp, prof.name)
+
+            def write() -> None:
+                shutil.rmtree(root, ignore_errors=True)
+                os.makedirs(root)
+                for i in range(0, table.num_rows, file_rows):
+                    prof.write_table(table.slice(i, file_rows),
+                                     os.path.join(root, f"part-{i:09d}.parquet"))
+
+            secs, _ = _time(write, repeat)
+            dset = ds.dataset(root, format="parquet")
+            frags = list(dset.get_fragments())
+            res = LayoutResult(
+                profile=prof.name, rows=table.num_rows, files=len(frags),
+                row_groups=sum(f.metadata.num_row_groups for f in frags),
+                mib=round(sum(os.path.getsize(f.path) for f in frags) / MiB, 3),
+                write_rows_per_s=round(table.num_rows / secs, 1))
+            for label, expr in preds.items():
+                t, hit = _time(lambda: dset.to_table(filter=expr), repeat)
+                groups = sum(len(f.split_by_row_group(expr))
+                             for f in dset.get_fragments(filter=expr))
+                res.scans[label] = {"ms": round(t * 1000, 2), "rows": hit.num_rows,
+                                    "row_groups": groups}
+            out.append(res)
+    return out
+
+
+def main(argv: list[str] | None = None) -> None:
+    from ingestion import arrow_engine, synthetic
+
+    p = argparse.ArgumentParser(description="Parquet layout profile benchmark")
+    p.add_argument("--rows", type=int, default=300_000, help="synthetic rows")
+    p.add_argument("--file-rows", type=int, default=1_000_000,
+                   help="rows per written file")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--profiles", nargs="+", default=list(PROFILES),
+                   choices=list(PROFILES))
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--out", help="write the JSON report here")
+    args = p.parse_args(argv)
+
+    table = pa.Table.from_batches([arrow_engine.batch_from_lines(
+        list(synthetic.iter_lines(args.rows, args.seed)))])
+    results = bench(table, args.profiles, args.repeat, args.file_rows)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump({"rows": args.rows, "seed": args.seed,
+                       "results": [asdict(r) for r in results]}, fh, indent=2)
+
+    for r in results:
+        print(f"  {r.profile:<8} {r.mib:>9,.2f} MiB  {r.row_groups:>5,} RGs  "
+              f"{r.write_rows_per_s:>12,.0f} rows/s written", file=sys.stderr)
+        for label, s in r.scans.items():
+            print(f"           {label:<40} {s['ms']:>9,.1f} ms  "
+                  f"{s['rows']:>8,} rows  {s['row_groups']:>4,} RGs after min/max",
+                  file=sys.stderr)
+
+
+__all__ = ["LayoutProfile", "PROFILES", "DEFAULT", "get", "LayoutResult", "bench"]
+
+
+if __name__ == "__main__":
+    main()
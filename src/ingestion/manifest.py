@@ -0,0 +1,274 @@
+"""
+Dataset manifest written at ingest time: ``<dataset>/_manifest.json``.
+
+One entry per data file: path relative to the dataset root, partition values,
+row count, byte size, per-column min / max and a schema hash (schemas stored
+once). Writers keep it current (`stream_ingest`, `delta_ingest`, `compact`),
+so consumers can prune partitions, count rows and validate without a single
+S3 LIST:
+
+    m = DatasetManifest.load("s3://<bucket>/processed/")
+    m.files(years=(2018, 2020), countries={"france", "canada"})
+    m.total_rows(), m.partition_counts()
+    m.dataset(years=(2020, 2020))          # pyarrow dataset, no listing
+
+The file is rewritten atomically (temp + rename locally, single PUT on S3);
+runs that write the same dataset must not overlap. Datasets written before
+the manifest existed are bootstrapped once with
+
+  python -m ingestion.manifest --target s3://<bucket>/processed/
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import boto3
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from fe import schema
+from ingestion import footers, storage
+
+MANIFEST = "_manifest.json"
+VERSION = 1
+
+
+@dataclass
+class ManifestEntry:
+    path: str                          # relative to the dataset root
+    partition: Dict[str, str]
+    rows: int
+    bytes: int
+    schema: str
+    min: Dict[str, Any] = field(default_factory=dict)
+    max: Dict[str, Any] = field(default_factory=dict)
+
+
+def entry_from_footer(rel: str, size: int, meta: pq.FileMetaData,
+                      schemas: Dict[str, str]) -> ManifestEntry:
+    """Entry for one file; registers its schema in `schemas`."""
+    fp, blob = footers.schema_fingerprint(meta.schema.to_arrow_schema())
+    schemas[fp] = blob
+    lo: Dict[str, Any] = {}
+    hi: Dict[str, Any] = {}
+    for rg in footers.row_group_stats(meta):
+        for col, (mn, mx, _) in rg["cols"].items():
+            if mn is not None:
+                lo[col] = mn if col not in lo else min(lo[col], mn)
+                hi[col] = mx if col not in hi else max(hi[col], mx)
+    dirs = rel.split("/")[:-1]
+    partition = dict(d.split("=", 1) for d in dirs if "=" in d)
+    return ManifestEntry(rel, partition, meta.num_rows, size, fp, lo, hi)
+
+
+@dataclass
+class DatasetManifest:
+    root: str
+    entries: Dict[str, ManifestEntry] = field(default_factory=dict)
+    schemas: Dict[str, str] = field(default_factory=dict)
+    session: boto3.Session | None = field(default=None, repr=False, compare=False)
+
+    # ----------------------------------------------------------- storage
+    @classmethod
+    def load(cls, uri: str, session: boto3.Session | None = None) -> "DatasetManifest":
+        """Manifest of the dataset at `uri` (empty if none was written yet)."""
+        fs, base = storage.resolve(uri, session)
+        path = posixpath.join(base, MANIFEST)
+        if fs.get_file_info(path).type == pafs.FileType.NotFound:
+            return cls(root=uri, session=session)
+        with fs.open_input_stream(path) as fh:
+            doc = json.loads(fh.read().decode("utf-8"))
+        entries = {e["path"]: ManifestEntry(**e) for e in doc["files"]}
+        return cls(root=uri, entries=entries, schemas=doc["schemas"], session=session)
+
+    def save(self) -> None:
+        fs, base = storage.resolve(self.root, self.session)
+        path = posixpath.join(base, MANIFEST)
+        used = {e.schema for e in self.entries.values()}
+        payload = json.dumps({
+            "version": VERSION,
+            "schemas": {k: v for k, v in self.schemas.items() if k in used},
+            "files": [asdict(e) for _, e in sorted(self.entries.items())],
+        }).encode("utf-8")
+        fs.create_dir(base, recursive=True)
+        tmp = path if storage.is_s3(self.root) else f"{path}.tmp"
+        with fs.open_output_stream(tmp) as fh:
+            fh.write(payload)
+        if tmp != path:
+            fs.move(tmp, path)
+
+    # ----------------------------------------------------------- updates
+    def _rel(self, base: str, path: str) -> str:
+        return posixpath.relpath(path.split("://", 1)[-1], base)
+
+    def add(self, paths: Iterable[str],
+            metas: Dict[str, Tuple[int, pq.FileMetaData]] | None = None,
+            workers: int = 16) -> None:
+        """Add / replace entries for written files.
+
+        `metas` maps path → ``(bytes, footer)`` for files whose footer the
+        writer already holds; the others are read in parallel.
+        """
+        fs, base = storage.resolve(self.root, self.session)
+        metas = dict(metas or {})
+        todo = [p.split("://", 1)[-1] for p in paths
+                if p not in metas and p.split("://", 1)[-1] not in metas]
+
+        def fetch(path: str) -> Tuple[int, pq.FileMetaData]:
+            return fs.get_file_info(path).size, footers.read_footer(fs, path)
+
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+            metas.update(zip(todo, pool.map(fetch, todo)))
+        for path, (size, meta) in metas.items():
+            rel = self._rel(base, path)
+            self.entries[rel] = entry_from_footer(rel, size, meta, self.schemas)
+
+    def remove(self, paths: Iterable[str]) -> None:
+        _, base = storage.resolve(self.root, self.session)
+        for path in paths:
+            self.entries.pop(self._rel(base, path), None)
+
+    def sync_partitions(self, part_dirs: Iterable[str], workers: int = 16) -> None:
+        """Re-list the given partition directories (after a rewrite)."""
+        fs, base = storage.resolve(self.root, self.session)
+        for part_dir in set(part_dirs):
+            prefix = self._rel(base, part_dir) + "/"
+            listed = {
+                info.path: info.size
+                for info in fs.get_file_info(pafs.FileSelector(part_dir,
+                                                               allow_not_found=True))
+                if info.type == pafs.FileType.File
+                and info.base_name.endswith(".parquet")
+                and not info.base_name.startswith(("_", "."))
+            }
+            rels = {self._rel(base, p) for p in listed}
+            for rel in [r for r in self.entries
+                        if r.startswith(prefix) and r not in rels]:
+                del self.entries[rel]
+            self.add([p for p in listed if self._rel(base, p) not in self.entries],
+                     workers=workers)
+
+    # ----------------------------------------------------------- queries
+    def select(self,
+               years: Tuple[int, int] | None = None,
+               countries: Iterable[str] | None = None) -> List[ManifestEntry]:
+        """Entries with ``year ∈ [a, b]`` (numeric years only) and
+        ``country ∈ countries``."""
+        wanted = set(countries) if countries is not None else None
+        out = []
+        for e in self.entries.values():
+            year = e.partition.get("year", "")
+            if years is not None and not (year.isdigit()
+                                          and years[0] <= int(year) <= years[1]):
+                continue
+            if wanted is not None and e.partition.get("country") not in wanted:
+                continue
+            out.append(e)
+        return out
+
+    def files(self, years: Tuple[int, int] | None = None,
+              countries: Iterable[str] | None = None) -> List[str]:
+        """Filesystem paths (see `storage.resolve`) of the selected files."""
+        _, base = storage.resolve(self.root, self.session)
+        return [posixpath.join(base, e.path) for e in self.select(years, countries)]
+
+    def total_rows(self, years: Tuple[int, int] | None = None,
+                   countries: Iterable[str] | None = None) -> int:
+        return sum(e.rows for e in self.select(years, countries))
+
+    def partition_counts(self) -> Dict[Tuple[str, ...], int]:
+        counts: Dict[Tuple[str, ...], int] = {}
+        for e in self.entries.values():
+            key = tuple(e.partition.get(c, "") for c in schema.PART_COLS)
+            counts[key] = counts.get(key, 0) + e.rows
+        return dict(sorted(counts.items()))
+
+    def schema(self, fp: str) -> pa.Schema:
+        return footers.FooterManifest(root=self.root, schemas=self.schemas).schema(fp)
+
+    def dataset(self, years: Tuple[int, int] | None = None,
+                countries: Iterable[str] | None = None,
+                columns_schema: pa.Schema | None = None,
+                categorical: bool = False) -> ds.Dataset:
+        """PyArrow dataset over the selected files only (no listing).
+
+        `categorical` reads year / country as dictionaries (the data columns
+        keep the type they were written with).
+        """
+        fs, base = storage.resolve(self.root, self.session)
+        typ = pa.dictionary(pa.int32(), pa.string()) if categorical else pa.string()
+        part = ds.partitioning(pa.schema([(c, typ) for c in schema.PART_COLS]),
+                               flavor="hive",
+                               dictionaries="infer" if categorical else None)
+        return ds.dataset(self.files(years, countries), filesystem=fs,
+                          format="parquet", partitioning=part,
+                          partition_base_dir=base, schema=columns_schema)
+
+
+def open_dataset(uri: str, session: boto3.Session | None = None) -> ds.Dataset:
+    """Dataset at `uri`: from its manifest when there is one (no LIST),
+    otherwise by listing the hive partitions."""
+    m = DatasetManifest.load(uri, session)
+    if m.entries:
+        return m.dataset()
+    fs, base = storage.resolve(uri, session)
+    return ds.dataset(base, filesystem=fs, format="parquet", partitioning="hive",
+                      exclude_invalid_files=True)
+
+
+def rebuild(uri: str, session: boto3.Session | None = None,
+            workers: int = 16) -> DatasetManifest:
+    """Build the manifest from a full listing (bootstrap for older datasets)."""
+    m = DatasetManifest(root=uri, session=session)
+    m.add([path for path, _, _ in footers.list_data_files(uri, session)],
+          workers=workers)
+    m.save()
+    return m
+
+
+def record_written(uri: str, session: boto3.Session | None,
+                   paths: Sequence[str],
+                   metas: Dict[str, Tuple[int, pq.FileMetaData]] | None = None) -> DatasetManifest:
+    """Load, add `paths`, save – the one-liner used by the writers.
+
+    Without a manifest yet, every data file under `uri` is added, not just
+    `paths`: readers trust the manifest, so files written earlier must not
+    drop out of the dataset.
+    """
+    m = DatasetManifest.load(uri, session)
+    if not m.entries:
+        paths = [path for path, _, _ in footers.list_data_files(uri, session)]
+    m.add(paths, metas)
+    m.save()
+    return m
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Rebuild the dataset manifest")
+    p.add_argument("--target", required=True,
+                   help="dataset root: s3://bucket/processed/, bucket name or "
+                        "local directory")
+    p.add_argument("--profile", help="AWS profile (optional)")
+    p.add_argument("--workers", type=int, default=16)
+    args = p.parse_args(argv)
+
+    session = boto3.Session(profile_name=args.profile) if args.profile else None
+    m = rebuild(storage.processed_uri(args.target), session, args.workers)
+    print(f"✔ Manifest: {len(m.entries):,} files, {m.total_rows():,} rows in "
+          f"{len(m.partition_counts()):,} partitions")
+
+
+__all__ = ["MANIFEST", "ManifestEntry", "DatasetManifest", "entry_from_footer",
+           "open_dataset", "rebuild", "record_written"]
+
+
+if __name__ == "__main__":
+    main()
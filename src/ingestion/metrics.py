@@ -0,0 +1,241 @@
+"""
+Per-stage instrumentation for ingest and validation runs.
+
+`Metrics.stage(name)` is a context manager that accumulates, per stage,
+call count, wall time, CPU time, rows, bytes and allocated memory:
+
+  * CPU time is process CPU (`time.process_time`); stages that run in worker
+    processes are measured there and merged back with `merge`.
+  * Allocations are the growth of the Arrow memory pool plus, when
+    `trace_alloc=True` (tracemalloc, slow), of the Python heap.
+
+`Metrics.latency(name, seconds)` keeps per-call latencies (e.g. one entry per
+`write_parquet` call); `Metrics.count(name, n)` adds to a named counter (e.g.
+``coerce_failures:fat_100g``). A run exports as a JSON report (`report`/`write_json`)
+or as CloudWatch Embedded Metric Format lines (`emf_lines`/`write_emf`) that
+CloudWatch turns into metrics when shipped to the ``/nutrisage/ingest/
+validation`` log group.
+
+A disabled instance (`DISABLED`, the default everywhere) hands out one shared
+no-op context manager, so instrumented code costs one attribute check.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, TextIO, Tuple, TypeVar
+
+import numpy as np
+import pyarrow as pa
+
+T = TypeVar("T")
+
+LOG_GROUP = "/nutrisage/ingest/validation"
+NAMESPACE = "NutriSage/Ingest"
+_EMF_MAX_VALUES = 100          # CloudWatch limit per metric per EMF line
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+    alloc_bytes: int = 0
+
+    def add(self, other: "StageStats") -> None:
+        self.calls += other.calls
+        self.wall_s += other.wall_s
+        self.cpu_s += other.cpu_s
+        self.rows += other.rows
+        self.bytes += other.bytes
+        self.alloc_bytes += other.alloc_bytes
+
+
+class _Span:
+    """Handle yielded by `Metrics.stage`; set rows / bytes inside the block."""
+
+    __slots__ = ("rows", "bytes")
+
+    def __init__(self, rows: int, nbytes: int) -> None:
+        self.rows, self.bytes = rows, nbytes
+
+
+_NOOP = contextlib.nullcontext(_Span(0, 0))
+
+
+@dataclass
+class Metrics:
+    enabled: bool = True
+    trace_alloc: bool = False
+    stages: Dict[str, StageStats] = field(default_factory=dict)
+    latencies: Dict[str, List[float]] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if self.enabled and self.trace_alloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._pool = pa.default_memory_pool()
+
+    # ------------------------------------------------------------ recording
+    def stage(self, name: str, rows: int = 0, nbytes: int = 0):
+        """Time one execution of stage `name` (no-op when disabled)."""
+        if not self.enabled:
+            return _NOOP
+        return self._measure(name, rows, nbytes)
+
+    @contextlib.contextmanager
+    def _measure(self, name: str, rows: int, nbytes: int) -> Iterator[_Span]:
+        span = _Span(rows, nbytes)
+        traced = self.trace_alloc and tracemalloc.is_tracing()
+        py0 = tracemalloc.get_traced_memory()[0] if traced else 0
+        arrow0 = self._pool.bytes_allocated()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield span
+        finally:
+            st = self.stages.setdefault(name, StageStats())
+            st.calls += 1
+            st.wall_s += time.perf_counter() - wall0
+            st.cpu_s += time.process_time() - cpu0
+            st.rows += span.rows
+            st.bytes += span.bytes
+            grown = self._pool.bytes_allocated() - arrow0
+            if traced:
+                grown += tracemalloc.get_traced_memory()[0] - py0
+            st.alloc_bytes += max(grown, 0)
+
+    def timed_iter(self, name: str, items: Iterable[T],
+                   size: Callable[[T], Tuple[int, int]] | None = None) -> Iterator[T]:
+        """Charge the time spent producing each item of `items` to `name`.
+
+        `size(item)` optionally returns ``(rows, bytes)`` for the item.
+        """
+        if not self.enabled:
+            yield from items
+            return
+        it = iter(items)
+        while True:
+            with self.stage(name) as span:
+                try:
+                    item = next(it)
+                except StopIteration:
+                    break
+                if size is not None:
+                    span.rows, span.bytes = size(item)
+            yield item
+        self.stages[name].calls -= 1            # the exhausted next() call
+
+    def latency(self, name: str, seconds: float) -> None:
+        if self.enabled:
+            self.latencies.setdefault(name, []).append(seconds)
+
+    def count(self, name: str, n: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    # ------------------------------------------------------------- merging
+    def snapshot(self) -> Dict[str, Any]:
+        """Picklable state, to ship from a worker process to the parent."""
+        return {"stages": {k: asdict(v) for k, v in self.stages.items()},
+                "latencies": self.latencies, "counters": self.counters}
+
+    def merge(self, snap: Dict[str, Any]) -> None:
+        for name, st in snap["stages"].items():
+            self.stages.setdefault(name, StageStats()).add(StageStats(**st))
+        for name, values in snap["latencies"].items():
+            self.latencies.setdefault(name, []).extend(values)
+        for name, n in snap.get("counters", {}).items():
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    # ------------------------------------------------------------- export
+    def report(self, **meta: Any) -> Dict[str, Any]:
+        """JSON-serialisable run report."""
+        stages = {}
+        for name, st in self.stages.items():
+            d = asdict(st)
+            d["rows_per_s"] = round(st.rows / st.wall_s, 1) if st.wall_s else None
+            stages[name] = d
+        latency = {}
+        for name, values in self.latencies.items():
+            arr = np.asarray(values)
+            latency[name] = {
+                "calls": len(values), "total_s": float(arr.sum()),
+                "p50_s": float(np.percentile(arr, 50)),
+                "p95_s": float(np.percentile(arr, 95)),
+                "max_s": float(arr.max()), "per_call_s": values,
+            }
+        return {"run": meta, "stages": stages, "latency": latency,
+                "counters": dict(sorted(self.counters.items()))}
+
+    def emf_lines(self, namespace: str = NAMESPACE, log_group: str = LOG_GROUP,
+                  **dimensions: str) -> List[str]:
+        """CloudWatch Embedded Metric Format, one JSON line per stage/latency."""
+        ts = int(time.time() * 1000)
+        dims = {k: str(v) for k, v in dimensions.items()}
+
+        def line(kind: str, name: str, values: Dict[str, Any],
+                 units: Dict[str, str]) -> str:
+            return json.dumps({
+                "_aws": {
+                    "Timestamp": ts,
+                    "LogGroupName": log_group,
+                    "CloudWatchMetrics": [{
+                        "Namespace": namespace,
+                        "Dimensions": [[*dims, kind]],
+                        "Metrics": [{"Name": k, "Unit": u} for k, u in units.items()],
+                    }],
+                },
+                **dims, kind: name, **values,
+            })
+
+        out = []
+        for name, st in self.stages.items():
+            out.append(line("Stage", name, {
+                "WallTime": st.wall_s, "CpuTime": st.cpu_s, "Rows": st.rows,
+                "Bytes": st.bytes, "AllocBytes": st.alloc_bytes,
+                "Calls": st.calls,
+            }, {"WallTime": "Seconds", "CpuTime": "Seconds", "Rows": "Count",
+                "Bytes": "Bytes", "AllocBytes": "Bytes", "Calls": "Count"}))
+        for name, values in self.latencies.items():
+            for i in range(0, len(values), _EMF_MAX_VALUES):
+                out.append(line("Call", name,
+                                {"Latency": values[i:i + _EMF_MAX_VALUES]},
+                                {"Latency": "Seconds"}))
+        for name, n in self.counters.items():
+            out.append(line("Counter", name, {"Count": n}, {"Count": "Count"}))
+        return out
+
+    def write_json(self, path: str, **meta: Any) -> None:
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.report(**meta), fh, indent=2)
+
+    def write_emf(self, dest: str | TextIO, **dimensions: str) -> None:
+        """Append EMF lines to `dest` (a path, ``-`` for stdout, or a stream)."""
+        lines = "".join(ln + "\n" for ln in self.emf_lines(**dimensions))
+        if dest == "-":
+            sys.stdout.write(lines)
+        elif isinstance(dest, str):
+            with open(dest, "a", encoding="utf-8") as fh:
+                fh.write(lines)
+        else:
+            dest.write(lines)
+
+
+DISABLED = Metrics(enabled=False)
+
+
+def measured(process: Callable[..., T], lines: List[Any]) -> Tuple[T, Dict[str, Any]]:
+    """Run ``process(lines, metrics=…)`` with fresh metrics (worker side)."""
+    m = Metrics()
+    return process(lines, metrics=m), m.snapshot()
+
+
+__all__ = ["LOG_GROUP", "NAMESPACE", "StageStats", "Metrics", "DISABLED",
+           "measured"]
@@ -0,0 +1,202 @@
+"""
+Statistics-only data-quality checks for the processed dataset.
+
+Works purely on Parquet footer statistics (min / max / null_count per row
+group, cached in the footer manifest of `ingestion.footers`), so no data page
+is decoded. Per ``year=/country=`` partition it reports:
+
+  * rows and null ratio per (non-list) column
+  * nutrient columns whose range may leave [0, 100] g (`cleaning.clean` rules)
+  * the `created_t` range, and whether it can fall outside the partition year
+  * target-label (`nutrition_grade_fr`) coverage and possible invalid grades
+
+Row groups whose statistics *allow* a violation are listed as flagged;
+`scan_flagged` reads just those row groups to count actual violations.
+
+  python -m ingestion.quality --target s3://<bucket>/processed/ --scan-flagged
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+import boto3
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from data_prep.cleaning import RANGE_MAX, RANGE_MIN, VALID_GRADES, range_columns
+from fe import schema
+from ingestion import footers, storage
+
+GRADE_COL = schema.TARGET
+_GRADE_LO, _GRADE_HI = min(VALID_GRADES), max(VALID_GRADES)
+# list columns have no usable footer statistics
+_FLAT_COLS = [c for c in schema.ID_COLS + schema.KEEP_COLS if c not in schema.TAG_COLS]
+
+
+@dataclass
+class Flag:
+    path: str
+    row_group: int
+    reasons: List[str]
+
+
+@dataclass
+class PartitionQuality:
+    partition: str
+    files: int = 0
+    row_groups: int = 0
+    rows: int = 0
+    nulls: Dict[str, int] = field(default_factory=dict)
+    created_min: int | None = None
+    created_max: int | None = None
+    out_of_range: Dict[str, int] = field(default_factory=dict)   # col → flagged RGs
+    flagged: List[Flag] = field(default_factory=list)
+
+    def null_ratio(self) -> Dict[str, float]:
+        return {c: round(n / self.rows, 4) for c, n in self.nulls.items()} if self.rows else {}
+
+    @property
+    def label_coverage(self) -> float:
+        return round(1 - self.nulls.get(GRADE_COL, self.rows) / self.rows, 4) \
+            if self.rows else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        d["null_ratio"] = self.null_ratio()
+        d["label_coverage"] = self.label_coverage
+        del d["nulls"]
+        return d
+
+
+# ─────────────────────────── rules on statistics ─────────────────────────────
+def _year_bounds(year: str) -> Tuple[int, int] | None:
+    if not year.isdigit():
+        return None
+    lo = datetime(int(year), 1, 1, tzinfo=timezone.utc).timestamp()
+    hi = datetime(int(year) + 1, 1, 1, tzinfo=timezone.utc).timestamp()
+    return int(lo), int(hi) - 1
+
+
+def _rg_reasons(cols: Dict[str, list], year: str) -> List[str]:
+    """Rules a row group *may* violate, judged from min / max only."""
+    reasons = []
+    for col in range_columns(cols):
+        lo, hi, _ = cols[col]
+        if lo is not None and (lo < RANGE_MIN or hi > RANGE_MAX):
+            reasons.append(f"{col}:range")
+    lo, hi, _ = cols.get("created_t", [None, None, None])
+    bounds = _year_bounds(year)
+    if lo is not None and bounds and (lo < bounds[0] or hi > bounds[1]):
+        reasons.append("created_t:year")
+    lo, hi, _ = cols.get(GRADE_COL, [None, None, None])
+    if lo is not None and (lo < _GRADE_LO or hi > _GRADE_HI):
+        reasons.append(f"{GRADE_COL}:invalid")
+    return reasons
+
+
+def _partition_of(path: str) -> Dict[str, str]:
+    dirs = path.split("/")[-1 - len(schema.PART_COLS):-1]
+    return dict(d.split("=", 1) for d in dirs if "=" in d)
+
+
+def assess(manifest: footers.FooterManifest) -> List[PartitionQuality]:
+    """Per-partition quality report from footer statistics only."""
+    parts: Dict[str, PartitionQuality] = {}
+    for entry in sorted(manifest.files.values(), key=lambda e: e.path):
+        values = _partition_of(entry.path)
+        key = "/".join(f"{c}={values.get(c, '?')}" for c in schema.PART_COLS)
+        pq_ = parts.setdefault(key, PartitionQuality(partition=key))
+        pq_.files += 1
+        for i, rg in enumerate(entry.stats or []):
+            pq_.row_groups += 1
+            pq_.rows += rg["rows"]
+            cols = rg["cols"]
+            for col in _FLAT_COLS:               # a missing column is all null
+                st = cols.get(col)
+                null = rg["rows"] if st is None else (st[2] or 0)
+                pq_.nulls[col] = pq_.nulls.get(col, 0) + null
+            lo, hi, _ = cols.get("created_t", [None, None, None])
+            if lo is not None:
+                pq_.created_min = lo if pq_.created_min is None else min(pq_.created_min, lo)
+                pq_.created_max = hi if pq_.created_max is None else max(pq_.created_max, hi)
+            reasons = _rg_reasons(cols, values.get("year", ""))
+            for r in reasons:
+                if r.endswith(":range"):
+                    col = r.split(":", 1)[0]
+                    pq_.out_of_range[col] = pq_.out_of_range.get(col, 0) + 1
+            if reasons:
+                pq_.flagged.append(Flag(entry.path, i, reasons))
+    return list(parts.values())
+
+
+# ───────────────────────────── targeted scan ─────────────────────────────────
+def scan_flagged(manifest: footers.FooterManifest,
+                 report: List[PartitionQuality],
+                 session: boto3.Session | None = None) -> Dict[str, int]:
+    """Read only the flagged row groups; count rows that really violate."""
+    fs, _ = storage.resolve(manifest.root, session)
+    counts: Dict[str, int] = {}
+    for part in report:
+        for flag in part.flagged:
+            bounds = _year_bounds(_partition_of(flag.path).get("year", ""))
+            cols = sorted({r.split(":", 1)[0] for r in flag.reasons})
+            with fs.open_input_file(flag.path) as fh:
+                table = pq.ParquetFile(fh).read_row_group(flag.row_group, columns=cols)
+            for reason in flag.reasons:
+                col, rule = reason.split(":", 1)
+                arr = table[col]
+                if rule == "range":
+                    bad = pc.or_(pc.less(arr, RANGE_MIN), pc.greater(arr, RANGE_MAX))
+                elif rule == "year" and bounds:
+                    bad = pc.or_(pc.less(arr, bounds[0]), pc.greater(arr, bounds[1]))
+                else:
+                    bad = pc.and_(pc.is_valid(arr), pc.invert(
+                        pc.is_in(arr, value_set=pa.array(sorted(VALID_GRADES)))))
+                n = pc.sum(pc.fill_null(bad, False)).as_py() or 0
+                counts[reason] = counts.get(reason, 0) + n
+    return counts
+
+
+# ─────────────────────────────── CLI ─────────────────────────────────────────
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Statistics-only data-quality report")
+    p.add_argument("--target", required=True,
+                   help="dataset root: s3://bucket/processed/, bucket name or "
+                        "local directory")
+    p.add_argument("--profile", help="AWS profile (optional)")
+    p.add_argument("--workers", type=int, default=16)
+    p.add_argument("--manifest", help="footer manifest location (see footers)")
+    p.add_argument("--out", help="write the JSON report here")
+    p.add_argument("--scan-flagged", action="store_true",
+                   help="read the flagged row groups and count real violations")
+    args = p.parse_args(argv)
+
+    session = boto3.Session(profile_name=args.profile) if args.profile else None
+    manifest, scan = footers.scan(storage.processed_uri(args.target), session,
+                                  workers=args.workers, manifest_uri=args.manifest)
+    report = assess(manifest)
+    doc: Dict[str, Any] = {"partitions": [p.to_dict() for p in report]}
+    if args.scan_flagged:
+        doc["violations"] = scan_flagged(manifest, report, session)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(doc, fh, indent=2)
+
+    rows = sum(p.rows for p in report)
+    flagged = sum(len(p.flagged) for p in report)
+    groups = sum(p.row_groups for p in report)
+    print(f"✔ Quality from statistics: {len(report):,} partitions, {rows:,} rows; "
+          f"{flagged:,}/{groups:,} row groups flagged ({scan.summary()})")
+    if args.scan_flagged:
+        for reason, n in sorted(doc["violations"].items()):
+            print(f"  {reason:<32} {n:>10,} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Filesystem helpers shared by the Arrow ingest writers and maintenance jobs.
+
+Every dataset location can be an S3 URI (``s3://bucket/processed/``) or a
+local directory, so the same code path can be tested and benchmarked offline.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Tuple
+
+import boto3
+import pyarrow.fs as pafs
+
+PROC_PREFIX = "processed/"
+
+
+def processed_uri(proc_bucket: str) -> str:
+    """Dataset root for `--proc-bucket`.
+
+    A plain bucket name maps to ``s3://<bucket>/processed/``; anything that
+    already looks like a URI or a local path is returned unchanged.
+    """
+    if "://" in proc_bucket or "/" in proc_bucket or "\\" in proc_bucket \
+            or proc_bucket.startswith("."):
+        return proc_bucket
+    return f"s3://{proc_bucket}/{PROC_PREFIX}"
+
+
+def is_s3(uri: str) -> bool:
+    return uri.startswith("s3://")
+
+
+def resolve(uri: str,
+            session: boto3.Session | None = None) -> Tuple[pafs.FileSystem, str]:
+    """Return ``(filesystem, path)`` for a dataset URI or local directory.
+
+    For S3 the credentials (and region, if set) of `session` are used so the
+    Arrow writers honour ``--profile`` exactly like awswrangler does.
+    """
+    if not is_s3(uri):
+        if uri.startswith("file://"):
+            uri = uri[len("file://"):]
+        return pafs.LocalFileSystem(), os.path.abspath(uri).replace(os.sep, "/")
+
+    path = uri[len("s3://"):].rstrip("/")
+    if session is None:
+        fs, _ = pafs.FileSystem.from_uri(uri)
+        return fs, path
+
+    creds = session.get_credentials()
+    bucket = path.split("/", 1)[0]
+    region = session.region_name or pafs.resolve_s3_region(bucket)
+    if creds is None:
+        return pafs.S3FileSystem(region=region), path
+    frozen = creds.get_frozen_credentials()
+    return pafs.S3FileSystem(access_key=frozen.access_key,
+                             secret_key=frozen.secret_key,
+                             session_token=frozen.token,
+                             region=region), path
@@ -0,0 +1,142 @@
+"""
+Deterministic generator of OpenFoodFacts-shaped JSONL(.gz) for tests and
+benchmarks.
+
+Records mimic the messiness of the real dump: nested ``nutriments`` (numbers,
+string-typed numbers, blanks, unrelated keys), tag lists that are sometimes
+plain strings, missing fields, junk ``created_t`` values and bulky fields we
+never keep (ingredients, images) so parsing cost is realistic. The same
+`seed` always yields byte-identical output.
+
+  python -m ingestion.synthetic --out data/synthetic.jsonl.gz --rows 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import random
+from typing import Any, Dict, Iterator
+
+from fe import schema
+
+COUNTRIES = ["en:france", "en:united-states", "en:germany", "en:spain",
+             "en:italy", "en:canada", "en:belgium", "en:switzerland",
+             "en:united-kingdom", "fr:suisse"]
+BRANDS = ["carrefour", "auchan", "nestle", "danone", "kellogg-s", "lidl",
+          "leader-price", "u", "casino", "coca-cola"]
+CATEGORIES = ["en:snacks", "en:beverages", "en:dairies", "en:cereals",
+              "en:plant-based-foods", "en:meats", "en:sauces"]
+SERVINGS = ["30 g", "1 cup (240 ml)", "100g", "2 biscuits (25 g)", "", "1 portion"]
+GRADES = ["a", "b", "c", "d", "e", "", "unknown"]
+WORDS = ["sugar", "salt", "wheat flour", "palm oil", "milk", "cocoa",
+         "water", "e330", "soy lecithin", "natural flavouring"]
+
+_TS_LO, _TS_HI = 1_330_000_000, 1_700_000_000          # 2012 … 2023
+_NUTRIENTS = [c for c in schema.KEEP_COLS if c in schema.NUTRIMENTS_KEY]
+
+
+def _number(rng: random.Random, hi: float) -> Any:
+    """A nutrient value in one of the shapes seen in the dump."""
+    v = round(rng.uniform(0, hi), rng.choice((0, 1, 2, 3)))
+    roll = rng.random()
+    if roll < 0.70:
+        return v
+    if roll < 0.85:
+        return str(v)                       # string-typed number
+    if roll < 0.90:
+        return ""
+    if roll < 0.95:
+        return None
+    return "traces"                         # junk → NaN after casting
+
+
+def _created(rng: random.Random) -> Any:
+    ts = rng.randint(_TS_LO, _TS_HI)
+    roll = rng.random()
+    if roll < 0.85:
+        return ts
+    if roll < 0.93:
+        return str(ts)
+    if roll < 0.96:
+        return ts + 0.5
+    return rng.choice(["junk", "", None, -1, 10 ** 12])
+
+
+def _tags(rng: random.Random, pool: list[str]) -> Any:
+    roll = rng.random()
+    if roll < 0.80:
+        return rng.sample(pool, rng.randint(1, 3))
+    if roll < 0.88:
+        return []
+    if roll < 0.94:
+        return rng.choice(pool).split(":")[-1].title()    # plain string
+    return None
+
+
+def record(rng: random.Random, i: int) -> Dict[str, Any]:
+    """One synthetic product (fields randomly missing)."""
+    nutriments: Dict[str, Any] = {}
+    for col in _NUTRIENTS:
+        if rng.random() < 0.85:
+            nutriments[col] = _number(rng, 4000 if col.startswith("energy") else 100)
+            if rng.random() < 0.5:
+                nutriments[col.replace("_100g", "_unit")] = "g"
+    nutriments["nova-group"] = rng.randint(1, 4)
+
+    created = _created(rng)
+    rec: Dict[str, Any] = {
+        "code": f"{3_000_000_000_000 + i:013d}",
+        "product_name": f"{rng.choice(WORDS).title()} {i}",
+        "created_t": created,
+        "last_modified_t": (created if isinstance(created, int) and created > 0
+                            else _TS_LO) + rng.randint(0, 10 ** 7),
+        "countries_tags": _tags(rng, COUNTRIES),
+        "brands_tags": _tags(rng, BRANDS),
+        "main_category": rng.choice(CATEGORIES + [""]),
+        "serving_size": rng.choice(SERVINGS),
+        "nutrition_grade_fr": rng.choice(GRADES),
+        "nutriments": nutriments,
+        "ingredients_text": ", ".join(rng.choices(WORDS, k=rng.randint(3, 25))),
+        "ingredients": [{"id": f"en:{w}", "rank": r + 1, "percent_estimate": r}
+                        for r, w in enumerate(rng.sample(WORDS, 4))],
+        "images": {str(k): {"sizes": {"100": {"w": 75, "h": 100},
+                                      "400": {"w": 300, "h": 400}},
+                            "uploaded_t": _TS_LO + k} for k in range(rng.randint(0, 4))},
+    }
+    for key in ("product_name", "brands_tags", "main_category", "serving_size",
+                "nutrition_grade_fr", "nutriments", "countries_tags"):
+        if rng.random() < 0.05:
+            del rec[key]
+    return rec
+
+
+def iter_lines(rows: int, seed: int = 0) -> Iterator[str]:
+    rng = random.Random(seed)
+    for i in range(rows):
+        yield json.dumps(record(rng, i), ensure_ascii=False)
+
+
+def write_dump(path: str, rows: int, seed: int = 0) -> str:
+    """Write `rows` synthetic records to `path` (gzip if it ends in .gz)."""
+    gz = str(path).endswith(".gz")
+    with (gzip.GzipFile(path, "wb", mtime=0) if gz else open(path, "wb")) as fh:
+        for line in iter_lines(rows, seed):
+            fh.write(line.encode("utf-8") + b"\n")
+    return str(path)
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Generate synthetic OFF JSONL")
+    p.add_argument("--out", required=True, help="output .jsonl or .jsonl.gz")
+    p.add_argument("--rows", type=int, default=100_000)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    write_dump(args.out, args.rows, args.seed)
+    print(f"✔ Wrote {args.rows:,} synthetic products → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
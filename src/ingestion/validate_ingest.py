@@ -15,7 +15,9 @@ import boto3
 import pyarrow as pa
 import pyarrow.dataset as ds
 
-from fe.schema import KEEP_COLS, DTYPES
+from fe.schema import KEEP_COLS, DTYPES, ID_COLS
+from ingestion import footers, manifest, quality, storage
+from ingestion.metrics import DISABLED, Metrics
 
 # ───────────────────────── CONFIG ─────────────────────────────────────────────
 PROC_PREFIX = "processed"
@@ -29,6 +31,19 @@ LIST_TYPES: Dict[str, pa.DataType] = {
 }
 
 
+def _same_type(actual: pa.DataType, want: pa.DataType) -> bool:
+    """`want`, or its dictionary-encoded form (``--categorical`` ingest)."""
+    if actual.equals(want):
+        return True
+    if pa.types.is_dictionary(actual):
+        return pa.types.is_string(want) and (
+            pa.types.is_string(actual.value_type)
+            or pa.types.is_large_string(actual.value_type))
+    if pa.types.is_list(actual) and pa.types.is_list(want):
+        return _same_type(actual.value_type, want.value_type)
+    return False
+
+
 # ─────────────────────── Read metadata ───────────────────────────────────────
 def read_metadata(bucket: str, profile: str | None) -> Any:
     path = f"s3://{bucket}/{PROC_PREFIX}"
@@ -47,8 +62,9 @@ def check_summary(meta: Any) -> None:
     cols: Dict[str, str] = meta.columns_types
     parts: Dict[str, str] = meta.partitions_types
 
+    # ID_COLS are optional (datasets ingested before they were carried)
     missing_cols = [c for c in KEEP_COLS if c not in cols]
-    extra_cols = [c for c in cols if c not in KEEP_COLS]
+    extra_cols = [c for c in cols if c not in KEEP_COLS + ID_COLS]
     if missing_cols or extra_cols:
         raise ValueError(
             f"Summary: missing cols={missing_cols}, extras={extra_cols}")
@@ -111,11 +127,21 @@ def check_detailed(meta: Any) -> int:
     if first_schema is None:
         raise RuntimeError("No schema found in fragments")
 
+    check_schema(first_schema)
+    return total
+
+
+def check_schema(schema: pa.Schema, partitions_in_path: bool = False) -> None:
+    """Column names and physical types of one schema.
+
+    Parquet footers do not carry the hive partition columns, so pass
+    `partitions_in_path=True` when `schema` comes straight from a file.
+    """
     # 1) columns
-    actual = first_schema.names
-    expected = KEEP_COLS + PART_COLS
+    actual = schema.names
+    expected = KEEP_COLS + ([] if partitions_in_path else PART_COLS)
     missing = [c for c in expected if c not in actual]
-    extras = [c for c in actual if c not in expected]
+    extras = [c for c in actual if c not in expected + ID_COLS]
     if missing or extras:
         raise ValueError(f"Detailed: missing={missing}, extras={extras}")
 
@@ -128,39 +154,140 @@ def check_detailed(meta: Any) -> int:
     expected_types.update(LIST_TYPES)
 
     errs: list[str] = []
-    for field in first_schema:
+    for field in schema:
         want = expected_types.get(field.name)
-        if want and not pa.types.is_same_type(field.type, want):
+        if want and not _same_type(field.type, want):
             errs.append(f"{field.name}: {field.type} ≠ {want}")
     if errs:
         raise ValueError("Detailed: type errors:\n  " + "\n  ".join(errs))
 
+
+# ───────────────────── Manifest mode ─────────────────────────────────────────
+def check_manifest(m: manifest.DatasetManifest) -> int:
+    """Validate from ``_manifest.json`` alone (no listing, no footers)."""
+    total = m.total_rows()
+    if total < 1:
+        raise ValueError(f"Row-count too low: {total} (no manifest at {m.root}?)")
+    for fp in {e.schema for e in m.entries.values()}:
+        check_schema(m.schema(fp), partitions_in_path=True)
+    bad = [e.path for e in m.entries.values() if list(e.partition) != PART_COLS]
+    if bad:
+        raise ValueError(f"{len(bad):,} files outside year=/country= "
+                         f"partitions, e.g. {bad[0]}")
+    return total
+
+
+# ───────────────────── Footer mode ───────────────────────────────────────────
+def check_footers(manifest: footers.FooterManifest) -> int:
+    """Validate from a footer manifest: every distinct schema, partition
+    layout of every path, total row count."""
+    total = manifest.rows
+    if total < 1:
+        raise ValueError(f"Row-count too low: {total}")
+
+    for fp in {e.schema for e in manifest.files.values()}:
+        try:
+            check_schema(manifest.schema(fp), partitions_in_path=True)
+        except ValueError as exc:
+            example = next(e.path for e in manifest.files.values() if e.schema == fp)
+            raise ValueError(f"{exc}\n  (e.g. {example})") from None
+
+    bad = [e.path for e in manifest.files.values()
+           if [d.split("=", 1)[0] for d in e.path.split("/")[-1 - len(PART_COLS):-1]]
+           != PART_COLS]
+    if bad:
+        raise ValueError(f"{len(bad):,} files outside year=/country= "
+                         f"partitions, e.g. {bad[0]}")
     return total
 
 
 # ─────────────────────────────── CLI ─────────────────────────────────────────
 def main(argv: list[str] | None = None):
     p = argparse.ArgumentParser(description="Validate Parquet ingest")
-    p.add_argument("--bucket",  required=True, help="S3 bucket name")
+    p.add_argument("--bucket",  required=True,
+                   help="S3 bucket name (or dataset URI / local directory "
+                        "with --engine footers)")
     p.add_argument("--profile", help="AWS profile (optional)")
+    p.add_argument("--engine",  default="footers",
+                   choices=("footers", "manifest", "wrangler"),
+                   help="footers: parallel footer scan + cached manifest; "
+                        "manifest: ingest-time _manifest.json only (no LIST); "
+                        "wrangler: awswrangler metadata (previous behaviour)")
+    p.add_argument("--workers", type=int, default=16,
+                   help="parallel footer reads (--engine footers)")
+    p.add_argument("--manifest",
+                   help="footer manifest location, local path or S3 URI "
+                        "(default <dataset>/_footers.json)")
+    p.add_argument("--refresh", action="store_true",
+                   help="ignore the cached manifest and re-read every footer")
+    p.add_argument("--quality", action="store_true",
+                   help="also run the statistics-only data-quality checks "
+                        "(--engine footers; no data pages are read)")
+    p.add_argument("--metrics-json", help="write a per-stage JSON run report")
+    p.add_argument("--metrics-emf",
+                   help="append CloudWatch EMF lines to this path ('-' = stdout)")
     args = p.parse_args(argv)
+    metrics = Metrics() if args.metrics_json or args.metrics_emf else DISABLED
 
     try:
-        meta = read_metadata(args.bucket, args.profile)
+        if args.engine == "manifest":
+            sess = boto3.Session(profile_name=args.profile) if args.profile else None
+            with metrics.stage("manifest"):
+                m = manifest.DatasetManifest.load(
+                    storage.processed_uri(args.bucket), sess)
+            with metrics.stage("check") as span:
+                total = span.rows = check_manifest(m)
+            print(f"✔ Manifest validation OK – {total:,} rows in "
+                  f"{len(m.entries):,} files; schema & types match")
+            return
+
+        if args.engine == "footers":
+            sess = boto3.Session(profile_name=args.profile) if args.profile else None
+            with metrics.stage("footers") as span:
+                fm, scan = footers.scan(
+                    storage.processed_uri(args.bucket), sess,
+                    workers=args.workers, manifest_uri=args.manifest,
+                    refresh=args.refresh)
+                span.rows = scan.read
+            with metrics.stage("check") as span:
+                total = span.rows = check_footers(fm)
+            print(f"✔ Footer validation OK – {total:,} rows in {scan.summary()}; "
+                  f"schema & types match")
+            if args.quality:
+                with metrics.stage("quality"):
+                    report = quality.assess(fm)
+                for part in report:
+                    if part.flagged:
+                        print(f"  {part.partition}: label coverage "
+                              f"{part.label_coverage:.1%}, {len(part.flagged):,} "
+                              f"row groups flagged "
+                              f"({', '.join(sorted({r for f in part.flagged for r in f.reasons}))})")
+            return
+
+        with metrics.stage("read_metadata"):
+            meta = read_metadata(args.bucket, args.profile)
 
         if is_summary(meta):
-            check_summary(meta)
-            total = count_via_dataset(args.bucket)
+            with metrics.stage("check"):
+                check_summary(meta)
+            with metrics.stage("count") as span:
+                total = span.rows = count_via_dataset(args.bucket)
             print(
                 f"✔ Summary validation OK – {total:,} rows; cols & types match")
         else:
-            total = check_detailed(meta)
+            with metrics.stage("check") as span:
+                total = span.rows = check_detailed(meta)
             print(
                 f"✔ Detailed validation OK – {total:,} rows; schema & types match")
 
     except Exception as exc:
         print(f"Validation failed: {exc}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json, job="validate", bucket=args.bucket)
+        if args.metrics_emf:
+            metrics.write_emf(args.metrics_emf, Job="validate")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,211 @@
+"""Partition-buffered Parquet writer for the processed dataset.
+
+Appending every chunk with ``partition_cols=["year", "country"]`` creates one
+new file per chunk in every partition the chunk touches. `PartitionWriter`
+instead keeps rows per ``year=/country=`` partition in memory across chunks
+and writes a file only when a partition reaches its target size (rows or
+estimated Parquet bytes), when the global buffer cap forces the largest
+partitions out early, or at `close()`.
+"""
+
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from fe import schema
+from ingestion import arrow_engine
+from ingestion import layout as layouts
+
+MiB = 1 << 20
+
+Key = Tuple[str, ...]
+
+
+@dataclass
+class WrittenFile:
+    path: str
+    partition: Dict[str, str]
+    rows: int
+    bytes: int
+    metadata: pq.FileMetaData | None = field(default=None, repr=False)
+
+
+@dataclass
+class WriterStats:
+    files: int = 0
+    rows: int = 0
+    bytes: int = 0
+    forced_flushes: int = 0   # flushes triggered by the memory cap
+
+    @property
+    def avg_file_bytes(self) -> float:
+        return self.bytes / self.files if self.files else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.files:,} files, {self.rows:,} rows, "
+                f"avg {self.avg_file_bytes / MiB:,.1f} MiB/file "
+                f"({self.forced_flushes:,} early flushes)")
+
+
+@dataclass
+class _Buffer:
+    tables: List[pa.Table] = field(default_factory=list)
+    rows: int = 0
+    nbytes: int = 0
+
+
+def split_partitions(table: pa.Table,
+                     part_cols: List[str] = schema.PART_COLS) -> Dict[Key, pa.Table]:
+    """Split `table` by partition values; partition columns are dropped.
+
+    Each piece is a compact copy (``take``), not a slice, so a buffered
+    partition never pins the memory of the whole chunk it came from.
+    """
+    if table.num_rows == 0:
+        return {}
+    # dictionary partition columns (categorical ingest) are sorted as strings
+    plain = pa.table({c: pc.cast(table[c], table[c].type.value_type)
+                      if pa.types.is_dictionary(table[c].type) else table[c]
+                      for c in part_cols})
+    idx = pc.sort_indices(plain, sort_keys=[(c, "ascending") for c in part_cols])
+    keys = [plain[c].take(idx).to_numpy(zero_copy_only=False) for c in part_cols]
+    change = np.zeros(table.num_rows - 1, dtype=bool)
+    for k in keys:
+        change |= k[1:] != k[:-1]
+    starts = np.concatenate(([0], np.flatnonzero(change) + 1, [table.num_rows]))
+    data = table.drop_columns(part_cols)
+    return {tuple(str(k[s]) for k in keys): data.take(idx[s:e])
+            for s, e in zip(starts[:-1], starts[1:])}
+
+
+class PartitionWriter:
+    """Buffer rows per partition and write right-sized Parquet files.
+
+    Parameters
+    ----------
+    fs, base_dir      : target filesystem / dataset root (see storage.resolve)
+    target_rows       : flush a partition once it holds this many rows
+    target_bytes      : ... or once its estimated Parquet size reaches this
+    max_buffer_bytes  : global cap on buffered Arrow bytes; above it the
+                        largest partitions are flushed early
+    run_id            : files are named ``part-<run_id>-<seq>.parquet``
+                        (unique per run by default)
+    first_seq         : first file sequence number (resumed runs continue)
+    layout            : `ingestion.layout` profile of the written files
+                        (overrides `compression`)
+    """
+
+    def __init__(self,
+                 fs: pafs.FileSystem,
+                 base_dir: str,
+                 *,
+                 target_rows: int = 1_000_000,
+                 target_bytes: int = 128 * MiB,
+                 max_buffer_bytes: int = 1024 * MiB,
+                 compression: str = "snappy",
+                 run_id: str | None = None,
+                 first_seq: int = 0,
+                 part_cols: List[str] = schema.PART_COLS,
+                 layout: str | layouts.LayoutProfile | None = None) -> None:
+        self.fs, self.base_dir = fs, base_dir.rstrip("/")
+        self.target_rows = target_rows
+        self.target_bytes = target_bytes
+        self.max_buffer_bytes = max_buffer_bytes
+        self.layout = (layouts.get(layout) if layout is not None
+                       else replace(layouts.DEFAULT, compression=compression))
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.part_cols = part_cols
+        self.stats = WriterStats()
+        self.files: List[WrittenFile] = []
+        self._buffers: Dict[Key, _Buffer] = {}
+        self._buffered = 0
+        self._seq = first_seq
+        # Parquet bytes per in-memory Arrow byte, refined after every flush
+        self._ratio = 0.25
+
+    # ------------------------------------------------------------------ API
+    def write(self, data: pa.Table | pa.RecordBatch | pd.DataFrame) -> None:
+        table = self._as_table(data)
+        for key, part in split_partitions(table, self.part_cols).items():
+            buf = self._buffers.setdefault(key, _Buffer())
+            buf.tables.append(part)
+            buf.rows += part.num_rows
+            buf.nbytes += part.nbytes
+            self._buffered += part.nbytes
+            if (buf.rows >= self.target_rows
+                    or buf.nbytes * self._ratio >= self.target_bytes):
+                self.flush(key)
+
+        while self._buffered > self.max_buffer_bytes and self._buffers:
+            largest = max(self._buffers, key=lambda k: self._buffers[k].nbytes)
+            self.flush(largest)
+            self.stats.forced_flushes += 1
+
+    def flush(self, key: Key | None = None) -> None:
+        """Write one partition buffer (or all of them when `key` is None)."""
+        for k in ([key] if key is not None else list(self._buffers)):
+            buf = self._buffers.pop(k, None)
+            if buf is not None and buf.rows:
+                self._buffered -= buf.nbytes
+                self._write_file(k, pa.concat_tables(buf.tables,
+                                                     promote_options="permissive"),
+                                 buf.nbytes)
+
+    @property
+    def next_seq(self) -> int:
+        return self._seq
+
+    def close(self) -> WriterStats:
+        self.flush()
+        return self.stats
+
+    def __enter__(self) -> "PartitionWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if exc[0] is None:
+            self.close()
+
+    # -------------------------------------------------------------- helpers
+    def _as_table(self, data: pa.Table | pa.RecordBatch | pd.DataFrame) -> pa.Table:
+        if isinstance(data, pd.DataFrame):
+            categorical = isinstance(data[self.part_cols[0]].dtype,
+                                     pd.CategoricalDtype)
+            return pa.Table.from_pandas(
+                data, schema=arrow_engine.arrow_schema(categorical=categorical),
+                preserve_index=False)
+        if isinstance(data, pa.RecordBatch):
+            return pa.Table.from_batches([data])
+        return data
+
+    def _write_file(self, key: Key, table: pa.Table, nbytes: int) -> None:
+        part_dir = "/".join(f"{c}={v}" for c, v in zip(self.part_cols, key))
+        path = (f"{self.base_dir}/{part_dir}/"
+                f"part-{self.run_id}-{self._seq:05d}.parquet")
+        self._seq += 1
+
+        self.fs.create_dir(path.rsplit("/", 1)[0], recursive=True)
+        collector: List[pq.FileMetaData] = []
+        with self.fs.open_output_stream(path) as sink:
+            self.layout.write_table(table, sink, metadata_collector=collector)
+            size = sink.tell()
+
+        self._ratio = 0.5 * self._ratio + 0.5 * (size / max(nbytes, 1))
+        self.files.append(WrittenFile(path, dict(zip(self.part_cols, key)),
+                                      table.num_rows, size,
+                                      collector[0] if collector else None))
+        self.stats.files += 1
+        self.stats.rows += table.num_rows
+        self.stats.bytes += size
+
+
+__all__ = ["PartitionWriter", "WriterStats", "WrittenFile", "split_partitions"]
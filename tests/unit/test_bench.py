@@ -0,0 +1,30 @@
+import gzip
+import json
+
+from ingestion import bench, synthetic
+
+
+def test_synthetic_dump_is_deterministic(tmp_path):
+    a = synthetic.write_dump(str(tmp_path / "a.jsonl.gz"), 200, seed=7)
+    b = synthetic.write_dump(str(tmp_path / "b.jsonl.gz"), 200, seed=7)
+    with gzip.open(a, "rb") as fa, gzip.open(b, "rb") as fb:
+        lines = fa.readlines()
+        assert lines == fb.readlines()
+    recs = [json.loads(ln) for ln in lines]
+    assert any(isinstance(r.get("created_t"), str) for r in recs)
+    assert any("nutriments" not in r for r in recs)
+
+
+def test_bench_reports_every_stage_and_flags_regressions(tmp_path):
+    path = synthetic.write_dump(str(tmp_path / "s.jsonl.gz"), 300)
+    results = bench.run(path, chunk_sizes=[100, 300], repeat=1)
+
+    assert [(r.stage, r.chunk_rows) for r in results] == \
+        [(s, n) for n in (100, 300) for s in bench.STAGES]
+    assert all(r.rows == 300 and r.rows_per_s > 0 for r in results)
+
+    doc = bench.report(results, path)
+    assert bench.compare(doc, doc) == []
+    slow = json.loads(json.dumps(doc))
+    slow["results"][0]["rows_per_s"] /= 2
+    assert len(bench.compare(slow, doc)) == 1
@@ -1,6 +1,7 @@
 import pandas as pd
 import pytest
-from data_prep.cleaning import clean
+import pyarrow as pa
+from data_prep.cleaning import clean, clean_batches, split
 
 
 def test_cleaning_basic(monkeypatch):
@@ -28,3 +29,45 @@ def test_cleaning_basic(monkeypatch):
     assert cleaned.shape[0] == 1
     # target values valid
     assert set(cleaned['nutrition_grade_fr']) <= {'a', 'b', 'c', 'd', 'e'}
+
+
+def test_split_records_first_rule_per_row():
+    df = pd.DataFrame({
+        'fat_100g': [1.0, 120.0, None, 5.0],
+        'sugars_100g': [2.0, -1.0, -3.0, 5.0],
+        'nutrition_grade_fr': ['a', 'b', 'c', None],
+    })
+
+    kept, rejected = split(df)
+
+    assert kept['fat_100g'].tolist() == [1.0]
+    assert rejected['reason'].tolist() == [
+        'fat_100g:range', 'sugars_100g:range', 'nutrition_grade_fr:invalid']
+
+
+def test_clean_batches_arrow_matches_pandas():
+    df = pd.DataFrame({
+        'code': ['1', '2', '3', '4'],
+        'fat_100g': pd.array([1.0, 120.0, None, 5.0], dtype='float32'),
+        'proteins_100g': pd.array([2.0, 3.0, 4.0, -5.0], dtype='float32'),
+        'brands_tags': [['x'], [], ['y'], []],
+        'nutrition_grade_fr': pd.array(['a', 'b', 'e', 'c'], dtype='string'),
+    })
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    out = list(clean_batches([table.to_batches(max_chunksize=2)[0],
+                              table.to_batches(max_chunksize=2)[1]]))
+    arrow = pa.Table.from_batches(out).to_pandas()
+    expected = list(clean_batches([df]))[0]
+
+    assert list(arrow.columns) == list(expected.columns)
+    assert arrow['code'].tolist() == expected['code'].tolist() == ['1', '3']
+
+
+def test_no_nutrient_columns_checks_grade_only():
+    df = pd.DataFrame({'nutrition_grade_fr': ['a', 'x', 'b']})
+    kept, rejected = split(df)
+    assert kept['nutrition_grade_fr'].tolist() == ['a', 'b']
+    assert rejected['reason'].tolist() == ['nutrition_grade_fr:invalid']
+    out = list(clean_batches([pa.table(df)]))[0]
+    assert out['nutrition_grade_fr'].to_pylist() == ['a', 'b']
@@ -0,0 +1,78 @@
+import math
+
+import numpy as np
+import pandas as pd
+from fe import coercion, schema
+from ingestion import ingest_nutrisage as ingest
+from ingestion import metrics as m
+
+
+def _frame():
+    df = pd.DataFrame({
+        "code": ["001", "", None, "4"],
+        "fat_100g": [1.5, "2,5", "junk", ""],
+        "sugars_100g": ["3", None, float("nan"), 4],
+        "created_t": [1600000000.5, "inf", "1.6e9", {"$date": 1}],
+        "brands_tags": [["a", None, "b"], "solo", None, {"x": 1}],
+        "countries_tags": [["en:france"], [], "", ["en:spain", 1]],
+        "main_category": ["", "snacks", None, ["nested"]],
+        "product_name": ["", "Cola", 7, None],
+        "nutrition_grade_fr": ["a", "", "e", None],
+    })
+    df["year"], df["country"] = schema.partition_columns(df["created_t"],
+                                                         df["countries_tags"])
+    return df
+
+
+def test_plan_kernels_and_failure_counts():
+    failures = {}
+    out = coercion.compile_plan().apply(_frame(), failures)
+    assert list(out.columns) == schema.ID_COLS + schema.KEEP_COLS + schema.PART_COLS
+
+    assert out["fat_100g"].dtype == "float32"
+    assert out["fat_100g"].iloc[0] == 1.5 and out["fat_100g"].isna()[1:].all()
+    assert out["sugars_100g"].tolist()[::3] == [3.0, 4.0]
+    assert out["created_t"].dtype == "Int64"
+    assert out["created_t"].tolist()[0] == 1600000000          # half to even
+    assert out["created_t"].tolist()[2] == 1600000000
+    assert out["brands_tags"].tolist() == [["a", "b"], ["solo"], [], []]
+    assert out["countries_tags"].tolist() == [["en:france"], [], [], ["en:spain", "1"]]
+    assert out["main_category"].isna().tolist() == [True, False, True, False]
+    assert out["product_name"].tolist()[:3] == ["", "Cola", "7"]
+    assert out["energy_100g"].isna().all()                     # missing column
+
+    assert failures == {"fat_100g": 2, "created_t": 2, "brands_tags": 1,
+                        "main_category": 1}
+    assert coercion.compile_plan() is coercion.compile_plan()
+
+
+def test_tags_fix_only_the_cells_that_need_it():
+    clean = ["a", "b"]
+    s = pd.Series([clean, 7, ["c", None], None, {"x": 1}], dtype=object)
+    out, failed = coercion._tags(s)
+    assert out.tolist() == [["a", "b"], ["7"], ["c"], [], []] and failed == 1
+    assert out.iloc[0] is clean          # bare scalars elsewhere: still kept
+
+
+def test_cast_frame_reports_failures_in_metrics():
+    met = m.Metrics()
+    df = ingest.cast_frame(_frame(), categorical=True, metrics=met)
+    assert str(df["main_category"].dtype) == "category"
+    assert str(df["year"].dtype) == "category"
+    assert met.counters["coerce_failures:fat_100g"] == 2
+    assert met.report()["counters"]["coerce_failures:created_t"] == 2
+    merged = m.Metrics()
+    merged.merge(met.snapshot())
+    merged.merge(met.snapshot())
+    assert merged.counters["coerce_failures:brands_tags"] == 2
+
+
+def test_candidate_columns_get_a_kind():
+    rules = coercion.candidate_rules()
+    assert {c for c, r in rules.items() if r.kind == "tags"} >= {
+        "categories_tags", "labels_tags", "packaging_tags"}
+    assert rules["additives_n"].kind == "float"
+    assert rules["created_t"].kind == "int"
+    assert all(r.kind in coercion.KINDS for r in rules.values())
+    assert math.isnan(coercion._numbers(pd.Series(["x"]))[0][0])
+    assert np.isnan(coercion._float(pd.Series([None], dtype=object))[0][0])
@@ -0,0 +1,59 @@
+import json
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+from ingestion import compact
+
+PART = ds.partitioning(pa.schema([("year", pa.string()),
+                                  ("country", pa.string())]), flavor="hive")
+
+
+def _small_files(root, n=6):
+    for i in range(n):
+        d = root / "year=2020" / ("country=canada" if i % 2 else "country=france")
+        d.mkdir(parents=True, exist_ok=True)
+        pq.write_table(pa.table({"fat_100g": pa.array([float(i)] * 10, pa.float32())}),
+                       d / f"chunk-{i}.parquet")
+
+
+def test_compact_merges_small_files(tmp_path):
+    _small_files(tmp_path)
+    before = ds.dataset(tmp_path, partitioning=PART).to_table()
+
+    results = compact.compact(str(tmp_path), workers=2)
+
+    assert sorted(r.files_after for r in results) == [1, 1]
+    assert len(list(tmp_path.rglob("*.parquet"))) == 2
+    after = ds.dataset(tmp_path, partitioning=PART).to_table()
+    assert after.num_rows == before.num_rows
+    assert sorted(after["fat_100g"].to_pylist()) == \
+        sorted(before["fat_100g"].to_pylist())
+    assert not list(tmp_path.rglob("_*"))
+
+
+def test_interrupted_swap_is_rolled_forward(tmp_path):
+    _small_files(tmp_path, n=2)
+    part = tmp_path / "year=2020" / "country=france"
+    old = part / "chunk-0.parquet"
+    tmp = part / "_tmp-x-00000.parquet"
+    tmp.write_bytes(old.read_bytes())
+    (part / compact.JOURNAL).write_text(json.dumps({
+        "moves": {str(tmp): str(part / "part-cx-00000.parquet")},
+        "replaced": [str(old)],
+    }))
+
+    compact.compact(str(tmp_path))
+
+    assert [p.name for p in part.iterdir()] == ["part-cx-00000.parquet"]
+
+
+def test_tmp_files_without_journal_are_removed(tmp_path):
+    _small_files(tmp_path, n=2)
+    part = tmp_path / "year=2020" / "country=france"
+    (part / "_tmp-x-00000.parquet").write_bytes(b"half-written")   # crash pre-journal
+
+    assert not compact.replay_journal(pafs.LocalFileSystem(), str(part))
+
+    assert [p.name for p in part.iterdir()] == ["chunk-0.parquet"]
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+from fe import decode
+from fe.schema import extract_columns
+
+DEEP = {"a": [[[[[[[[{"b": "]}"}]]]]]]]]}
+
+RECORDS = [
+    {"code": "1", "product_name": "Oats \"crunchy\" [x] {y}",
+     "images": {"1": {"sizes": {"100": {"w": 1}}}}, "deep": DEEP,
+     "nutriments": {"energy_100g": 1500, "junk": {"x": [1, {"y": 2}]},
+                    "fat_100g": "3.2", "sugars_100g": None},
+     "countries_tags": ["en:france"], "created_t": 1600000000,
+     "ingredients": [{"text": "sugar \\ salt", "sub": [{"id": "é"}]}]},
+    {"nutriments": "not-a-dict", "brands_tags": [], "main_category": ""},
+    {"product_name": {"fr": "Pain"}, "nutriments": {}, "z": 1e-7},
+    {},
+]
+
+
+# valid JSON that json.dumps never produces
+RAW_LINES = [
+    '{"nutriments":{"fat_100g":1e400}}',
+    '{"code":"1","product_name":"a","product_name":"b"}',
+    '{"nutriments":{"fat_100g":1,"fat_100g":2},"nutriments":{"sugars_100g":3}}',
+]
+
+
+def _every_key(tree):
+    return {k: 1 if v is True else _every_key(v) for k, v in tree.items()}
+
+
+# repeats after every projected key was seen (top level, then nested)
+_TOP = _every_key(decode.projection_tree())
+_NUT = _TOP.pop("nutriments")
+RAW_LINES += [
+    json.dumps({**_TOP, "nutriments": _NUT})[:-1] + ', "product_name": "late"}',
+    json.dumps(_TOP)[:-1] + ', "nutriments": ' + json.dumps(_NUT)[:-1]
+    + ', "fat_100g": 9}}',
+]
+
+
+def _lines():
+    for rec in RECORDS:
+        yield json.dumps(rec)
+        yield json.dumps(rec, indent=1).replace("\n", " ")
+        yield json.dumps(rec, ensure_ascii=False, separators=(",", ":"))
+    yield from RAW_LINES
+
+
+@pytest.mark.parametrize("backend", ["scan", "simdjson"])
+def test_decoder_matches_full_parse(backend):
+    if backend == "simdjson":
+        pytest.importorskip("simdjson")
+    dec = decode.make_decoder(backend)
+    for line in _lines():
+        assert dec(line) == extract_columns(json.loads(line))
+        assert dec(line.encode("utf-8")) == extract_columns(json.loads(line))
+
+
+def test_projection_tree_nests_nutriments():
+    tree = decode.projection_tree()
+    assert tree["product_name"] is True
+    assert tree["nutriments"]["fat_100g"] is True
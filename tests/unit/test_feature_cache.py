@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("xgboost")
+
+from data_prep import feature_cache, loader, sampling  # noqa: E402
+from ingestion import arrow_engine, manifest, storage, synthetic  # noqa: E402
+
+
+def _write(root, rows, seed):
+    batch = arrow_engine.batch_from_lines(list(synthetic.iter_lines(rows, seed=seed)))
+    arrow_engine.write_batch(batch, *storage.resolve(root))
+    manifest.rebuild(root)
+
+
+def test_warm_run_hits_and_data_change_misses(tmp_path, monkeypatch):
+    root = str(tmp_path / "processed")
+    _write(root, 2_000, seed=3)
+    cache = feature_cache.FeatureCache(str(tmp_path / "cache"))
+
+    X, y = feature_cache.matrix(root, cache=cache, batch_size=300)
+    want = list(loader.iter_training_batches(manifest.open_dataset(root)))
+    assert X.shape == (sum(len(b[1]) for b in want), len(loader.FEATURE_COLS))
+    assert len(cache.entries()) == 1
+
+    def boom(*args, **kwargs):
+        raise AssertionError("rebuilt on a warm run")
+
+    monkeypatch.setattr(loader, "iter_training_batches", boom)
+    X2, y2 = feature_cache.matrix(root, cache=cache)
+    assert isinstance(X2, np.memmap)
+    np.testing.assert_array_equal(X2, X)
+    np.testing.assert_array_equal(y2, y)
+    monkeypatch.undo()
+
+    key = feature_cache.cache_key(root)[0]
+    _write(root, 500, seed=4)                       # new files → new key
+    assert feature_cache.cache_key(root)[0] != key
+    assert feature_cache.cache_key(root, columns=loader.FEATURE_COLS[:2])[0] != key
+    # an edit to the serving_size parser is a different featurizer
+    key = feature_cache.cache_key(root)[0]
+    real = feature_cache._source_hash
+    monkeypatch.setattr(feature_cache, "_source_hash", lambda mod: "edited"
+                        if mod is feature_cache.serving else real(mod))
+    assert feature_cache.cache_key(root)[0] != key
+    monkeypatch.undo()
+    p = sampling.plan(root, 0.5, seed=1)
+    assert feature_cache.cache_key(p)[0] != feature_cache.cache_key(root)[0]
+    assert len(feature_cache.matrix(root, cache=cache)[1]) > len(y)
+
+
+def test_lru_eviction_under_budget(tmp_path):
+    cache = feature_cache.FeatureCache(str(tmp_path), budget=15_000)
+    cols = ["a", "b"]
+
+    def put(key, rows):
+        return cache.put(key, [(np.ones((rows, 2)), np.zeros(rows))], cols)
+
+    put("k1", 500)                                  # ~6 kB each
+    put("k2", 500)
+    assert cache.get("k1") is not None              # k1 now most recent
+    put("k3", 500)
+    assert [e.key for e in cache.entries()] == ["k1", "k3"]
+    X, y = put("big", 2_000)                        # over budget on its own
+    assert [e.key for e in cache.entries()] == ["big"] and X.shape == (2_000, 2)
+    assert cache.get("k2") is None
@@ -0,0 +1,56 @@
+import numpy as np
+import pyarrow as pa
+import pytest
+from fe import feature_store
+from ingestion import arrow_engine, synthetic
+
+
+def _table(rows=500):
+    batch = arrow_engine.batch_from_lines(list(synthetic.iter_lines(rows, seed=3)))
+    extra = pa.table({"code": ["0123", "123", "ABC-42", None],
+                      "product_name": ["zero", "plain", "odd", "none"],
+                      **{c: pa.array([1.0, 2.0, 3.0, 4.0], pa.float32())
+                         for c in feature_store.FEATURE_COLS}})
+    return pa.concat_tables([pa.Table.from_batches([batch]).select(extra.column_names),
+                             extra])
+
+
+def test_build_and_lookup(tmp_path):
+    table = _table()
+    store = feature_store.build(table, str(tmp_path / "fs"))
+    reopened = feature_store.FeatureStore(str(tmp_path / "fs"))
+    assert len(reopened) == len(store) == len(set(table["code"].drop_null().to_pylist()))
+
+    row = table.slice(7, 1).to_pylist()[0]
+    hit = reopened.get(row["code"])
+    assert hit.product_name == row["product_name"]
+    want = np.array([row[c] for c in feature_store.FEATURE_COLS], dtype=np.float32)
+    np.testing.assert_array_equal(hit.features, want)
+
+    # leading zeros and non-numeric barcodes are distinct keys
+    assert reopened.get("0123").product_name == "zero"
+    assert reopened.get("123").product_name == "plain"
+    assert reopened.get("ABC-42").features[0] == 3.0
+    assert reopened.get("does-not-exist") is None and "" not in reopened
+    # non-ASCII digits are hashed, never mistaken for (or crash like) "123"
+    assert reopened.get("\u0661\u0662\u0663") is None
+    assert reopened.get("12\u00b2") is None
+    assert feature_store.barcode_key("\u0661\u0662\u0663") >= 1 << 63
+
+
+def test_get_many_matches_get(tmp_path):
+    store = feature_store.build(_table(), str(tmp_path / "fs"))
+    codes = ["ABC-42", "nope", "0123", "99999999999999999999"]
+    feats, found = store.get_many(codes)
+    assert found.tolist() == [True, False, True, False]
+    assert np.isnan(feats[~found]).all()
+    np.testing.assert_array_equal(feats[0], store.get("ABC-42").features)
+
+
+def test_rebuild_replaces_store(tmp_path):
+    out = str(tmp_path / "fs")
+    feature_store.build(_table(), out)
+    small = feature_store.build(_table().slice(0, 10), out)
+    assert len(feature_store.FeatureStore(out)) == len(small) <= 10
+    with pytest.raises(FileNotFoundError):
+        feature_store.FeatureStore(str(tmp_path / "missing"))
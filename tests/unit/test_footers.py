@@ -0,0 +1,40 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from ingestion import footers, validate_ingest
+from ingestion.arrow_engine import arrow_schema
+
+
+def _dataset(root, n=4):
+    table = pa.Table.from_pylist([{}] * 3, schema=arrow_schema(partitions=False))
+    for i in range(n):
+        part = root / "year=2020" / f"country=c{i % 2}"
+        part.mkdir(parents=True, exist_ok=True)
+        pq.write_table(table, part / f"part-{i}.parquet")
+
+
+def test_scan_reuses_cached_footers(tmp_path):
+    _dataset(tmp_path)
+    uri = str(tmp_path)
+
+    manifest, stats = footers.scan(uri, workers=4)
+    assert (stats.files, stats.read, manifest.rows) == (4, 4, 12)
+    assert (tmp_path / footers.MANIFEST_NAME).exists()
+    assert validate_ingest.check_footers(manifest) == 12
+
+    _, stats = footers.scan(uri)
+    assert (stats.reused, stats.read) == (4, 0)
+
+    (tmp_path / "year=2020" / "country=c0" / "part-0.parquet").unlink()
+    _dataset(tmp_path, n=1)                           # rewritten file
+    _, stats = footers.scan(uri)
+    assert (stats.reused, stats.read) == (3, 1)
+
+
+def test_check_footers_reports_bad_schema(tmp_path):
+    _dataset(tmp_path, n=1)
+    pq.write_table(pa.table({"fat_100g": [1.0]}),
+                   tmp_path / "year=2020" / "country=c0" / "bad.parquet")
+    manifest, _ = footers.scan(str(tmp_path))
+    with pytest.raises(ValueError, match="bad.parquet"):
+        validate_ingest.check_footers(manifest)
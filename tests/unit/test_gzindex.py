@@ -0,0 +1,33 @@
+import gzip
+import json
+
+import pytest
+
+pytest.importorskip("indexed_gzip")
+from ingestion import gzindex  # noqa: E402
+
+MiB = 1 << 20
+
+
+def _dump(path, n=20_000):
+    with gzip.open(path, "wt", encoding="utf-8") as fh:
+        for i in range(n):
+            fh.write(json.dumps({"code": str(i), "pad": "x" * (i % 257)}) + "\n")
+
+
+def test_ranges_are_line_aligned_and_complete(tmp_path):
+    src = tmp_path / "off.jsonl.gz"
+    _dump(src)
+
+    idx = gzindex.build(str(src), spacing=MiB)
+    assert len(idx.ranges()) > 1
+    assert gzindex.load(str(src)) == idx          # cached next to the input
+
+    lines = [ln for a, b in idx.ranges() for ln in gzindex.read_range(idx, a, b)]
+    with gzip.open(src, "rb") as fh:
+        assert lines == fh.readlines()
+
+    # resuming from a mid-file line boundary keeps the remaining lines only
+    start = idx.splits[0]
+    rest = [ln for a, b in idx.ranges(start) for ln in gzindex.read_range(idx, a, b)]
+    assert sum(map(len, rest)) == idx.total - start
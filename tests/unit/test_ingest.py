@@ -0,0 +1,212 @@
+import gzip
+import json
+
+import boto3
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+import pytest
+from ingestion import checkpoint, compact, layout
+from ingestion import ingest_nutrisage as ingest
+from ingestion import validate_ingest
+
+
+def _write_jsonl(path, rows):
+    with gzip.open(path, "wt", encoding="utf-8") as fh:
+        for r in rows:
+            fh.write(json.dumps(r) + "\n")
+
+
+ROWS = [
+    {"code": "1", "product_name": "Oats", "created_t": 1600000000,
+     "countries_tags": ["en:canada"], "brands_tags": ["acme"],
+     "nutrition_grade_fr": "a",
+     "nutriments": {"fat_100g": 7.1, "sugars_100g": "1.2"}},
+    {"code": "2", "created_t": "junk", "countries_tags": "France",
+     "main_category": "", "nutriments": {"energy_100g": 1500}},
+    {"code": "3"},
+] * 5
+OVERFLOW = [{"code": "4", "created_t": 1e20, "countries_tags": ["en:spain"]},
+            {"code": "5", "created_t": "99999999999999999999"}]
+
+
+def test_workers_match_serial(tmp_path):
+    src = tmp_path / "off.jsonl.gz"
+    _write_jsonl(src, ROWS)
+
+    with gzip.open(src, "rt", encoding="utf-8") as fh:
+        serial = list(ingest.iter_frames(fh, chunk_rows=4))
+    with gzip.open(src, "rt", encoding="utf-8") as fh:
+        parallel = list(ingest.iter_frames(fh, chunk_rows=4, workers=2,
+                                           max_inflight=2))
+
+    assert [len(f) for f in parallel] == [4, 4, 4, 3]
+    pd.testing.assert_frame_equal(pd.concat(serial), pd.concat(parallel))
+
+
+def test_arrow_engine_matches_pandas(tmp_path):
+    src = tmp_path / "off.jsonl.gz"
+    _write_jsonl(src, ROWS + OVERFLOW)
+
+    with gzip.open(src, "rt", encoding="utf-8") as fh:
+        frames = pd.concat(ingest.iter_frames(fh, chunk_rows=4))
+    with gzip.open(src, "rt", encoding="utf-8") as fh:
+        batches = list(ingest.iter_batches(fh, chunk_rows=4))
+
+    table = pa.Table.from_batches(batches)
+    expected = pa.Table.from_pandas(frames, preserve_index=False)
+    assert table.column_names == expected.column_names
+    for name in table.column_names:
+        assert table[name].to_pylist() == expected[name].to_pylist(), name
+
+
+@pytest.mark.parametrize("engine", ["pandas", "arrow"])
+def test_stream_ingest_local(tmp_path, engine):
+    src = tmp_path / "off.jsonl.gz"
+    _write_jsonl(src, ROWS)
+    out = tmp_path / "processed"
+
+    ingest.stream_ingest(str(src), "raw", str(out), boto3.Session(
+        region_name="us-east-1"), chunk_rows=4, engine=engine)
+
+    part = ds.partitioning(pa.schema([("year", pa.string()),
+                                      ("country", pa.string())]), flavor="hive")
+    table = ds.dataset(out, format="parquet", partitioning=part).to_table()
+    assert table.num_rows == len(ROWS)
+    assert validate_ingest.check_detailed({"t": table}) == len(ROWS)
+
+
+def test_write_parquet_applies_layout_to_every_partition(tmp_path):
+    df = ingest.frame_from_lines([json.dumps(r) for r in ROWS])
+    tiny = layout.LayoutProfile("tiny", row_group_rows=2)
+
+    paths = ingest.write_parquet(df, pafs.LocalFileSystem(), str(tmp_path),
+                                 run_id="r-000000", layout=tiny)
+
+    assert len(paths) == 3 and all("/part-r-000000-" in p for p in paths)
+    for path in paths:
+        md = pq.ParquetFile(path).metadata
+        assert [md.row_group(i).num_rows for i in range(md.num_row_groups)] == \
+            [2, 2, 1], path
+
+
+@pytest.mark.parametrize("engine", ["pandas", "arrow"])
+def test_categorical_ingest_writes_dictionaries(tmp_path, engine):
+    src = tmp_path / "off.jsonl.gz"
+    _write_jsonl(src, ROWS)
+    out = tmp_path / "processed"
+
+    ingest.stream_ingest(str(src), "raw", str(out), boto3.Session(
+        region_name="us-east-1"), chunk_rows=4, engine=engine,
+        writer="buffered", categorical=True)
+
+    table = ds.dataset(out, format="parquet", partitioning="hive").to_table()
+    dict_ = pa.dictionary(pa.int32(), pa.string())
+    assert table.schema.field("nutrition_grade_fr").type == dict_
+    assert table.schema.field("brands_tags").type.value_type == dict_
+    validate_ingest.check_schema(table.schema)
+
+    plain = table.cast(compact._plain_schema(table.schema))
+    assert sorted(plain["nutrition_grade_fr"].to_pylist(), key=str) == \
+        sorted(["a", None, None] * 5, key=str)
+    assert plain["brands_tags"].to_pylist().count(["acme"]) == 5
+
+
+def test_stream_ingest_buffered_writer(tmp_path):
+    src = tmp_path / "off.jsonl.gz"
+    _write_jsonl(src, ROWS)
+    out = tmp_path / "processed"
+
+    ingest.stream_ingest(str(src), "raw", str(out), boto3.Session(
+        region_name="us-east-1"), chunk_rows=4, writer="buffered")
+
+    files = list(out.rglob("*.parquet"))
+    assert len(files) == 3          # one per partition, not per chunk
+    part = ds.partitioning(pa.schema([("year", pa.string()),
+                                      ("country", pa.string())]), flavor="hive")
+    assert ds.dataset(out, partitioning=part).count_rows() == len(ROWS)
+
+
+@pytest.mark.parametrize("writer", ["append", "buffered"])
+def test_resume_after_crash_never_doubles_rows(tmp_path, monkeypatch, writer):
+    src = tmp_path / "off.jsonl.gz"
+    _write_jsonl(src, ROWS)
+    out = tmp_path / "processed"
+    kw = dict(chunk_rows=4, engine="arrow", writer=writer, checkpoint_every=1)
+    sess = boto3.Session(region_name="us-east-1")
+
+    save = checkpoint.Checkpoint.save
+    calls = []
+
+    def crash_on_third_commit(self, uri, session=None):
+        assert session is sess    # the run's session, not the default chain
+        calls.append(self.chunks)
+        if len(calls) == 3:       # chunk 3 written, but never committed
+            raise RuntimeError("boom")
+        save(self, uri, session)
+
+    monkeypatch.setattr(checkpoint.Checkpoint, "save", crash_on_third_commit)
+    with pytest.raises(RuntimeError):
+        ingest.stream_ingest(str(src), "raw", str(out), sess, **kw)
+    monkeypatch.setattr(checkpoint.Checkpoint, "save", save)
+
+    ckpt = checkpoint.Checkpoint.load(checkpoint.default_path(str(src)))
+    assert (ckpt.chunks, ckpt.lines) == (2, 8)
+
+    ingest.stream_ingest(str(src), "raw", str(out), sess, resume=True, **kw)
+
+    part = ds.partitioning(pa.schema([("year", pa.string()),
+                                      ("country", pa.string())]), flavor="hive")
+    assert ds.dataset(out, partitioning=part).count_rows() == len(ROWS)
+    assert checkpoint.Checkpoint.load(checkpoint.default_path(str(src))).complete
+
+
+def test_stream_ingest_gz_index_ranges(tmp_path):
+    pytest.importorskip("indexed_gzip")
+    src = tmp_path / "off.jsonl.gz"
+    _write_jsonl(src, ROWS * 20)
+    out = tmp_path / "processed"
+
+    ingest.stream_ingest(str(src), "raw", str(out), boto3.Session(
+        region_name="us-east-1"), chunk_rows=4, engine="arrow",
+        workers=2, gz_index=True)
+
+    part = ds.partitioning(pa.schema([("year", pa.string()),
+                                      ("country", pa.string())]), flavor="hive")
+    assert ds.dataset(out, partitioning=part).count_rows() == len(ROWS) * 20
+
+
+def test_incremental_only_rewrites_changed_products(tmp_path):
+    base = [{"code": str(i), "created_t": 1600000000, "last_modified_t": 100,
+             "countries_tags": ["en:canada" if i % 2 else "en:france"],
+             "nutriments": {"fat_100g": float(i)}} for i in range(10)]
+    undated = {"code": "u", "created_t": 1600000000, "countries_tags": ["en:spain"]}
+    full = tmp_path / "full.jsonl.gz"
+    _write_jsonl(full, base + [undated])
+    out = tmp_path / "processed"
+
+    stats = ingest.delta_ingest(str(full), str(out), None, chunk_rows=4)
+    assert (stats.new, stats.no_modified, stats.below_watermark) == (11, 1, 0)
+
+    delta = [dict(base[3], last_modified_t=200, nutriments={"fat_100g": 99.0}),
+             dict(base[4]),                                   # unchanged
+             dict(undated),                                   # undated: rewritten
+             {"code": "10", "created_t": 1600000000, "last_modified_t": 200,
+              "countries_tags": ["en:canada"]}]
+    daily = tmp_path / "delta.jsonl.gz"
+    _write_jsonl(daily, delta)
+    france = sorted((out / "year=2020" / "country=france").iterdir())
+
+    stats = ingest.delta_ingest(str(daily), str(out), None, chunk_rows=4)
+    assert (stats.new, stats.changed, stats.below_watermark) == (1, 2, 1)
+    # only the partition holding product 3 (canada) was touched
+    assert sorted((out / "year=2020" / "country=france").iterdir()) == france
+
+    table = ds.dataset(out, partitioning="hive").to_table()
+    fat = dict(zip(table["code"].to_pylist(), table["fat_100g"].to_pylist()))
+    assert table.num_rows == 12 and fat["3"] == 99.0 and "u" in fat
+
+    ingest.delta_ingest(str(daily), str(out), None, chunk_rows=4)   # replay
+    assert ds.dataset(out, partitioning="hive").to_table().num_rows == 12
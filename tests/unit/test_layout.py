@@ -0,0 +1,51 @@
+import pyarrow as pa
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+import pytest
+from ingestion import arrow_engine, layout, synthetic
+from ingestion.writer import PartitionWriter
+
+
+def _batch(rows=2_000):
+    return arrow_engine.batch_from_lines(list(synthetic.iter_lines(rows, seed=1)))
+
+
+def test_scan_profile_sorts_and_indexes(tmp_path):
+    w = PartitionWriter(pafs.LocalFileSystem(), str(tmp_path), layout="scan")
+    w.write(_batch())
+    w.close()
+
+    for f in w.files:
+        meta = pq.read_metadata(f.path)
+        col = meta.row_group(0).column(meta.schema.names.index("code"))
+        assert col.compression == "ZSTD"
+        assert col.has_offset_index and col.bloom_filter_offset is not None
+        assert meta.row_group(0).sorting_columns[0].column_index == \
+            meta.schema.names.index("main_category")
+        cats = pq.read_table(f.path, columns=["main_category"])["main_category"]
+        assert cats.drop_null().to_pylist() == sorted(cats.drop_null().to_pylist())
+        assert cats.null_count == 0 or cats[len(cats) - 1].as_py() is None
+
+
+def test_write_batch_applies_layout(tmp_path):
+    prof = layout.LayoutProfile("tiny", row_group_rows=50, sort_by=("code",))
+    paths = arrow_engine.write_batch(_batch(), pafs.LocalFileSystem(),
+                                     str(tmp_path), layout=prof)
+    for path in paths:
+        meta = pq.read_metadata(path)
+        assert all(meta.row_group(i).num_rows <= 50
+                   for i in range(meta.num_row_groups))
+        codes = pq.read_table(path, columns=["code"])["code"].to_pylist()
+        assert codes == sorted(codes)
+
+
+def test_bench_reports_every_profile():
+    table = pa.Table.from_batches([_batch(3_000)])
+    results = layout.bench(table, repeat=1, file_rows=1_000)
+    assert [r.profile for r in results] == list(layout.PROFILES)
+    assert {r.files for r in results} == {3}
+    hits = {label: s["rows"] for label, s in results[0].scans.items()}
+    for r in results[1:]:
+        assert {label: s["rows"] for label, s in r.scans.items()} == hits
+    with pytest.raises(ValueError):
+        layout.get("nope")
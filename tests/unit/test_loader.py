@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pytest
+
+xgboost = pytest.importorskip("xgboost")
+
+from data_prep import cleaning, loader  # noqa: E402
+from ingestion import arrow_engine, storage, synthetic  # noqa: E402
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    batch = arrow_engine.batch_from_lines(list(synthetic.iter_lines(3_000, seed=5)))
+    arrow_engine.write_batch(batch, *storage.resolve(str(tmp_path)))
+    return ds.dataset(str(tmp_path), format="parquet", partitioning="hive")
+
+
+def test_batches_match_full_clean(dataset):
+    parts = list(loader.iter_training_batches(dataset, batch_size=256))
+    assert all(len(X) <= 256 and X.dtype == np.float32 for X, _ in parts)
+    X = np.concatenate([p[0] for p in parts])
+    y = np.concatenate([p[1] for p in parts])
+
+    full = cleaning.clean(dataset.to_table().to_pandas())
+    assert len(y) == len(full)
+    assert set(np.unique(y)) <= set(range(len(loader.LABELS)))
+    want = full[loader.FEATURE_COLS].to_numpy(dtype="float32", na_value=np.nan)
+    got = pd.DataFrame(X).sort_values(list(range(X.shape[1]))).to_numpy()
+    want = pd.DataFrame(want).sort_values(list(range(X.shape[1]))).to_numpy()
+    np.testing.assert_array_equal(got, want)
+
+
+def test_quantile_dmatrix_trains(dataset):
+    it = loader.batch_iter(dataset, batch_size=500)
+    dtrain = xgboost.QuantileDMatrix(it, max_bin=32)
+    assert dtrain.num_row() == it.rows
+    assert dtrain.feature_names == loader.FEATURE_COLS
+
+    booster = xgboost.train({"objective": "multi:softprob", "num_class": 5,
+                             "tree_method": "hist", "max_bin": 32}, dtrain, 2)
+    assert booster.predict(dtrain).shape == (dtrain.num_row(), 5)
+    assert loader.encode_labels(pa.array(["a", "e", "x", None])).tolist() == [0, 4, -1, -1]
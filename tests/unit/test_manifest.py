@@ -0,0 +1,69 @@
+import gzip
+import json
+
+import boto3
+import pyarrow.dataset as ds
+from ingestion import compact, manifest, validate_ingest
+from ingestion import ingest_nutrisage as ingest
+
+
+def _dump(path, n=40):
+    with gzip.open(path, "wt", encoding="utf-8") as fh:
+        for i in range(n):
+            fh.write(json.dumps({
+                "code": str(i), "created_t": 1262304000 + (i % 4) * 31_600_000,
+                "countries_tags": ["en:france" if (i // 4) % 2 else "en:canada"],
+                "nutriments": {"fat_100g": float(i)}}) + "\n")
+
+
+def test_ingest_writes_manifest_and_reader_prunes(tmp_path):
+    src, out = tmp_path / "off.jsonl.gz", tmp_path / "processed"
+    _dump(src)
+    ingest.stream_ingest(str(src), "raw", str(out), boto3.Session(
+        region_name="us-east-1"), chunk_rows=7, engine="arrow")
+
+    m = manifest.DatasetManifest.load(str(out))
+    assert m.total_rows() == 40
+    assert validate_ingest.check_manifest(m) == 40
+    assert set(m.partition_counts()) == {(y, c) for y in ("2010", "2011", "2012", "2013")
+                                         for c in ("canada", "france")}
+
+    sel = m.files(years=(2011, 2012), countries={"france"})
+    assert sel and all("year=2011" in p or "year=2012" in p for p in sel)
+    assert m.total_rows(years=(2011, 2012), countries={"france"}) == \
+        m.dataset(years=(2011, 2012), countries={"france"}).count_rows() == 10
+    picked = m.select(years=(2010, 2010), countries={"canada"})
+    assert min(e.min["fat_100g"] for e in picked) == 0.0
+    assert max(e.max["fat_100g"] for e in picked) == 32.0
+
+    compact.compact(str(out), small_bytes=1 << 30)
+    after = manifest.DatasetManifest.load(str(out))
+    assert after.total_rows() == 40
+    assert len(after.entries) == 8
+    assert sorted(after.files()) == sorted(
+        f.path for f in ds.dataset(str(out), partitioning="hive").get_fragments())
+
+
+def test_first_manifest_keeps_files_already_there(tmp_path):
+    src, out = tmp_path / "off.jsonl.gz", tmp_path / "processed"
+    _dump(src)
+    ingest.stream_ingest(str(src), "raw", str(out), boto3.Session(
+        region_name="us-east-1"), chunk_rows=7, engine="arrow")
+    (out / manifest.MANIFEST).unlink()            # data from a manifest-less run
+
+    ingest.stream_ingest(str(src), "raw", str(out), boto3.Session(
+        region_name="us-east-1"), chunk_rows=7, engine="arrow")
+
+    m = manifest.DatasetManifest.load(str(out))
+    assert m.total_rows() == 80
+    assert manifest.open_dataset(str(out)).count_rows() == 80
+
+
+def test_validate_cli_manifest_engine(tmp_path, capsys):
+    src, out = tmp_path / "off.jsonl.gz", tmp_path / "processed"
+    _dump(src)
+    ingest.stream_ingest(str(src), "raw", str(out), boto3.Session(
+        region_name="us-east-1"), chunk_rows=7, engine="arrow")
+
+    validate_ingest.main(["--bucket", str(out), "--engine", "manifest"])
+    assert "Manifest validation OK – 40 rows" in capsys.readouterr().out
@@ -0,0 +1,39 @@
+import gzip
+import json
+
+from ingestion import ingest_nutrisage as ingest
+from ingestion import metrics as m
+from ingestion import synthetic
+
+
+def test_disabled_metrics_record_nothing():
+    with m.DISABLED.stage("x", rows=5) as span:
+        span.rows += 1
+    m.DISABLED.latency("write_parquet", 1.0)
+    assert m.DISABLED.stages == {} and m.DISABLED.latencies == {}
+
+
+def test_stage_stats_merge_and_export(tmp_path):
+    src = synthetic.write_dump(str(tmp_path / "s.jsonl.gz"), 500)
+    met = m.Metrics()
+    process = ingest.functools.partial(m.measured, ingest.frame_from_lines)
+    with gzip.open(src, "rb") as fh:
+        for _, _, (df, snap) in ingest.iter_chunks(fh, 200, process, workers=2,
+                                                   metrics=met):
+            met.merge(snap)
+            met.latency("write_parquet", 0.01)
+
+    assert met.stages["decompress"].calls == 3
+    assert met.stages["decompress"].rows == 500
+    for stage in ("decode", "partition", "cast"):
+        assert met.stages[stage].rows == 500 and met.stages[stage].cpu_s > 0
+
+    report = met.report(job="test")
+    assert report["latency"]["write_parquet"]["calls"] == 3
+    json.dumps(report)
+
+    lines = [json.loads(ln) for ln in met.emf_lines(Job="test")]
+    decode = next(ln for ln in lines if ln.get("Stage") == "decode")
+    assert decode["_aws"]["LogGroupName"] == m.LOG_GROUP
+    assert decode["_aws"]["CloudWatchMetrics"][0]["Dimensions"] == [["Job", "Stage"]]
+    assert decode["Rows"] == 500
@@ -0,0 +1,40 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from data_prep.cleaning import clean, clean_batches
+from data_prep.outliers import OutlierSink
+
+
+def _frame(n):
+    return pd.DataFrame({
+        "code": [str(i) for i in range(n)],
+        "fat_100g": [150.0 if i % 3 == 0 else 1.0 for i in range(n)],
+        "sugars_100g": [-1.0 if i % 3 == 1 else 2.0 for i in range(n)],
+        "nutrition_grade_fr": ["a"] * n,
+    })
+
+
+def test_sink_partitions_by_date_and_rule(tmp_path):
+    with OutlierSink(str(tmp_path), target_rows=10) as sink:
+        for _ in range(3):
+            assert len(clean(_frame(30), sink=sink)) == 10
+        sink.flush()
+        first = len(sink.files)
+        table = pa.Table.from_pandas(_frame(30), preserve_index=False)
+        out = list(clean_batches(table.to_batches(max_chunksize=15), sink=sink))
+    assert sum(b.num_rows for b in out) == 10
+    assert first == 6                           # 30 rows per rule → 3 files each
+
+    parts = {p.name for p in tmp_path.glob("date=*/rule=*")}
+    assert parts == {"rule=fat_100g.range", "rule=sugars_100g.range"}
+    logged = ds.dataset(tmp_path, partitioning="hive").to_table()
+    assert logged.num_rows == 80
+    assert set(logged["reason"].to_pylist()) == {"fat_100g:range",
+                                                 "sugars_100g:range"}
+
+
+def test_sink_is_append_only(tmp_path):
+    for _ in range(2):
+        with OutlierSink(str(tmp_path)) as sink:
+            clean(_frame(6), sink=sink)
+    assert ds.dataset(tmp_path, partitioning="hive").count_rows() == 8
@@ -0,0 +1,38 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ingestion import footers, quality
+from ingestion.arrow_engine import arrow_schema
+
+SCHEMA = arrow_schema(partitions=False)
+
+
+def _write(root, country, rows, **kw):
+    part = root / "year=2020" / f"country={country}"
+    part.mkdir(parents=True, exist_ok=True)
+    pq.write_table(pa.Table.from_pylist(rows, schema=SCHEMA), part / "p.parquet", **kw)
+
+
+def test_stats_only_report_flags_suspicious_row_groups(tmp_path):
+    ok = {"code": "1", "fat_100g": 5.0, "created_t": 1590000000,
+          "nutrition_grade_fr": "b"}
+    _write(tmp_path, "canada", [ok] * 4)
+    _write(tmp_path, "france",
+           [ok, ok, dict(ok, fat_100g=150.0, nutrition_grade_fr=None),
+            dict(ok, created_t=1000)], row_group_size=2)
+
+    manifest, _ = footers.scan(str(tmp_path))
+    report = {p.partition: p for p in quality.assess(manifest)}
+
+    canada = report["year=2020/country=canada"]
+    assert canada.flagged == [] and canada.label_coverage == 1.0
+    assert canada.null_ratio()["sugars_100g"] == 1.0
+
+    france = report["year=2020/country=france"]
+    assert france.rows == 4 and france.row_groups == 2
+    assert france.label_coverage == 0.75
+    assert france.created_min == 1000
+    assert [(f.row_group, f.reasons) for f in france.flagged] == \
+        [(1, ["fat_100g:range", "created_t:year"])]
+
+    assert quality.scan_flagged(manifest, list(report.values())) == \
+        {"fat_100g:range": 1, "created_t:year": 1}
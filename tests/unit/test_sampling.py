@@ -0,0 +1,53 @@
+import pyarrow.fs as pafs
+import pytest
+from data_prep import loader, sampling
+from ingestion import arrow_engine, layout, synthetic
+from ingestion.writer import PartitionWriter
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    prof = layout.LayoutProfile("grades", row_group_rows=40,
+                                sort_by=("nutrition_grade_fr",))
+    with PartitionWriter(pafs.LocalFileSystem(), str(tmp_path), layout=prof) as w:
+        w.write(arrow_engine.batch_from_lines(list(synthetic.iter_lines(6_000, seed=7))))
+    return str(tmp_path)
+
+
+def test_plan_is_stratified_and_reproducible(dataset):
+    p = sampling.plan(dataset, fraction=0.3, seed=1)
+    assert p.selected == sampling.plan(dataset, fraction=0.3, seed=1).selected
+    assert p.selected != sampling.plan(dataset, fraction=0.3, seed=2).selected
+
+    total = sum(s.rows for s in p.strata.values())
+    assert abs(p.rows / total - 0.3) < 0.03
+    assert abs(p.bytes_sampled / p.bytes_total - 0.3) < 0.05
+    # every big stratum is sampled near the fraction (row groups ≤ 40 rows)
+    for st in p.strata.values():
+        if st.rows >= 400:
+            assert abs(st.sampled_rows - 0.3 * st.rows) <= 40
+    # grade-sorted files give single-grade strata
+    assert any(k.endswith("nutrition_grade_fr=a") for k in p.strata)
+
+
+def test_plan_dataset_reads_only_sampled_rows(dataset):
+    p = sampling.plan(dataset, fraction=0.2, seed=3, by=["country"])
+    dset = p.dataset()
+    table = dset.to_table(columns=["code", "country"])
+    assert table.num_rows == p.rows
+    assert set(table["country"].to_pylist()) <= {k.split("=", 1)[1] for k in p.strata}
+
+    it = loader.batch_iter(dset, batch_size=500)
+    assert sum(len(y) for _, y in it._make()) <= p.rows
+    with pytest.raises(ValueError):
+        sampling.plan(dataset, fraction=0)
+
+
+def test_small_strata_are_never_dropped(tmp_path):
+    # one row group per file: each stratum is a few groups bigger than its target
+    with PartitionWriter(pafs.LocalFileSystem(), str(tmp_path)) as w:
+        w.write(arrow_engine.batch_from_lines(list(synthetic.iter_lines(3_000, seed=5))))
+    p = sampling.plan(str(tmp_path), fraction=0.1, seed=0, by=["country"])
+    assert p.strata and all(st.sampled_row_groups >= 1 for st in p.strata.values())
+    total = sum(st.rows for st in p.strata.values())
+    assert p.rows < 0.5 * total
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+from fe import schema
+
+CREATED = [1600000000, "1600000000", 1.6e9, "1.6e9", None, np.nan, "junk",
+           True, -1, 0, 10**12, 253402300799, "  42 ", 1234567890.9]
+COUNTRIES = [["en:canada"], "en:France, de:Germany", None, [], "", np.nan,
+             ["fr:  côte d'ivoire"], ["en:"], "united states", ["en:canada"],
+             ["de-deutschland"], ["en:canada"], ["en:spain"], "en:Spain"]
+
+
+def test_partition_columns_match_row_wise():
+    rows = [{"created_t": c, "countries_tags": t}
+            for c, t in zip(CREATED, COUNTRIES)]
+    expected = [schema.make_partition_values(r) for r in rows]
+
+    # python lists, object columns and numeric columns must all agree
+    df = pd.DataFrame(rows)
+    for created in (CREATED, df["created_t"]):
+        year, country = schema.partition_columns(created, df["countries_tags"])
+        assert list(year) == [e["year"] for e in expected]
+        assert list(country) == [e["country"] for e in expected]
+
+    numeric = pd.Series([1600000000, None, 0], dtype="float64")
+    year, _ = schema.partition_columns(numeric, [None] * 3)
+    assert list(year) == ["2020", "unknown", "1970"]
@@ -0,0 +1,64 @@
+import math
+
+import numpy as np
+import pyarrow as pa
+import pytest
+from fe import serving
+
+
+@pytest.mark.parametrize("text, want", [
+    ("30 g", (30.0, serving.G)),
+    ("100g", (100.0, serving.G)),
+    ("1 cup (240 ml)", (240.0, serving.ML)),
+    ("2 biscuits (25g)", (25.0, serving.G)),
+    ("1/2 cup", (120.0, serving.ML)),
+    ("1,5/2 cup", (180.0, serving.ML)),
+    ("12,5 G", (12.5, serving.G)),
+    ("33cl", (330.0, serving.ML)),
+    ("1 fl oz", (29.5735, serving.ML)),
+    ("2 oz (56 g)", (56.0, serving.G)),
+    ("1 large egg", None),
+    ("1 portion", None),
+    ("", None),
+])
+def test_parse_serving(text, want):
+    qty, unit = serving.parse_serving(text)
+    if want is None:
+        assert math.isnan(qty) and unit == -1
+    else:
+        assert (qty, unit) == pytest.approx(want)
+
+
+def test_parse_array_matches_per_row():
+    values = serving.synthetic_column(5_000, 300, seed=2)
+    values = pa.concat_arrays([values, pa.array([None, "1 portion"], pa.string())])
+    qty, unit = serving.parse_array(pa.chunked_array([values.slice(0, 10),
+                                                      values.slice(10)]))
+    assert qty.type == pa.float32() and unit.type == pa.int8()
+    for text, q, u in zip(values.to_pylist(), qty.to_pylist(), unit.to_pylist()):
+        want_q, want_u = serving.parse_serving(text)
+        assert (q is None) == math.isnan(want_q)
+        assert u == (None if want_u < 0 else want_u)
+        if q is not None:
+            assert q == pytest.approx(want_q, rel=1e-6)
+    assert qty.null_count == unit.null_count == 2
+    # dictionary input takes the same path
+    np.testing.assert_array_equal(serving.parse_array(values.dictionary_encode())[0],
+                                  qty)
+
+
+def test_loader_derives_serving_features(tmp_path):
+    pytest.importorskip("xgboost")
+    import pyarrow.dataset as ds
+    from data_prep import loader
+    from ingestion import arrow_engine, storage, synthetic
+
+    batch = arrow_engine.batch_from_lines(list(synthetic.iter_lines(1_000, seed=4)))
+    arrow_engine.write_batch(batch, *storage.resolve(str(tmp_path)))
+    dset = ds.dataset(str(tmp_path), format="parquet", partitioning="hive")
+    cols = [*loader.FEATURE_COLS, *serving.SERVING_COLS]
+    X = np.concatenate([x for x, _ in loader.iter_training_batches(dset, cols)])
+    qty, unit = X[:, -2], X[:, -1]
+    assert np.isin(unit[~np.isnan(unit)], [serving.G, serving.ML]).all()
+    assert set(np.unique(qty[~np.isnan(qty)])) <= {30.0, 240.0, 100.0, 25.0}
+    assert (~np.isnan(qty)).mean() > 0.5
@@ -0,0 +1,40 @@
+import pyarrow as pa
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+from ingestion.writer import PartitionWriter
+
+
+def _chunk(n, offset=0):
+    return pa.table({
+        "fat_100g": pa.array([float(i + offset) for i in range(n)], pa.float32()),
+        "year": ["2020" if i % 2 else "2021" for i in range(n)],
+        "country": ["canada" if i % 3 else "france" for i in range(n)],
+    })
+
+
+def test_buffers_across_chunks(tmp_path):
+    w = PartitionWriter(pafs.LocalFileSystem(), str(tmp_path))
+    for i in range(10):
+        w.write(_chunk(60, offset=i * 60))
+    stats = w.close()
+
+    # one file per year×country partition, not one per chunk
+    assert stats.files == 4
+    assert stats.rows == 600
+    paths = sorted(f.path for f in w.files)
+    assert "year=2020/country=canada" in paths[0]
+    assert sum(pq.read_metadata(p).num_rows for p in paths) == 600
+
+
+def test_target_rows_and_memory_cap(tmp_path):
+    w = PartitionWriter(pafs.LocalFileSystem(), str(tmp_path), target_rows=100)
+    for i in range(10):
+        w.write(_chunk(60, offset=i * 60))
+    w.close()
+    assert all(f.rows <= 100 + 15 for f in w.files)
+
+    capped = PartitionWriter(pafs.LocalFileSystem(), str(tmp_path / "c"),
+                             max_buffer_bytes=1)
+    capped.write(_chunk(60))
+    assert capped.stats.forced_flushes == 4
+    assert capped.close().files == 4